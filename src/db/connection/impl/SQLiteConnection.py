@@ -0,0 +1,21 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import sqlite3
+from typing import Optional
+
+class SQLiteConnection(sqlite3.Connection):
+    """
+    sqlite3.Connection created by SQLiteConnectionProvider.
+    Unlike the base class it can be weakly referenced, so factories can track the
+    connections they hand out (e.g. to cancel their running queries), and it carries
+    the default deadline applied by DAOs to queries run on it.
+    """
+
+    # Seconds a DAO query on this connection may run when no other timeout applies; None for no limit.
+    default_query_timeout: Optional[float] = None
+    # AdmissionController queueing the DAO work run on this connection; None for no admission control.
+    admission_controller = None
@@ -8,6 +8,8 @@
 import os
 import sqlite3
 from db.connection.IDbConnectionProvider import IDbConnectionProvider # Import the new interface
+from db.connection.impl.SQLiteConnection import SQLiteConnection
+from db.dao.QueryGuard import QueryGuard
 
 class SQLiteConnectionProvider(IDbConnectionProvider): # Inherit from the interface
     """
@@ -27,9 +29,10 @@ class SQLiteConnectionProvider(IDbConnectionProvider): # Inherit from the interf
         """
         Provides a new, configured SQLite connection.
         """
-        conn = sqlite3.connect(self.database_path, check_same_thread=False)
+        conn = sqlite3.connect(self.database_path, check_same_thread=False, factory=SQLiteConnection)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON;")
+        QueryGuard.attach(conn) # Deadline checks and cancellation for DAO queries
         return conn
 
     # No explicit close_connection here, as connections are returned and managed by caller.
\ No newline at end of file
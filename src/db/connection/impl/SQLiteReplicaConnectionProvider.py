@@ -0,0 +1,378 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from db.connection.impl.SQLiteConnectionProvider import SQLiteConnectionProvider
+from db.dao.QueryGuard import QueryGuard
+
+class _ReplicaCursor:
+    """
+    Cursor returned by ReplicatedConnection.cursor().
+    Routes each statement to the in-memory replica (reads) or writes it through.
+    """
+    def __init__(self, connection: "ReplicatedConnection"):
+        self._connection = connection
+        self._cursor = None
+
+    def execute(self, query, params=()):
+        self._cursor = self._connection._route(query, params)
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._cursor = self._connection._write("executemany", query, list(seq_of_params))
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+
+
+class ReplicatedConnection:
+    """
+    Connection-like object handed out by SQLiteReplicaConnectionProvider.
+    Reads (SELECT / WITH / EXPLAIN) are served by this connection's own handle on the
+    in-memory replica, so reads of different connections run in parallel. Every other
+    statement is executed on the file database and replayed on the replica when the
+    transaction commits; reads inside an open write transaction go to the file, so they
+    see its uncommitted rows.
+    """
+
+    _READ_KEYWORDS = ("SELECT", "WITH", "EXPLAIN", "VALUES")
+    # Statements not replayed: the replay runs in its own transaction, and pragmas are
+    # connection settings (pragma queries are answered by the file).
+    _NOT_REPLAYED = ("BEGIN", "COMMIT", "END", "PRAGMA")
+
+    # Seconds a DAO query on this connection may run when no other timeout applies; None for no limit.
+    default_query_timeout = None
+    # AdmissionController queueing the DAO work run on this connection; None for no admission control.
+    admission_controller = None
+
+    def __init__(self, provider: "SQLiteReplicaConnectionProvider", file_connection: sqlite3.Connection):
+        self._provider = provider
+        self._file = file_connection
+        self._replica = None
+        self._replica_generation = None
+        self._pending = []    # (method, query, params) written in the open transaction, replayed at commit
+        self._functions = []  # create_function() arguments, repeated on every replica handle
+        self._progress = None # set_progress_handler() arguments, repeated on every replica handle
+
+    @classmethod
+    def _is_read(cls, query: str) -> bool:
+        head = query.lstrip().split(None, 1)
+        return bool(head) and head[0].upper() in cls._READ_KEYWORDS
+
+    def _replica_connection(self) -> sqlite3.Connection:
+        # A reload switches the provider to a new copy: open a handle on it. The previous
+        # handle is dropped, not closed, so cursors still streaming from it can finish.
+        if self._replica_generation != self._provider._generation:
+            generation, replica = self._provider._open_replica()
+            for args, kwargs in self._functions:
+                replica.create_function(*args, **kwargs)
+            if self._progress is not None:
+                replica.set_progress_handler(*self._progress)
+            self._replica, self._replica_generation = replica, generation
+        return self._replica
+
+    def _route(self, query, params=()):
+        if self._is_read(query):
+            if self._file.in_transaction:
+                return self._file.execute(query, params)
+            self._provider.refresh_if_changed()
+            try:
+                return self._replica_connection().execute(query, params)
+            except sqlite3.OperationalError as e:
+                if "readonly" not in str(e):
+                    raise
+                # A write starting like a read (WITH ... INSERT): replica handles are query_only.
+        return self._write("execute", query, params)
+
+    def _write(self, method: str, query, params):
+        cursor = getattr(self._file, method)(query, params)
+        keyword = query.lstrip().split(None, 1)[0].upper() if query.strip() else ""
+        if keyword == "ROLLBACK" and not self._file.in_transaction:
+            self._pending = []
+        elif keyword not in self._NOT_REPLAYED:
+            self._pending.append((method, query, params))
+        if not self._file.in_transaction:
+            # Statement ran outside a transaction (DDL, PRAGMA) or ended it: nothing left to commit.
+            self.commit()
+        return cursor
+
+    def _end_transaction(self, commit: bool):
+        pending, self._pending = self._pending, []
+        if not commit:
+            self._file.rollback()
+            return
+        if not pending:
+            self._file.commit()
+            return
+        # Commit and replay under the provider lock, so a reload cannot run in between and apply the writes twice.
+        with self._provider._replica_lock:
+            try:
+                self._file.commit()
+            except sqlite3.Error:
+                self._pending = pending # The transaction is still open
+                raise
+            self._provider._replay(pending, self._functions)
+
+    def cursor(self):
+        return _ReplicaCursor(self)
+
+    def execute(self, query, params=()):
+        return _ReplicaCursor(self).execute(query, params)
+
+    def executemany(self, query, seq_of_params):
+        return _ReplicaCursor(self).executemany(query, seq_of_params)
+
+    def executescript(self, script: str):
+        """Run a script on the file, then on the replica. Like sqlite3, a pending transaction is committed first."""
+        self.commit()
+        with self._provider._replica_lock:
+            try:
+                cursor = self._file.executescript(script)
+            except sqlite3.Error:
+                self._provider.reload() # Part of the script may have been committed
+                raise
+            self._provider._replay([("executescript", script, None)], self._functions)
+        return cursor
+
+    def create_function(self, *args, **kwargs):
+        self._file.create_function(*args, **kwargs)
+        self._functions.append((args, kwargs))
+        if self._replica is not None:
+            self._replica.create_function(*args, **kwargs)
+
+    def getlimit(self, category: int) -> int:
+        return self._file.getlimit(category)
+
+    def commit(self):
+        self._end_transaction(commit=True)
+
+    def rollback(self):
+        self._end_transaction(commit=False)
+
+    @property
+    def in_transaction(self):
+        return self._file.in_transaction
+
+    @property
+    def row_factory(self):
+        return self._file.row_factory
+
+    def backup(self, target, **kwargs):
+        # Backups always copy the authoritative file database.
+        return self._file.backup(target, **kwargs)
+
+    def set_progress_handler(self, handler, n):
+        # Installed on the file and on every replica handle of this connection, so deadlines cover reads too.
+        self._progress = (handler, n) if handler is not None else None
+        self._file.set_progress_handler(handler, n)
+        if self._replica is not None:
+            self._replica.set_progress_handler(handler, n)
+
+    def interrupt(self):
+        # Only this connection's handles: the replica copy is shared, the handles are not.
+        self._file.interrupt()
+        if self._replica is not None:
+            self._replica.interrupt()
+
+    def close(self):
+        if self._file.in_transaction or self._pending:
+            self.rollback()
+        self._file.close()
+        if self._replica is not None:
+            self._replica.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+class SQLiteReplicaConnectionProvider(SQLiteConnectionProvider):
+    """
+    Connection provider serving reads from an in-memory copy of the database.
+    The file database is loaded with the backup API into a 'memdb' database that every
+    connection opens with its own handle, so reads run in parallel. Writes go to the file
+    and are replayed on the replica when they commit. When readers still hold the replica
+    (a replay needs it alone), or when another connection or process commits to the file
+    (seen through PRAGMA data_version), the replica is reloaded into a new copy: reads
+    already running finish on the previous copy, new reads use the new one.
+    The memdb copy is limited to 1 GiB.
+    """
+
+    _instances = itertools.count()
+
+    def __init__(self, database_path: str, check_interval: float = 1.0, verbose: bool = False):
+        """
+        Initialize the provider and load the replica.
+            :param database_path: Path to the SQLite database file.
+            :param check_interval: Minimum number of seconds between two data_version checks.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        super().__init__(database_path)
+        self.check_interval = check_interval
+        self.verbose = verbose
+        # Serializes reloads with the commits and replays of writes.
+        self._replica_lock = threading.RLock()
+        self._name = f"/replica-{os.getpid()}-{next(self._instances)}"
+        self._generation = 0
+        self._replica = None # Handle on the current copy: keeps it alive and replays the writes
+        # Dedicated connection used only to observe commits from other connections.
+        self._watch = sqlite3.connect(self.database_path, check_same_thread=False)
+        self._data_version = None
+        self._last_check = 0.0
+        self.reload_count = 0
+        self.reload()
+
+    def get_connection(self) -> ReplicatedConnection:
+        """
+        Provides a connection whose reads are served by the in-memory replica.
+        """
+        connection = ReplicatedConnection(self, super().get_connection())
+        QueryGuard.attach(connection)
+        return connection
+
+    def _replica_uri(self, generation: int) -> str:
+        return f"file:{self._name}-{generation}?vfs=memdb"
+
+    def _open_replica(self):
+        """Open a read-only handle on the current copy. :return: (generation, connection)"""
+        with self._replica_lock: # The copy cannot be replaced (and freed) while it is opened
+            generation = self._generation
+            connection = sqlite3.connect(self._replica_uri(generation), uri=True, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA query_only = ON;")
+        return generation, connection
+
+    def _replay(self, statements, functions=()):
+        """Apply writes committed to the file on the replica. Called with _replica_lock held."""
+        replica = self._replica
+        try:
+            for args, kwargs in functions:
+                replica.create_function(*args, **kwargs)
+            with replica:
+                for method, query, params in statements:
+                    if method == "executescript":
+                        replica.executescript(query)
+                    else:
+                        getattr(replica, method)(query, params)
+        except sqlite3.Error as e:
+            # Readers still hold the copy, or it no longer matches the file: take a new copy,
+            # which already holds the writes.
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Replay failed ({e}), reloading the replica.")
+            self.reload()
+            return
+        # Our own commits bump the watcher's data_version; the replica already has them.
+        self._data_version = self._read_data_version()
+
+    def _read_data_version(self) -> int:
+        return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def reload(self):
+        """
+        Reload the in-memory replica from the file database, into a new copy.
+        Reads already running on the previous copy finish on it.
+        """
+        with self._replica_lock:
+            generation = self._generation + 1
+            # No busy wait: a replay that finds readers on the copy reloads instead of waiting for them.
+            replica = sqlite3.connect(self._replica_uri(generation), uri=True, timeout=0, check_same_thread=False)
+            source = super().get_connection()
+            try:
+                source.backup(replica)
+            finally:
+                source.close()
+            replica.execute("PRAGMA foreign_keys = ON;")
+            previous, self._replica, self._generation = self._replica, replica, generation
+            if previous is not None:
+                previous.close() # Freed once the connections still reading it move on
+            self._data_version = self._read_data_version()
+            self._last_check = time.monotonic()
+            self.reload_count += 1
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Replica loaded from '{self.database_path}' (reload #{self.reload_count}).")
+
+    def refresh_if_changed(self, force_check: bool = False) -> bool:
+        """
+        Reload the replica if another connection or process committed to the file.
+            :param force_check: If True, ignore check_interval and check immediately.
+            :return: True if the replica was reloaded, False otherwise.
+        """
+        now = time.monotonic()
+        if not force_check and now - self._last_check < self.check_interval:
+            return False
+        with self._replica_lock:
+            self._last_check = now
+            if self._read_data_version() == self._data_version:
+                return False
+            self.reload()
+            return True
+
+    def verify_consistency(self, reload_on_mismatch: bool = True) -> bool:
+        """
+        Compare row counts and highest rowids of every table between the file and the replica.
+            :param reload_on_mismatch: If True, reload the replica when a difference is found.
+            :return: True if the replica matched the file, False otherwise.
+        """
+        with self._replica_lock:
+            tables = [row[0] for row in self._watch.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+            for table in tables:
+                query = f'SELECT COUNT(*), MAX(rowid) FROM "{table}"'
+                try:
+                    replica_state = tuple(self._replica.execute(query).fetchone())
+                except sqlite3.OperationalError:
+                    replica_state = None
+                if tuple(self._watch.execute(query).fetchone()) != replica_state:
+                    if self.verbose:
+                        print(f"{self.__class__.__name__}::Replica differs from the file on table '{table}'.")
+                    if reload_on_mismatch:
+                        self.reload()
+                    return False
+        return True
+
+    def close(self):
+        """
+        Close the replica and the watcher connection.
+        """
+        with self._replica_lock:
+            self._replica.close()
+            self._watch.close()
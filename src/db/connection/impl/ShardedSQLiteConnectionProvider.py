@@ -0,0 +1,101 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import bisect
+import sqlite3
+import zlib
+from typing import List, Optional, Sequence
+from db.connection.IDbConnectionProvider import IDbConnectionProvider
+from db.connection.impl.SQLiteConnectionProvider import SQLiteConnectionProvider
+
+class ShardedSQLiteConnectionProvider(IDbConnectionProvider):
+    """
+    Connection provider for entities partitioned across several SQLite files.
+
+    Keys are routed with one of two strategies:
+    - 'hash':  integer keys go to shard key % N, other keys to crc32(key) % N.
+    - 'range': 'range_bounds' holds the exclusive upper bound of every shard but the last;
+               shard i owns keys in [range_bounds[i-1], range_bounds[i]).
+
+    AUTOINCREMENT is per file, so IDs are allocated by next_id(), which always returns an
+    ID that routes back to the shard that allocates it: IDs congruent to the shard index
+    modulo N for 'hash', IDs inside the shard's range for 'range'.
+    """
+
+    STRATEGIES = ("hash", "range")
+
+    def __init__(self, database_paths: Sequence[str], strategy: str = "hash",
+                 range_bounds: Optional[Sequence[int]] = None):
+        """
+        Initialize the provider.
+            :param database_paths: One database file per shard, in shard order.
+            :param strategy: 'hash' or 'range'.
+            :param range_bounds: For 'range', the N-1 increasing exclusive upper bounds.
+        """
+        if not database_paths:
+            raise ValueError(f"{self.__class__.__name__}::At least one shard is required.")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"{self.__class__.__name__}::Unknown strategy '{strategy}', expected one of {self.STRATEGIES}.")
+        if strategy == "range":
+            range_bounds = list(range_bounds or [])
+            if len(range_bounds) != len(database_paths) - 1 or range_bounds != sorted(set(range_bounds)):
+                raise ValueError(f"{self.__class__.__name__}::'range' needs {len(database_paths) - 1} strictly increasing bounds.")
+        self.database_paths: List[str] = list(database_paths)
+        self.strategy = strategy
+        self.range_bounds: List[int] = list(range_bounds or [])
+        self._providers = [SQLiteConnectionProvider(path) for path in self.database_paths]
+
+    @property
+    def shard_count(self) -> int:
+        """Number of shards."""
+        return len(self._providers)
+
+    def shard_for_key(self, key) -> int:
+        """
+        Route a key to its shard.
+            :param key: An entity ID (or any hashable key for the 'hash' strategy).
+            :return: The shard index.
+        """
+        if self.strategy == "range":
+            return bisect.bisect_right(self.range_bounds, key)
+        if isinstance(key, int):
+            return key % self.shard_count
+        return zlib.crc32(str(key).encode("utf-8")) % self.shard_count
+
+    def next_id(self, shard_index: int, current_max_id: int) -> int:
+        """
+        Allocate the next ID owned by a shard.
+            :param shard_index: The shard allocating the ID.
+            :param current_max_id: Highest ID ever used in that shard (0 if none).
+            :return: The smallest ID above current_max_id that routes to shard_index.
+        """
+        if self.strategy == "range":
+            low = self.range_bounds[shard_index - 1] if shard_index > 0 else 1
+            candidate = max(current_max_id + 1, low)
+            if shard_index < len(self.range_bounds) and candidate >= self.range_bounds[shard_index]:
+                raise OverflowError(f"{self.__class__.__name__}::Shard {shard_index} has no IDs left in its range.")
+            return candidate
+        n = self.shard_count
+        candidate = current_max_id + 1
+        return candidate + (shard_index - candidate) % n
+
+    def get_connection(self, shard_index: int = 0) -> sqlite3.Connection:
+        """
+        Provides a new, configured SQLite connection to one shard.
+        """
+        return self._providers[shard_index].get_connection()
+
+    def get_shard_connections(self) -> List[sqlite3.Connection]:
+        """
+        Provides one new connection per shard, in shard order.
+        """
+        return [provider.get_connection() for provider in self._providers]
+
+    def get_shard_provider(self, shard_index: int) -> SQLiteConnectionProvider:
+        """
+        Provides the single-file connection provider of one shard.
+        """
+        return self._providers[shard_index]
@@ -0,0 +1,341 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from db.connection.IDbConnectionProvider import IDbConnectionProvider
+from db.connection.impl.SQLiteConnectionProvider import SQLiteConnectionProvider
+from db.migrations.Migration import Migration
+from db.migrations.MigrationRunner import MigrationRunner
+
+
+class _LeasedConnection:
+    """
+    A pooled connection lent to one caller. It behaves like the connection it wraps;
+    close() gives it back to the pool instead of closing the file.
+    """
+
+    def __init__(self, provider: "TenantConnectionProvider", tenant: str, connection):
+        self._provider = provider
+        self._connection = connection
+        self.tenant = tenant
+        self.default_query_timeout = getattr(connection, "default_query_timeout", None)
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the lease itself.
+        connection = self.__dict__.get("_connection")
+        if connection is None:
+            raise Exception(f"{self.__class__.__name__}::The connection was returned to the pool.")
+        return getattr(connection, name)
+
+    @property
+    def released(self) -> bool:
+        """True once the connection was given back to the pool."""
+        return self._connection is None
+
+    def close(self):
+        """Give the connection back to the pool. Safe to call more than once."""
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            self._provider._release(self.tenant, connection)
+
+    def __enter__(self):
+        self._connection.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._connection.__exit__(exc_type, exc_value, traceback)
+
+    def __del__(self):
+        # A lease dropped without close() must not pin its connection forever.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class _TenantView(IDbConnectionProvider):
+    """IDbConnectionProvider of one tenant, for factories and services expecting a single database."""
+
+    def __init__(self, provider: "TenantConnectionProvider", tenant: str):
+        self._provider = provider
+        self.tenant = tenant
+        self.database_path = provider.database_path(tenant)
+
+    def get_connection(self) -> _LeasedConnection:
+        """Lease a pooled connection of the tenant; close() returns it to the pool."""
+        return self._provider.get_connection(self.tenant)
+
+
+class _NoCloseProvider(IDbConnectionProvider):
+    """Hands an already open connection to MigrationRunner, which closes what it gets."""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def get_connection(self):
+        return _LeasedConnection(self, None, self._connection)
+
+    def _release(self, tenant, connection):
+        pass
+
+
+class TenantConnectionProvider(IDbConnectionProvider):
+    """
+    Connection pool over one SQLite file per tenant.
+
+    Connections are leased to one caller at a time and come back to the pool on close().
+    Idle connections of every tenant share one LRU: when 'max_open' connections are open,
+    opening another one closes the least recently used idle connection, or waits for a
+    lease to come back if none is idle. Idle connections are also closed after
+    'idle_timeout' seconds. The schema of a tenant is checked (and migrated) once, the
+    first time one of its files is opened. get_stats() reports hits, opens and evictions.
+    """
+
+    _tenant_pattern = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+    def __init__(self, database_path: Union[str, Callable[[str], str]], max_open: int = 64,
+                 idle_timeout: Optional[float] = 300.0, acquire_timeout: Optional[float] = 30.0,
+                 migrations: Optional[Sequence[Migration]] = None, verbose: bool = False):
+        """
+        Initialize the pool.
+            :param database_path: Path template with a '{tenant}' field (e.g. 'tenants/{tenant}/music.db'),
+                                  or a callable mapping a tenant ID to its database path.
+            :param max_open: Maximum number of connections open at the same time, all tenants together.
+            :param idle_timeout: Seconds after which an idle connection is closed, or None to keep it.
+            :param acquire_timeout: Maximum seconds to wait for a free slot when every connection
+                                    is leased, or None to wait indefinitely.
+            :param migrations: Migrations ensured on every tenant database, defaults to SQLiteMigrations.MIGRATIONS.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        if max_open < 1:
+            raise ValueError(f"{self.__class__.__name__}::max_open must be >= 1.")
+        if isinstance(database_path, str) and "{tenant}" not in database_path:
+            raise ValueError(f"{self.__class__.__name__}::The path template needs a '{{tenant}}' field.")
+        if migrations is None:
+            from db.migrations.SQLiteMigrations import MIGRATIONS
+            migrations = MIGRATIONS
+        self._database_path = database_path
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.migrations = list(migrations)
+        self.verbose = verbose
+
+        self._condition = threading.Condition()
+        # (tenant, connection id) -> (connection, idle since); least recently used first
+        self._idle: "OrderedDict[Tuple[str, int], tuple]" = OrderedDict()
+        self._idle_by_tenant: Dict[str, List[Tuple[str, int]]] = {}
+        self._open = 0
+        self._leased = 0
+        self._checked_tenants = set()
+        self._closed = False
+        self._stats = {"leases": 0, "hits": 0, "opens": 0, "schema_checks": 0, "capacity_evictions": 0,
+                       "idle_evictions": 0, "waits": 0, "wait_timeouts": 0}
+
+        self._stop_event = threading.Event()
+        self._janitor = None
+        if idle_timeout is not None:
+            self._janitor = threading.Thread(target=self._run_janitor, name="TenantConnectionProvider-idle",
+                                             daemon=True)
+            self._janitor.start()
+
+    def database_path(self, tenant: str) -> str:
+        """
+        Path of a tenant's database.
+            :param tenant: The tenant ID (letters, digits, '_', '-' and '.', not starting with '.').
+        """
+        if not isinstance(tenant, str) or not self._tenant_pattern.match(tenant):
+            raise ValueError(f"{self.__class__.__name__}::Invalid tenant ID {tenant!r}.")
+        if callable(self._database_path):
+            return self._database_path(tenant)
+        return self._database_path.format(tenant=tenant)
+
+    def for_tenant(self, tenant: str) -> IDbConnectionProvider:
+        """
+        Get a single-database provider for one tenant, leasing from this pool.
+            :param tenant: The tenant ID.
+            :return: An IDbConnectionProvider with a database_path attribute.
+        """
+        return _TenantView(self, tenant)
+
+    def get_connection(self, tenant: str) -> _LeasedConnection:
+        """
+        Lease a connection to a tenant's database. close() gives it back to the pool.
+            :param tenant: The tenant ID.
+            :return: A connection usable like a sqlite3.Connection.
+        """
+        path = self.database_path(tenant)
+        to_close = []
+        with self._condition:
+            if self._closed:
+                raise Exception(f"{self.__class__.__name__}::The provider is closed.")
+            self._stats["leases"] += 1
+            keys = self._idle_by_tenant.get(tenant)
+            if keys:
+                # Most recently used first: the warmest page cache
+                key = keys.pop()
+                if not keys:
+                    del self._idle_by_tenant[tenant]
+                connection, _ = self._idle.pop(key)
+                self._stats["hits"] += 1
+                self._leased += 1
+                return _LeasedConnection(self, tenant, connection)
+            deadline = None if self.acquire_timeout is None else time.monotonic() + self.acquire_timeout
+            while self._open >= self.max_open:
+                if self._idle:
+                    to_close.append(self._pop_idle(next(iter(self._idle))))
+                    self._stats["capacity_evictions"] += 1
+                    continue
+                self._stats["waits"] += 1
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or not self._condition.wait(remaining):
+                    self._stats["wait_timeouts"] += 1
+                    raise TimeoutError(f"{self.__class__.__name__}::No connection slot freed within "
+                                       f"{self.acquire_timeout}s ({self.max_open} connections leased).")
+            self._open += 1
+            self._leased += 1
+            self._stats["opens"] += 1
+            check_schema = tenant not in self._checked_tenants
+        self._close_all(to_close)
+
+        try:
+            connection = SQLiteConnectionProvider(path).get_connection()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._leased -= 1
+                self._condition.notify()
+            raise
+        if check_schema:
+            self._check_schema(tenant, path, connection)
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Opened a connection to tenant '{tenant}' ({self._open}/{self.max_open} open).")
+        return _LeasedConnection(self, tenant, connection)
+
+    @contextmanager
+    def connection(self, tenant: str):
+        """
+        Lease a connection for the duration of a with block.
+            :param tenant: The tenant ID.
+        """
+        lease = self.get_connection(tenant)
+        try:
+            yield lease
+        finally:
+            lease.close()
+
+    def _check_schema(self, tenant: str, path: str, connection):
+        try:
+            MigrationRunner(_NoCloseProvider(connection), path, self.migrations, verbose=self.verbose).ensure_current()
+        except Exception:
+            self._release(tenant, connection, discard=True)
+            raise
+        with self._condition:
+            if tenant not in self._checked_tenants:
+                self._checked_tenants.add(tenant)
+                self._stats["schema_checks"] += 1
+
+    def _pop_idle(self, key):
+        # Called with the condition held.
+        connection, _ = self._idle.pop(key)
+        keys = self._idle_by_tenant[key[0]]
+        keys.remove(key)
+        if not keys:
+            del self._idle_by_tenant[key[0]]
+        self._open -= 1
+        return connection
+
+    @staticmethod
+    def _close_all(connections):
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _release(self, tenant: str, connection, discard: bool = False):
+        """Take a leased connection back: keep it idle, or close it."""
+        try:
+            if connection.in_transaction:
+                connection.rollback() # Never hand an open transaction to the next caller
+            for row in connection.execute("PRAGMA database_list").fetchall():
+                if row[1] not in ("main", "temp"):
+                    connection.execute(f'DETACH DATABASE "{row[1]}"') # Nor databases attached by the last one
+        except Exception:
+            discard = True
+        with self._condition:
+            self._leased -= 1
+            if discard or self._closed:
+                self._open -= 1
+            else:
+                key = (tenant, id(connection))
+                self._idle[key] = (connection, time.monotonic())
+                self._idle_by_tenant.setdefault(tenant, []).append(key)
+            self._condition.notify()
+        if discard or self._closed:
+            self._close_all([connection])
+
+    def evict_idle(self, max_idle: Optional[float] = None) -> int:
+        """
+        Close the connections idle for longer than a delay.
+            :param max_idle: Delay in seconds, defaults to idle_timeout (0 closes every idle connection).
+            :return: The number of connections closed.
+        """
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        if max_idle is None:
+            return 0
+        limit = time.monotonic() - max_idle
+        to_close = []
+        with self._condition:
+            # Keys are in release order, so the scan stops at the first recent one.
+            while self._idle:
+                key = next(iter(self._idle))
+                if self._idle[key][1] > limit:
+                    break
+                to_close.append(self._pop_idle(key))
+            self._stats["idle_evictions"] += len(to_close)
+            if to_close:
+                self._condition.notify_all()
+        self._close_all(to_close)
+        if self.verbose and to_close:
+            print(f"{self.__class__.__name__}::Closed {len(to_close)} idle connections.")
+        return len(to_close)
+
+    def _run_janitor(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while not self._stop_event.wait(interval):
+            self.evict_idle()
+
+    def get_stats(self) -> dict:
+        """
+        Report the pool's activity.
+            :return: A dictionary with open, idle, leased, max_open, tenants_checked, leases, hits, hit_ratio,
+                     opens, schema_checks, capacity_evictions, idle_evictions, waits and wait_timeouts keys.
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update(open=self._open, idle=len(self._idle), leased=self._leased, max_open=self.max_open,
+                         tenants_checked=len(self._checked_tenants))
+        stats["hit_ratio"] = stats["hits"] / stats["leases"] if stats["leases"] else 0.0
+        return stats
+
+    def close(self):
+        """
+        Close every idle connection and stop pooling: leased connections are closed when returned.
+        """
+        with self._condition:
+            self._closed = True
+            to_close = [self._pop_idle(key) for key in list(self._idle)]
+            self._condition.notify_all()
+        self._stop_event.set()
+        if self._janitor is not None and self._janitor is not threading.current_thread():
+            self._janitor.join()
+        self._close_all(to_close)
@@ -6,7 +6,7 @@
 """
 from abc import ABC, abstractmethod
 import threading
-from typing import Any, List, Tuple, Union, Optional, Dict
+from typing import Any, Iterator, List, Tuple, Union, Optional, Dict
 
 class AbstractDao(ABC):
     """
@@ -42,14 +42,25 @@ class AbstractDao(ABC):
         pass
 
     @abstractmethod
-    def execute_query(self, query: str, params: Optional[Tuple] = None, fetch_one: bool = False, fetch_all: bool = False) -> Union[Any, List[Any], None]:
+    def execute_query(self, query: str, params: Optional[Tuple] = None, fetch_one: bool = False, fetch_all: bool = False, timeout: Optional[float] = None) -> Union[Any, List[Any], None]:
         """
         Abstract method to execute a read query on the database.
         Does NOT commit changes. Returns raw database-specific results (e.g., rows from driver).
         The return type 'Any' is used as the exact row/result type varies by database driver.
+        'timeout' is the query's deadline in seconds (None for the DAO's default).
         """
         pass
     
+    @abstractmethod
+    def iter_query(self, query: str, params: Optional[Tuple] = None, batch_size: int = 1000, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Abstract method to stream the rows of a read query.
+        Rows are fetched from the driver in batches of 'batch_size' so memory use
+        stays constant regardless of the result size.
+        'timeout' bounds the whole stream, in seconds (None for the DAO's default).
+        """
+        pass
+
     @abstractmethod
     def _execute_with_retry(self, query: str, params: Optional[Tuple] = None, max_retries: int = 5, retry_delay: float = 0.1) -> bool:
         """
@@ -73,4 +84,12 @@ class AbstractDao(ABC):
         Helper method to execute an UPDATE or DELETE query with retry logic.
         Returns affected_rows if the update or delete was successful
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def _execute_returning_with_retry(self, query: str, params: Optional[Tuple], max_retries: int, retry_delay: float) -> Optional[List[Any]]:
+        """
+        Helper method to execute a write query with a RETURNING clause with retry logic.
+        Returns the rows produced by the RETURNING clause, read inside the same transaction.
+        """
+        pass
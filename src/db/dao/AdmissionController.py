@@ -0,0 +1,232 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from db.dao.AdmissionRejectedError import AdmissionRejectedError
+
+class _Waiter:
+    """One queued request, granted a slot by the thread releasing one."""
+
+    __slots__ = ("work_class", "condition", "granted")
+
+    def __init__(self, work_class: str, lock):
+        self.work_class = work_class
+        self.condition = threading.Condition(lock)
+        self.granted = False
+
+class _Slot:
+    """A granted slot, owned by the unit of work (context) that acquired it."""
+
+    __slots__ = ("work_class", "released", "context_token")
+
+    def __init__(self, work_class: str):
+        self.work_class = work_class
+        self.released = False
+        self.context_token = None
+
+class AdmissionController:
+    """
+    Admission control for database work, in front of the DAOs.
+
+    Work is split in classes ('interactive' reads, 'background' reads such as reports,
+    and 'write'), each with its own concurrency limit and bounded queue, plus an optional
+    limit on all classes together. When a slot frees up it goes to the queued request
+    of the most urgent class (lowest class priority), then the lowest request priority,
+    then the oldest. Requests arriving while their queue is full, or waiting longer than
+    their queue timeout, are rejected with AdmissionRejectedError instead of piling up.
+
+    Admission is reentrant per unit of work: work started while the current context
+    (contextvars: the thread, or the asyncio task) holds a slot, e.g. a read inside a write
+    transaction, runs without queueing again. A slot is owned by its context, not by a
+    thread, so it never leaks to whatever runs next on a pooled worker thread.
+    Work that must not be shed (shed=False, e.g. write-behind flushes) is never rejected:
+    it queues past max_queue and waits without queue timeout.
+    DAOs use the controller set on their connection ('admission_controller') or on
+    themselves ('admission'); factories set it on the connections they hand out.
+    """
+
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+    WRITE = "write"
+
+    # Per class: concurrent slots, queue length, seconds a request may wait, class priority (lower first).
+    DEFAULT_LIMITS = {
+        INTERACTIVE: {"max_concurrent": 8, "max_queue": 256, "queue_timeout": 1.0, "priority": 0},
+        WRITE: {"max_concurrent": 1, "max_queue": 256, "queue_timeout": 5.0, "priority": 1},
+        BACKGROUND: {"max_concurrent": 2, "max_queue": 32, "queue_timeout": 30.0, "priority": 2},
+    }
+
+    def __init__(self, limits: Optional[Dict[str, dict]] = None, max_concurrent: Optional[int] = None,
+                 verbose: bool = False):
+        """
+        Initialize the controller.
+            :param limits: Overrides of DEFAULT_LIMITS per class, e.g. {'background': {'max_concurrent': 1}};
+                           new classes may be added with every key set.
+            :param max_concurrent: Maximum number of admitted requests over all classes, or None for
+                                   only the per-class limits.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self.limits: Dict[str, dict] = {work_class: dict(values) for work_class, values in self.DEFAULT_LIMITS.items()}
+        for work_class, values in (limits or {}).items():
+            unknown = set(values) - set(self.DEFAULT_LIMITS[self.INTERACTIVE])
+            if unknown:
+                raise ValueError(f"{self.__class__.__name__}::Unknown limits {sorted(unknown)} for '{work_class}'.")
+            self.limits.setdefault(work_class, {}).update(values)
+            if set(self.limits[work_class]) != set(self.DEFAULT_LIMITS[self.INTERACTIVE]):
+                raise ValueError(f"{self.__class__.__name__}::Class '{work_class}' needs every limit "
+                                 f"{sorted(self.DEFAULT_LIMITS[self.INTERACTIVE])}.")
+            if self.limits[work_class]["max_concurrent"] < 1 or self.limits[work_class]["max_queue"] < 0:
+                raise ValueError(f"{self.__class__.__name__}::'{work_class}' needs max_concurrent >= 1 and max_queue >= 0.")
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError(f"{self.__class__.__name__}::max_concurrent must be >= 1.")
+        self.max_concurrent = max_concurrent
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self._held = contextvars.ContextVar(f"admission-{id(self)}", default=None)
+        self._sequence = itertools.count()
+        self._running_total = 0
+        self._running = {work_class: 0 for work_class in self.limits}
+        # Per class, a heap of (request priority, arrival, waiter)
+        self._queues = {work_class: [] for work_class in self.limits}
+        self._stats = {work_class: {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0,
+                                    "total_wait_seconds": 0.0, "max_wait_seconds": 0.0, "max_queue_depth": 0}
+                       for work_class in self.limits}
+
+    def _dispatch(self):
+        """Grant free slots to the most urgent queued requests. Called with _lock held."""
+        while self.max_concurrent is None or self._running_total < self.max_concurrent:
+            best = None
+            for work_class, queue in self._queues.items():
+                if queue and self._running[work_class] < self.limits[work_class]["max_concurrent"]:
+                    key = (self.limits[work_class]["priority"],) + queue[0][:2]
+                    if best is None or key < best[0]:
+                        best = (key, work_class)
+            if best is None:
+                return
+            _, _, waiter = heapq.heappop(self._queues[best[1]])
+            self._running[best[1]] += 1
+            self._running_total += 1
+            waiter.granted = True
+            waiter.condition.notify()
+
+    def _record_wait(self, work_class: str, waited: float):
+        stats = self._stats[work_class]
+        stats["admitted"] += 1
+        stats["total_wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+    def acquire(self, work_class: str = INTERACTIVE, priority: int = 0, timeout: Optional[float] = None,
+                shed: bool = True) -> Optional[_Slot]:
+        """
+        Wait for a slot; prefer the admit() context manager, which always releases it.
+            :param work_class: 'interactive', 'background', 'write' or a class added through 'limits'.
+            :param priority: Order among the queued requests of the class, lower first.
+            :param timeout: Seconds to wait in the queue, defaults to the class queue_timeout (None waits forever).
+            :param shed: If False, the request is never rejected: it ignores max_queue and waits without timeout.
+            :return: The token to pass to release(), or None if the current context already held a slot.
+            :raise AdmissionRejectedError: When the queue is full or the wait times out.
+        """
+        held = self._held.get()
+        if held is not None and not held.released:
+            return None # Already admitted: nested work must not queue behind itself
+        limits = self.limits.get(work_class)
+        if limits is None:
+            raise ValueError(f"{self.__class__.__name__}::Unknown work class '{work_class}', expected one of {list(self.limits)}.")
+        timeout = None if not shed else limits["queue_timeout"] if timeout is None else timeout
+        start = time.monotonic()
+        with self._lock:
+            queue = self._queues[work_class]
+            stats = self._stats[work_class]
+            if shed and len(queue) >= limits["max_queue"] and (
+                    self._running[work_class] >= limits["max_concurrent"]
+                    or (self.max_concurrent is not None and self._running_total >= self.max_concurrent)):
+                stats["rejected_queue_full"] += 1
+                raise AdmissionRejectedError(f"{self.__class__.__name__}::The '{work_class}' queue is full "
+                                             f"({limits['max_queue']} waiting).", work_class,
+                                             AdmissionRejectedError.QUEUE_FULL, 0.0)
+            waiter = _Waiter(work_class, self._lock)
+            heapq.heappush(queue, (priority, next(self._sequence), waiter))
+            self._dispatch()
+            if not waiter.granted:
+                stats["queued"] += 1
+                stats["max_queue_depth"] = max(stats["max_queue_depth"], len(queue))
+                deadline = None if timeout is None else start + timeout
+                while not waiter.granted:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        queue.remove(next(entry for entry in queue if entry[2] is waiter))
+                        heapq.heapify(queue)
+                        stats["rejected_timeout"] += 1
+                        waited = time.monotonic() - start
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::Rejected '{work_class}' work after {waited:.3f}s in queue.")
+                        raise AdmissionRejectedError(f"{self.__class__.__name__}::'{work_class}' work waited more "
+                                                     f"than {timeout}s for a slot.", work_class,
+                                                     AdmissionRejectedError.QUEUE_TIMEOUT, waited)
+                    waiter.condition.wait(remaining)
+            self._record_wait(work_class, time.monotonic() - start)
+        slot = _Slot(work_class)
+        slot.context_token = self._held.set(slot)
+        return slot
+
+    def release(self, token: Optional[_Slot]):
+        """
+        Give back a slot.
+            :param token: The value returned by acquire().
+        """
+        if token is None or token.released:
+            return
+        token.released = True
+        try:
+            self._held.reset(token.context_token)
+        except ValueError:
+            pass # Released from another context: the slot is marked released, which is enough
+        with self._lock:
+            self._running[token.work_class] -= 1
+            self._running_total -= 1
+            self._dispatch()
+
+    @contextmanager
+    def admit(self, work_class: str = INTERACTIVE, priority: int = 0, timeout: Optional[float] = None,
+              shed: bool = True):
+        """
+        Context manager running its block once a slot of the class is granted (see acquire).
+            :param work_class: 'interactive', 'background', 'write' or a class added through 'limits'.
+            :param priority: Order among the queued requests of the class, lower first.
+            :param timeout: Seconds to wait in the queue, defaults to the class queue_timeout.
+            :param shed: If False, never reject the request (see acquire).
+            :raise AdmissionRejectedError: When the queue is full or the wait times out.
+        """
+        token = self.acquire(work_class, priority, timeout, shed)
+        try:
+            yield
+        finally:
+            self.release(token)
+
+    def get_stats(self) -> Dict[str, dict]:
+        """
+        Report the load of every class.
+            :return: Per class: running, queue_depth, admitted, queued (requests that had to wait),
+                     rejected_queue_full, rejected_timeout, avg_wait_seconds, max_wait_seconds, max_queue_depth.
+                     The 'total' key holds running and queue_depth over all classes.
+        """
+        with self._lock:
+            report = {}
+            for work_class, stats in self._stats.items():
+                entry = dict(stats)
+                entry.update(running=self._running[work_class], queue_depth=len(self._queues[work_class]),
+                             avg_wait_seconds=stats["total_wait_seconds"] / stats["admitted"] if stats["admitted"] else 0.0)
+                report[work_class] = entry
+            report["total"] = {"running": self._running_total,
+                               "queue_depth": sum(len(queue) for queue in self._queues.values())}
+        return report
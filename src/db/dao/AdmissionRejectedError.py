@@ -0,0 +1,29 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+from typing import Optional
+
+class AdmissionRejectedError(TimeoutError):
+    """
+    Raised when an AdmissionController sheds database work: its queue was full, or it
+    waited in the queue longer than its queue timeout. Nothing was executed.
+    """
+
+    QUEUE_FULL = "queue_full"
+    QUEUE_TIMEOUT = "queue_timeout"
+
+    def __init__(self, message: str, work_class: str, reason: str, waited: Optional[float] = None):
+        """
+        Initialize the error.
+            :param message: Description of the rejected work.
+            :param work_class: The class of the work ('interactive', 'background' or 'write').
+            :param reason: QUEUE_FULL or QUEUE_TIMEOUT.
+            :param waited: Seconds spent in the queue before the rejection.
+        """
+        super().__init__(message)
+        self.work_class = work_class
+        self.reason = reason
+        self.waited = waited
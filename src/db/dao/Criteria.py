@@ -0,0 +1,193 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+from typing import Any, Iterable, List, Optional, Tuple
+
+class Criteria:
+    """
+    Composable query specification: filters, IN lists, ranges, LIKE, ordering,
+    limit/offset and column projection.
+
+    A Criteria only describes the query; a DAO compiles it to parameterized SQL.
+    Its 'shape' (everything except the bound values) is used as the cache key of
+    the compiled statement, so the same kind of query is only compiled once.
+
+    Example:
+        Criteria().like(ArtistDao._field_name, "A%").order_by(ArtistDao._field_name).limit(10)
+    """
+
+    _COMPARISONS = ("=", "!=", "<", "<=", ">", ">=")
+
+    def __init__(self):
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order_by: List[Tuple[str, bool]] = []
+        self._columns: Optional[Tuple[str, ...]] = None
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+
+    def where(self, field: str, operator: str, value: Any) -> "Criteria":
+        """Add a comparison filter; a None value with '=' or '!=' becomes IS NULL / IS NOT NULL."""
+        if operator not in self._COMPARISONS:
+            raise ValueError(f"{self.__class__.__name__}::Unsupported operator '{operator}'.")
+        if value is None:
+            if operator not in ("=", "!="):
+                raise ValueError(f"{self.__class__.__name__}::None can only be compared with '=' or '!='.")
+            self._filters.append((field, "IS NULL" if operator == "=" else "IS NOT NULL", None))
+        else:
+            self._filters.append((field, operator, value))
+        return self
+
+    def eq(self, field: str, value: Any) -> "Criteria":
+        """Add a 'field = value' filter."""
+        return self.where(field, "=", value)
+
+    def in_(self, field: str, values: Iterable[Any]) -> "Criteria":
+        """Add a 'field IN (values)' filter; an empty list matches nothing."""
+        self._filters.append((field, "IN", list(values)))
+        return self
+
+    def between(self, field: str, low: Any = None, high: Any = None) -> "Criteria":
+        """Add an inclusive range filter; either bound may be None for an open range."""
+        if low is not None:
+            self.where(field, ">=", low)
+        if high is not None:
+            self.where(field, "<=", high)
+        return self
+
+    def mod(self, field: str, divisor: int, remainder: int) -> "Criteria":
+        """Add a 'field % divisor = remainder' filter (e.g. the IDs owned by one hash shard)."""
+        self._filters.append((field, "%", (int(divisor), int(remainder))))
+        return self
+
+    def like(self, field: str, pattern: str) -> "Criteria":
+        """Add a 'field LIKE pattern' filter (SQLite LIKE is case-insensitive for ASCII)."""
+        self._filters.append((field, "LIKE", pattern))
+        return self
+
+    def order_by(self, field: str, descending: bool = False) -> "Criteria":
+        """Append an ordering term."""
+        self._order_by.append((field, descending))
+        return self
+
+    def limit(self, count: int, offset: Optional[int] = None) -> "Criteria":
+        """Return at most 'count' rows, optionally skipping 'offset' rows first."""
+        self._limit = int(count)
+        self._offset = int(offset) if offset is not None else None
+        return self
+
+    def select(self, *fields: str) -> "Criteria":
+        """Only fetch these columns instead of every mapped column."""
+        self._columns = tuple(fields)
+        return self
+
+    @property
+    def columns(self) -> Optional[Tuple[str, ...]]:
+        """Projected columns, or None for every mapped column."""
+        return self._columns
+
+    @property
+    def filter_fields(self) -> List[str]:
+        """Fields used by the filters."""
+        return [field for field, _, _ in self._filters]
+
+    @property
+    def order_fields(self) -> List[str]:
+        """Fields used by the ordering terms."""
+        return [field for field, _ in self._order_by]
+
+    @property
+    def order_terms(self) -> List[Tuple[str, bool]]:
+        """Ordering terms as (field, descending) tuples."""
+        return list(self._order_by)
+
+    @property
+    def row_limit(self) -> Optional[int]:
+        """Maximum number of rows, or None."""
+        return self._limit
+
+    @property
+    def row_offset(self) -> Optional[int]:
+        """Number of rows skipped, or None."""
+        return self._offset
+
+    def copy(self) -> "Criteria":
+        """Return an independent copy of this Criteria."""
+        clone = Criteria()
+        clone._filters = list(self._filters)
+        clone._order_by = list(self._order_by)
+        clone._columns = self._columns
+        clone._limit = self._limit
+        clone._offset = self._offset
+        return clone
+
+    def row_selection(self, keep_order: bool = False, keep_limit: bool = True) -> "Criteria":
+        """
+        Return a copy selecting the same rows, for aggregates: without projection and,
+        unless keep_order (needed when a limit picks the rows), without ordering.
+        With keep_limit=False, limit and offset are dropped too, for callers applying
+        them to merged results (e.g. a total over several shards).
+        """
+        clone = self.copy()
+        clone._columns = None
+        if not keep_order:
+            clone._order_by = []
+        if not keep_limit:
+            clone._limit = None
+            clone._offset = None
+        return clone
+
+    def shape(self) -> tuple:
+        """
+        Everything that changes the SQL text, without the bound values.
+        IN lists contribute their length since it changes the number of placeholders.
+        """
+        filters = tuple((field, operator, len(value) if operator == "IN" else None)
+                        for field, operator, value in self._filters)
+        return (filters, tuple(self._order_by), self._columns,
+                self._limit is not None, self._offset is not None)
+
+    def where_sql(self) -> Tuple[str, list]:
+        """
+        Compile the filters to a WHERE clause (empty string if there are none) and its parameters.
+        Field names must have been validated by the caller.
+        """
+        clauses = []
+        params = []
+        for field, operator, value in self._filters:
+            if operator in ("IS NULL", "IS NOT NULL"):
+                clauses.append(f"{field} {operator}")
+            elif operator == "IN":
+                if not value:
+                    clauses.append("0")
+                else:
+                    clauses.append(f"{field} IN ({', '.join('?' for _ in value)})")
+                    params.extend(value)
+            elif operator == "%":
+                clauses.append(f"{field} % ? = ?")
+                params.extend(value)
+            else:
+                clauses.append(f"{field} {operator} ?")
+                params.append(value)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def tail_sql(self) -> Tuple[str, list]:
+        """Compile ORDER BY / LIMIT / OFFSET and their parameters."""
+        parts = []
+        params = []
+        if self._order_by:
+            parts.append("ORDER BY " + ", ".join(f"{field} {'DESC' if descending else 'ASC'}"
+                                                 for field, descending in self._order_by))
+        if self._limit is not None:
+            parts.append("LIMIT ?")
+            params.append(self._limit)
+            if self._offset is not None:
+                parts.append("OFFSET ?")
+                params.append(self._offset)
+        return " ".join(parts), params
+
+    def __str__(self):
+        """String representation of the Criteria object."""
+        return f"Criteria(filters={self._filters}, order_by={self._order_by}, columns={self._columns}, limit={self._limit}, offset={self._offset})"
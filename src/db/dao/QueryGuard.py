@@ -0,0 +1,155 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+from contextlib import contextmanager
+from typing import Dict, Optional
+from db.dao.QueryTimeoutError import QueryTimeoutError
+import sqlite3
+import threading
+import time
+
+class QueryGuard:
+    """
+    Per-query deadlines and cancellation for SQLite connections.
+
+    Each connection gets one guard whose progress handler runs every PROGRESS_STEPS
+    virtual machine instructions, compares the clock with the earliest deadline of the
+    queries running on the connection and aborts the running statement once it has passed.
+    cancel() interrupts every query running on a connection right away.
+    SQLite reports both as an 'interrupted' OperationalError, which run() turns into a
+    QueryTimeoutError. The aborted statement is reset, so the connection stays usable.
+
+    Connections created by SQLiteConnectionProvider get their guard (and handler) when
+    they are created. Other connections get a guard while a guarded query runs; since
+    installing a handler waits for the connection, they should not be running statements
+    from another thread at that moment.
+    """
+
+    # SQLite virtual machine instructions between two deadline checks.
+    PROGRESS_STEPS = 1000
+
+    # id(connection) -> QueryGuard for connections that cannot hold their own guard,
+    # only while guarded queries run on them (so the id cannot be reused meanwhile).
+    _transient_guards: Dict[int, "QueryGuard"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._deadlines: Dict[object, Optional[float]] = {}
+        self._cancelled = set()
+        self._earliest: Optional[float] = None
+
+    def _on_progress(self) -> int:
+        # Called by SQLite while it holds the connection: no locks here, just the clock.
+        earliest = self._earliest
+        return 1 if earliest is not None and time.monotonic() >= earliest else 0
+
+    def _refresh_earliest(self):
+        # Called with _lock held.
+        deadlines = [deadline for deadline in self._deadlines.values() if deadline is not None]
+        self._earliest = min(deadlines) if deadlines else None
+
+    @classmethod
+    def attach(cls, connection) -> Optional["QueryGuard"]:
+        """
+        Give a connection its own guard and install its progress handler.
+        Call it before the connection is shared with other threads.
+            :param connection: A connection accepting attributes (SQLiteConnection, ReplicatedConnection).
+            :return: The guard, or None if the connection cannot hold one.
+        """
+        guard = getattr(connection, "_query_guard", None)
+        if guard is not None:
+            return guard
+        guard = QueryGuard()
+        try:
+            connection._query_guard = guard
+        except AttributeError:
+            return None # Plain sqlite3.Connection: transient guards are used instead
+        connection.set_progress_handler(guard._on_progress, cls.PROGRESS_STEPS)
+        return guard
+
+    @classmethod
+    def _get(cls, connection) -> Optional["QueryGuard"]:
+        # Called with _lock held.
+        return getattr(connection, "_query_guard", None) or cls._transient_guards.get(id(connection))
+
+    @classmethod
+    @contextmanager
+    def run(cls, connection, timeout: Optional[float] = None, description: str = "Query"):
+        """
+        Context manager guarding the statements executed (and fetched) inside it.
+            :param connection: The connection running the query.
+            :param timeout: Seconds the block may run, or None for no deadline (it can still be cancelled).
+            :param description: Text used in the QueryTimeoutError message.
+        """
+        token = object()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        transient = False
+        with cls._lock:
+            guard = cls._get(connection)
+            if guard is None:
+                guard = cls.attach(connection)
+            if guard is None:
+                guard = cls._transient_guards[id(connection)] = QueryGuard()
+                transient = True
+            guard._deadlines[token] = deadline
+            guard._refresh_earliest()
+        if transient and deadline is not None:
+            connection.set_progress_handler(guard._on_progress, cls.PROGRESS_STEPS)
+        try:
+            yield
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                raise
+            if token in guard._cancelled:
+                raise QueryTimeoutError(f"{cls.__name__}::{description} was cancelled.",
+                                        timeout=timeout, cancelled=True) from e
+            if deadline is not None and time.monotonic() >= deadline:
+                raise QueryTimeoutError(f"{cls.__name__}::{description} exceeded its {timeout}s deadline.",
+                                        timeout=timeout) from e
+            raise
+        finally:
+            with cls._lock:
+                del guard._deadlines[token]
+                guard._cancelled.discard(token)
+                guard._refresh_earliest()
+                release = transient and not guard._deadlines
+                if release:
+                    del cls._transient_guards[id(connection)]
+            if release:
+                try:
+                    connection.set_progress_handler(None, 0)
+                except sqlite3.ProgrammingError:
+                    pass # Connection closed inside the block
+
+    @classmethod
+    def cancel(cls, connection) -> int:
+        """
+        Cancel every query currently running on a connection.
+        Guarded queries raise QueryTimeoutError(cancelled=True); unguarded statements
+        running at the same moment fail with SQLite's 'interrupted' error.
+            :param connection: The connection whose queries to cancel.
+            :return: The number of guarded queries that were running.
+        """
+        with cls._lock:
+            guard = cls._get(connection)
+            running = list(guard._deadlines) if guard is not None else []
+            if guard is not None:
+                guard._cancelled.update(running)
+        if running:
+            try:
+                connection.interrupt()
+            except sqlite3.ProgrammingError:
+                pass # Connection already closed
+        return len(running)
+
+    @classmethod
+    def running_queries(cls, connection) -> int:
+        """
+        Number of guarded queries currently running on a connection.
+        """
+        with cls._lock:
+            guard = cls._get(connection)
+            return len(guard._deadlines) if guard is not None else 0
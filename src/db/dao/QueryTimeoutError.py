@@ -0,0 +1,24 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+from typing import Optional
+
+class QueryTimeoutError(TimeoutError):
+    """
+    Raised by a DAO when a query is aborted, either because its deadline passed
+    or because it was cancelled. The connection stays usable afterwards.
+    """
+
+    def __init__(self, message: str, timeout: Optional[float] = None, cancelled: bool = False):
+        """
+        Initialize the error.
+            :param message: Description of the aborted query.
+            :param timeout: The deadline that was exceeded, in seconds, if any.
+            :param cancelled: True if the query was cancelled rather than timed out.
+        """
+        super().__init__(message)
+        self.timeout = timeout
+        self.cancelled = cancelled
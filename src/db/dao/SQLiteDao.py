@@ -6,6 +6,13 @@
   See the LICENSE file for details.
 """
 from db.dao.AbstractDao import AbstractDao
+from db.dao.Criteria import Criteria
+from db.dao.AdmissionController import AdmissionController
+from db.dao.QueryGuard import QueryGuard
+from db.dao.QueryTimeoutError import QueryTimeoutError
+from contextlib import nullcontext
+from collections import OrderedDict
+import json
 import sqlite3
 import time
 import threading
@@ -16,6 +23,31 @@ class SQLiteDao(AbstractDao):
     This class provides basic database operations such as checking table existence,
     executing queries, and handling database locks.
     Subclasses should implement specific DAO functionality."""
+
+    # Number of IDs sent per multi-get statement.
+    multi_get_chunk_size = 5000
+
+    # Compiled criteria statements, keyed by (table, select list, criteria shape). Shared by all DAOs.
+    _compiled_criteria = OrderedDict()
+    _compiled_criteria_lock = threading.Lock()
+    _compiled_criteria_max = 512
+
+    # Partial UPDATE statements, keyed by (table, id field, updated columns). Shared by all DAOs.
+    _update_statements = OrderedDict()
+    _update_statements_lock = threading.Lock()
+
+    # Aggregate functions accepted by aggregate_by_criteria().
+    aggregate_functions = ("COUNT", "MIN", "MAX", "SUM", "TOTAL", "AVG")
+
+    # Default deadline of every query, in seconds (None: use the connection's default_query_timeout).
+    # Set it on a DAO instance, a subclass or SQLiteDao itself.
+    default_timeout = None
+
+    # Admission class of the reads of this DAO ('interactive' or 'background'); writes are always 'write'.
+    read_class = AdmissionController.INTERACTIVE
+    # Admission controller of this DAO (None: use the connection's admission_controller, if any).
+    admission = None
+
     def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
         """
         Initialize the DAO with a database connection.  
@@ -44,28 +76,98 @@ class SQLiteDao(AbstractDao):
             print(f"{self.__class__.__name__}::Checking if table '{table_name}' exists: {result is not None}")
         return result is not None
 
-    def execute_query(self, query: str, params=None, fetch_one=False, fetch_all=False):
-        """Execute a query on the database. Does NOT commit changes."""
+    def _resolve_timeout(self, timeout=None):
+        """Deadline of a query: the per-call timeout, else the DAO's default, else the connection's."""
+        if timeout is not None:
+            return timeout
+        if self.default_timeout is not None:
+            return self.default_timeout
+        return getattr(self.conn, "default_query_timeout", None)
+
+    def _admit(self, work_class: str, shed: bool = True):
+        """Slot of the admission controller for one unit of work, or a no-op without controller.
+            :param shed: If False, the work is never rejected by the controller (it waits for its slot).
+        """
+        controller = self.admission if self.admission is not None else getattr(self.conn, "admission_controller", None)
+        return controller.admit(work_class, shed=shed) if controller is not None else nullcontext()
+
+    def cancel_queries(self) -> int:
+        """Cancel the queries running on this DAO's connection (from any thread).
+            They raise QueryTimeoutError with cancelled=True; the connection stays usable.
+            :return: The number of queries that were running.
+        """
+        self._ensure_connected()
+        return QueryGuard.cancel(self.conn)
+
+    def execute_query(self, query: str, params=None, fetch_one=False, fetch_all=False, timeout=None):
+        """Execute a query on the database. Does NOT commit changes.
+            :param timeout: Deadline in seconds; raises QueryTimeoutError when exceeded. Defaults to default_timeout.
+            :raise AdmissionRejectedError: When an admission controller is set and sheds the query.
+        """
         self._ensure_connected()
 
         if self.verbose:
             print(f"{self.__class__.__name__}::Executing query: {query} with params: {params}")
 
-        cursor = self.conn.cursor()
         if params is None:
             params = ()
-        cursor.execute(query, params)
-        
         result = None
-        if fetch_one:
-            result = cursor.fetchone()
-        elif fetch_all:
-            result = cursor.fetchall()
+        with self._admit(self.read_class), \
+                QueryGuard.run(self.conn, self._resolve_timeout(timeout), f"{self.__class__.__name__} query"):
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            if fetch_one:
+                result = cursor.fetchone()
+            elif fetch_all:
+                result = cursor.fetchall()
 
         if self.verbose:
             print(f"{self.__class__.__name__}::Query executed. Result: {result}")
         # Do not commit here, let the caller or context manager handle it
         return result
+
+    def iter_query(self, query: str, params=None, batch_size: int = 1000, timeout=None):
+        """Stream the rows of a query, fetching them in batches. Does NOT commit changes.
+            Each batch is fetched in its own admission slot and guarded with what is left of the
+            deadline: no slot is held while the consumer handles rows, and the generator may be
+            resumed from another thread (e.g. asyncio.to_thread) without carrying a slot along.
+            :param query: The SQL query to execute.
+            :param params: Parameters to bind to the query.
+            :param batch_size: Number of rows fetched from SQLite at a time.
+            :param timeout: Deadline in seconds for the whole stream. Defaults to default_timeout.
+            :return: A generator yielding one row at a time.
+        """
+        self._ensure_connected()
+
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Streaming query: {query} with params: {params}")
+
+        timeout = self._resolve_timeout(timeout)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        description = f"{self.__class__.__name__} streamed query"
+
+        def fetch(step):
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise QueryTimeoutError(f"{description} ran out of time.", timeout=remaining)
+                with self._admit(self.read_class), QueryGuard.run(self.conn, remaining, description):
+                    return step()
+            except QueryTimeoutError as e:
+                if e.cancelled:
+                    raise
+                # A batch only gets what is left of the deadline: report the deadline of the whole stream.
+                raise QueryTimeoutError(f"{self.__class__.__name__}::Streamed query exceeded its {timeout}s deadline.",
+                                        timeout=timeout) from e
+
+        cursor = self.conn.cursor()
+        try:
+            rows = fetch(lambda: cursor.execute(query, params if params is not None else ()).fetchmany(batch_size))
+            while rows:
+                yield from rows
+                rows = fetch(lambda: cursor.fetchmany(batch_size))
+        finally:
+            cursor.close()
     
     def _execute_with_retry(self, query, params=None, max_retries=5, retry_delay=0.1):
         """Helper to execute a query with retry logic for locked databases.
@@ -78,28 +180,30 @@ class SQLiteDao(AbstractDao):
             print(f"{self.__class__.__name__}::Executing with retry: {query} with params: {params}")
 
         attempt = 0
-        while attempt < max_retries:
-            try:
-                with self._write_lock: # Assuming all writes need this lock
-                    with self.conn: # Will Commit the transaction
-                        self.conn.execute(query, params if params is not None else ())
+        with self._admit(AdmissionController.WRITE):
+            while attempt < max_retries:
+                try:
+                    with self._write_lock: # Assuming all writes need this lock
+                        with self.conn: # Will Commit the transaction
+                            with QueryGuard.run(self.conn, self._resolve_timeout(), f"{self.__class__.__name__} write"):
+                                self.conn.execute(query, params if params is not None else ())
 
-                if self.verbose:
-                    print(f"{self.__class__.__name__}::Query executed successfully on attempt {attempt + 1}.")
-                return True
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e):
-                    attempt += 1
-                    if self.verbose:
-                        print(f"{self.__class__.__name__}::Database is locked, retrying {attempt}/{max_retries}...")
-                    time.sleep(retry_delay)
-                else:
                     if self.verbose:
-                        print(f"{self.__class__.__name__}::SQLite error: {e}")
-                    raise # Re-raise unexpected errors
-        if self.verbose:
-            print(f"{self.__class__.__name__}::Failed to execute after retries.")
-        return False
+                        print(f"{self.__class__.__name__}::Query executed successfully on attempt {attempt + 1}.")
+                    return True
+                except sqlite3.OperationalError as e:
+                    if "database is locked" in str(e):
+                        attempt += 1
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::Database is locked, retrying {attempt}/{max_retries}...")
+                        time.sleep(retry_delay)
+                    else:
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::SQLite error: {e}")
+                        raise # Re-raise unexpected errors
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Failed to execute after retries.")
+            return False
     
     def _execute_insert_with_retry(self, query, params=None, max_retries=5, retry_delay=0.1):
         """Helper to execute a query with retry logic for locked databases.
@@ -113,31 +217,33 @@ class SQLiteDao(AbstractDao):
             print(f"{self.__class__.__name__}::Executing with retry: {query} with params: {params}")
         last_row_id = -1
         attempt = 0
-        while attempt < max_retries:
-            try:
-                with self._write_lock: # Assuming all writes need this lock
-                    with self.conn: # Will Commit the transaction
-                        cursor = self.conn.execute(query, params if params is not None else ())
-                        # Get the last inserted row ID
-                        last_row_id = cursor.lastrowid or -1
-                        cursor.close()
-
-                if self.verbose:
-                    print(f"{self.__class__.__name__}::Query executed successfully on attempt {attempt + 1}.")
-                return last_row_id
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e):
-                    attempt += 1
-                    if self.verbose:
-                        print(f"{self.__class__.__name__}::Database is locked, retrying {attempt}/{max_retries}...")
-                    time.sleep(retry_delay)
-                else:
+        with self._admit(AdmissionController.WRITE):
+            while attempt < max_retries:
+                try:
+                    with self._write_lock: # Assuming all writes need this lock
+                        with self.conn: # Will Commit the transaction
+                            with QueryGuard.run(self.conn, self._resolve_timeout(), f"{self.__class__.__name__} write"):
+                                cursor = self.conn.execute(query, params if params is not None else ())
+                            # Get the last inserted row ID
+                            last_row_id = cursor.lastrowid or -1
+                            cursor.close()
+
                     if self.verbose:
-                        print(f"{self.__class__.__name__}::SQLite error: {e}")
-                    raise # Re-raise unexpected errors
-        if self.verbose:
-            print(f"{self.__class__.__name__}::Failed to execute after retries.")
-        return last_row_id
+                        print(f"{self.__class__.__name__}::Query executed successfully on attempt {attempt + 1}.")
+                    return last_row_id
+                except sqlite3.OperationalError as e:
+                    if "database is locked" in str(e):
+                        attempt += 1
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::Database is locked, retrying {attempt}/{max_retries}...")
+                        time.sleep(retry_delay)
+                    else:
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::SQLite error: {e}")
+                        raise # Re-raise unexpected errors
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Failed to execute after retries.")
+            return last_row_id
     
 
     def _execute_update_delete_with_retry(self, query, params=None, max_retries=5, retry_delay=0.1):
@@ -148,31 +254,329 @@ class SQLiteDao(AbstractDao):
 
         attempt = 0
         affected_rows = 0
-        while attempt < max_retries:
-            try:
-                with self._write_lock: # Assuming all writes need this lock
-                    with self.conn: # Will Commit the transaction
-                        cursor = self.conn.execute(query, params if params is not None else ())
-                        # Get the last inserted row ID
-                        affected_rows = cursor.rowcount or 0
-                        cursor.close()
-
-                if self.verbose:
-                    print(f"{self.__class__.__name__}::Query executed successfully on attempt {attempt + 1}.")
-                return affected_rows
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e):
-                    attempt += 1
+        with self._admit(AdmissionController.WRITE):
+            while attempt < max_retries:
+                try:
+                    with self._write_lock: # Assuming all writes need this lock
+                        with self.conn: # Will Commit the transaction
+                            with QueryGuard.run(self.conn, self._resolve_timeout(), f"{self.__class__.__name__} write"):
+                                cursor = self.conn.execute(query, params if params is not None else ())
+                            # Get the last inserted row ID
+                            affected_rows = cursor.rowcount or 0
+                            cursor.close()
+
                     if self.verbose:
-                        print(f"{self.__class__.__name__}::Database is locked, retrying {attempt}/{max_retries}...")
-                    time.sleep(retry_delay)
-                else:
+                        print(f"{self.__class__.__name__}::Query executed successfully on attempt {attempt + 1}.")
+                    return affected_rows
+                except sqlite3.OperationalError as e:
+                    if "database is locked" in str(e):
+                        attempt += 1
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::Database is locked, retrying {attempt}/{max_retries}...")
+                        time.sleep(retry_delay)
+                    else:
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::SQLite error: {e}")
+                        raise # Re-raise unexpected errors
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Failed to execute after retries.")
+            return affected_rows
+    
+
+    
+
+    def _get_max_variables(self) -> int:
+        """Return the maximum number of bound parameters a single statement may use on this connection."""
+        try:
+            return self.conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        except (AttributeError, sqlite3.Error):
+            return 999 # SQLite's historical default, safe on every build
+
+    def _execute_transaction_with_retry(self, work, max_retries=5, retry_delay=0.1, shed=True):
+        """Helper to run several statements as one write transaction with retry logic for locked databases.
+           The write lock is taken once and the transaction starts with BEGIN IMMEDIATE, so no other
+           writer can slip in between the statements run by 'work'.
+           This method will commit the transaction after execution.
+            :param work: Callable receiving the connection; its return value is returned.
+            :param shed: If False, admission control never rejects the transaction (it waits for the write slot).
+        """
+        self._ensure_connected()
+        attempt = 0
+        with self._admit(AdmissionController.WRITE, shed=shed):
+            while attempt < max_retries:
+                try:
+                    with self._write_lock:
+                        self.conn.execute("BEGIN IMMEDIATE")
+                        with self.conn: # Will Commit the transaction, or roll it back on error
+                            with QueryGuard.run(self.conn, self._resolve_timeout(), f"{self.__class__.__name__} transaction"):
+                                result = work(self.conn)
+
                     if self.verbose:
-                        print(f"{self.__class__.__name__}::SQLite error: {e}")
-                    raise # Re-raise unexpected errors
+                        print(f"{self.__class__.__name__}::Transaction executed successfully on attempt {attempt + 1}.")
+                    return result
+                except sqlite3.OperationalError as e:
+                    if "database is locked" in str(e):
+                        attempt += 1
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::Database is locked, retrying {attempt}/{max_retries}...")
+                        time.sleep(retry_delay)
+                    else:
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::SQLite error: {e}")
+                        raise # Re-raise unexpected errors
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Failed to execute after retries.")
+            return None
+
+    def _execute_returning_with_retry(self, query, params=None, max_retries=5, retry_delay=0.1):
+        """Helper to execute a write query with a RETURNING clause, with retry logic for locked databases.
+           The returned rows are fetched inside the transaction, so the caller gets the written
+           rows without a follow-up SELECT.
+           This method will commit the transaction after execution.
+            :param query: The SQL query to execute, ending with a RETURNING clause.
+            :param params: Parameters to bind to the query.
+            :return: The list of returned rows, or None if the database stayed locked.
+        """
         if self.verbose:
-            print(f"{self.__class__.__name__}::Failed to execute after retries.")
-        return affected_rows
-    
+            print(f"{self.__class__.__name__}::Executing with retry: {query} with params: {params}")
+
+        def work(conn):
+            cursor = conn.execute(query, params if params is not None else ())
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        return self._execute_transaction_with_retry(work, max_retries=max_retries, retry_delay=retry_delay)
+
+    def _get_many_by_ids(self, tablename: str, id_field: str, columns, ids) -> dict:
+        """Helper to fetch rows for an arbitrary list of IDs with as few statements as possible.
+           IDs are sent as one JSON array per chunk and expanded with json_each, so a chunk uses a
+           single bound parameter whatever its size. Builds without the JSON functions fall back to
+           IN (...) lists sized under SQLite's variable limit.
+            :param tablename: Table to read.
+            :param id_field: Primary key column.
+            :param columns: Columns to select; must include id_field.
+            :param ids: IDs to fetch; duplicates are fetched once.
+            :return: A dictionary mapping each found ID to its row.
+        """
+        self._ensure_connected()
+        unique_ids = list(dict.fromkeys(ids))
+        column_list = ", ".join(columns)
+        found = {}
+        use_json = getattr(self, "_json_each_available", True)
+        chunk_size = self.multi_get_chunk_size if use_json else max(1, self._get_max_variables())
+        start = 0
+        while start < len(unique_ids):
+            chunk = unique_ids[start:start + chunk_size]
+            if use_json:
+                query = f"""
+                        SELECT {column_list} FROM {tablename}
+                        WHERE {id_field} IN (SELECT value FROM json_each(?))
+                        """
+                params = (json.dumps(chunk),)
+            else:
+                query = f"""
+                        SELECT {column_list} FROM {tablename}
+                        WHERE {id_field} IN ({", ".join("?" for _ in chunk)})
+                        """
+                params = tuple(chunk)
+            try:
+                rows = self.execute_query(query=query, params=params, fetch_all=True)
+            except sqlite3.OperationalError as e:
+                if use_json and "json_each" in str(e):
+                    # Remember it for this DAO and restart with IN (...) lists.
+                    self._json_each_available = use_json = False
+                    chunk_size = max(1, self._get_max_variables())
+                    continue
+                raise
+            for row in rows:
+                found[row[id_field]] = row
+            start += len(chunk)
+        return found
+
+    def _compile_criteria(self, tablename: str, columns, criteria: Criteria, select_list: str = None) -> str:
+        """Helper to compile a Criteria into a parameterized statement, cached per query shape.
+            :param tablename: Table to read.
+            :param columns: Columns the DAO maps; every field used by the criteria must be one of them.
+            :param criteria: The query specification.
+            :param select_list: SQL select list overriding the projection (e.g. 'COUNT(*)').
+            :return: The SQL text; bind criteria.where_sql() then criteria.tail_sql() parameters.
+        """
+        if select_list is None:
+            select_list = ", ".join(criteria.columns or columns)
+        key = (tablename, select_list, criteria.shape())
+        with self._compiled_criteria_lock:
+            query = self._compiled_criteria.get(key)
+            if query is not None:
+                self._compiled_criteria.move_to_end(key)
+                return query
 
-    
\ No newline at end of file
+        # Field names are interpolated into SQL, so only the DAO's own columns are accepted.
+        used_fields = set(criteria.filter_fields) | set(criteria.order_fields) | set(criteria.columns or ())
+        unknown = used_fields - set(columns)
+        if unknown:
+            raise ValueError(f"{self.__class__.__name__}::Unknown fields for '{tablename}': {sorted(unknown)}")
+
+        where_clause, _ = criteria.where_sql()
+        tail_clause, _ = criteria.tail_sql()
+        query = f"SELECT {select_list} FROM {tablename} {where_clause} {tail_clause}".strip()
+        with self._compiled_criteria_lock:
+            self._compiled_criteria[key] = query
+            if len(self._compiled_criteria) > self._compiled_criteria_max:
+                self._compiled_criteria.popitem(last=False)
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Compiled criteria: {query}")
+        return query
+
+    def _update_columns(self, tablename: str, id_field: str, columns, entity_id, changes: dict) -> int:
+        """Helper to update only some columns of one row, with the statement cached per column set.
+            :param tablename: Table to write.
+            :param id_field: Primary key column.
+            :param columns: Columns the DAO maps; every changed column must be one of them.
+            :param entity_id: Primary key of the row.
+            :param changes: {column: new value} for the columns to write.
+            :return: The number of updated rows (0 if 'changes' is empty or the row does not exist).
+        """
+        if not changes:
+            return 0
+        updated_columns = tuple(sorted(changes))
+        key = (tablename, id_field, updated_columns)
+        with self._update_statements_lock:
+            query = self._update_statements.get(key)
+            if query is not None:
+                self._update_statements.move_to_end(key)
+        if query is None:
+            # Column names are interpolated into SQL, so only the DAO's own columns are accepted.
+            unknown = set(updated_columns) - (set(columns) - {id_field})
+            if unknown:
+                raise ValueError(f"{self.__class__.__name__}::Unknown or read-only columns for '{tablename}': {sorted(unknown)}")
+            query = f"UPDATE {tablename} SET {', '.join(f'{column} = ?' for column in updated_columns)} WHERE {id_field} = ?"
+            with self._update_statements_lock:
+                self._update_statements[key] = query
+                if len(self._update_statements) > self._compiled_criteria_max:
+                    self._update_statements.popitem(last=False)
+        params = tuple(changes[column] for column in updated_columns) + (entity_id,)
+        return self._execute_update_delete_with_retry(query=query, params=params, max_retries=5, retry_delay=0.1)
+
+    def find_by_criteria(self, tablename: str, columns, criteria: Criteria, timeout=None):
+        """Run a Criteria query: filtering, ordering, limits and projection are executed by SQLite.
+            :param tablename: Table to read.
+            :param columns: Columns the DAO maps (used as the default projection and for validation).
+            :param criteria: The query specification.
+            :param timeout: Deadline in seconds. Defaults to default_timeout.
+            :return: A list of rows.
+        """
+        query = self._compile_criteria(tablename, columns, criteria)
+        where_clause, where_params = criteria.where_sql()
+        tail_clause, tail_params = criteria.tail_sql()
+        return self.execute_query(query=query, params=tuple(where_params + tail_params),
+                                  fetch_one=False, fetch_all=True, timeout=timeout)
+
+    def iter_by_criteria(self, tablename: str, columns, criteria: Criteria, batch_size: int = 1000, timeout=None):
+        """Stream the rows of a Criteria query, fetching them in batches (see find_by_criteria).
+            :param tablename: Table to read.
+            :param columns: Columns the DAO maps (used as the default projection and for validation).
+            :param criteria: The query specification.
+            :param batch_size: Number of rows fetched from SQLite at a time.
+            :param timeout: Deadline in seconds for the whole stream. Defaults to default_timeout.
+            :return: A generator yielding one row at a time.
+        """
+        query = self._compile_criteria(tablename, columns, criteria)
+        where_clause, where_params = criteria.where_sql()
+        tail_clause, tail_params = criteria.tail_sql()
+        return self.iter_query(query, params=tuple(where_params + tail_params), batch_size=batch_size, timeout=timeout)
+
+    def _aggregate_query(self, tablename: str, columns, criteria, function: str, column: str = None,
+                         keep_order: bool = False):
+        """Helper to compile 'SELECT function(column)' over the rows of a Criteria (all rows if None).
+            Without LIMIT the aggregate runs directly on the table, so SQLite can answer it from an
+            index alone; with LIMIT/OFFSET the selected rows go through a subquery first.
+            :param column: The aggregated column, or None for function(*).
+            :param keep_order: Keep the criteria ordering when a limit picks the rows.
+            :return: (query, params).
+        """
+        if criteria is None:
+            criteria = Criteria()
+        select_list = f"{function}({column or '*'})"
+        if criteria.row_limit is None:
+            rows = criteria.row_selection()
+            query = self._compile_criteria(tablename, columns, rows, select_list=select_list)
+        else:
+            rows = criteria.row_selection(keep_order=keep_order)
+            inner = self._compile_criteria(tablename, columns, rows, select_list=column or "1")
+            query = f"SELECT {select_list} FROM ({inner})"
+        _, where_params = rows.where_sql()
+        _, tail_params = rows.tail_sql()
+        return query, tuple(where_params + tail_params)
+
+    def count_by_criteria(self, tablename: str, columns, criteria: Criteria = None, timeout=None) -> int:
+        """Count the rows of a Criteria query in one COUNT(*) statement, without fetching them.
+            :param tablename: Table to read.
+            :param columns: Columns the DAO maps (used for validation).
+            :param criteria: The rows to count (filters, limit/offset), or None for the whole table.
+            :param timeout: Deadline in seconds. Defaults to default_timeout.
+            :return: The number of rows.
+        """
+        query, params = self._aggregate_query(tablename, columns, criteria, "COUNT")
+        return self.execute_query(query=query, params=params, fetch_one=True, timeout=timeout)[0]
+
+    def exists_by_criteria(self, tablename: str, columns, criteria: Criteria = None, timeout=None) -> bool:
+        """Check whether a Criteria query matches any row; SQLite stops at the first one.
+            :param tablename: Table to read.
+            :param columns: Columns the DAO maps (used for validation).
+            :param criteria: The rows to look for, or None for any row of the table.
+            :param timeout: Deadline in seconds. Defaults to default_timeout.
+            :return: True if at least one row matches.
+        """
+        rows = (criteria if criteria is not None else Criteria()).row_selection()
+        inner = self._compile_criteria(tablename, columns, rows, select_list="1")
+        _, where_params = rows.where_sql()
+        _, tail_params = rows.tail_sql()
+        row = self.execute_query(query=f"SELECT EXISTS ({inner})", params=tuple(where_params + tail_params),
+                                 fetch_one=True, timeout=timeout)
+        return bool(row[0])
+
+    def aggregate_by_criteria(self, tablename: str, columns, function: str, column: str,
+                              criteria: Criteria = None, timeout=None):
+        """Compute one aggregate over the rows of a Criteria query in a single statement.
+            MIN/MAX of an indexed column are answered by one index seek, and aggregates over
+            columns held by an index (plus the rowid) are read from that index alone.
+            :param tablename: Table to read.
+            :param columns: Columns the DAO maps; 'column' and the criteria fields must be among them.
+            :param function: One of aggregate_functions (COUNT counts the non-NULL values of 'column').
+            :param column: The aggregated column.
+            :param criteria: The rows to aggregate (filters, ordering with limit/offset), or None for all.
+            :param timeout: Deadline in seconds. Defaults to default_timeout.
+            :return: The aggregate value; None for MIN/MAX/SUM/AVG over no row.
+        """
+        function = function.upper()
+        if function not in self.aggregate_functions:
+            raise ValueError(f"{self.__class__.__name__}::Unsupported aggregate '{function}', expected one of {self.aggregate_functions}.")
+        if column not in columns:
+            raise ValueError(f"{self.__class__.__name__}::Unknown field for '{tablename}': {column}")
+        query, params = self._aggregate_query(tablename, columns, criteria, function, column, keep_order=True)
+        return self.execute_query(query=query, params=params, fetch_one=True, timeout=timeout)[0]
+
+    def iter_after_rowid(self, tablename: str, columns, selected, after_rowid: int = 0, batch_size: int = 1000,
+                         timeout=None):
+        """Stream the rows added after a rowid watermark, in rowid order, for incremental loads.
+            :param tablename: Table to read.
+            :param columns: Columns the DAO maps; every selected column must be one of them.
+            :param selected: Columns to read, after the rowid.
+            :param after_rowid: Watermark: only rows with a greater rowid are read (0 for every row).
+            :param batch_size: Number of rows fetched from SQLite at a time.
+            :param timeout: Deadline in seconds for the whole stream. Defaults to default_timeout.
+            :return: A generator of rows: the rowid followed by the selected columns.
+        """
+        unknown = set(selected) - set(columns)
+        if unknown:
+            raise ValueError(f"{self.__class__.__name__}::Unknown fields for '{tablename}': {sorted(unknown)}")
+        return self.iter_query(f"SELECT rowid, {', '.join(selected)} FROM {tablename} WHERE rowid > ? ORDER BY rowid",
+                               params=(after_rowid,), batch_size=batch_size, timeout=timeout)
+
+    def get_max_rowid(self, tablename: str) -> int:
+        """Get the largest rowid of a table (one seek at the end of the table b-tree).
+            :param tablename: Table to read.
+            :return: The largest rowid, or 0 if the table is empty.
+        """
+        row = self.execute_query(query=f"SELECT IFNULL(MAX(rowid), 0) FROM {tablename}", fetch_one=True)
+        return row[0]
@@ -0,0 +1,60 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import sqlite3
+from db.dao.SQLiteDao import SQLiteDao
+
+class AlbumDao(SQLiteDao):
+    """
+    AlbumDao reads albums.
+    """
+
+    tablename = "albums"
+
+    _field_id = "AlbumId"
+    _field_title = "Title"
+    _field_artist_id = "ArtistId"
+    _columns = (_field_id, _field_title, _field_artist_id)
+
+    def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
+        """
+        Initialize the DAO with a database connection.
+            :param connection: SQLite connection object. If None, ensure to set it before use.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        super().__init__(connection=connection, verbose=verbose)
+
+    def is_table_exist(self):
+        """
+        Check if the albums table exists in the database.
+            :return: True if the table exists, False otherwise.
+        """
+        return super().is_table_exist(self.tablename)
+
+    def get_album_by_id(self, album_id: int):
+        """
+        Retrieve an album by ID.
+            :param album_id: The ID of the album to retrieve.
+            :return: A row with the AlbumId, Title and ArtistId columns, or None if not found.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                SELECT {", ".join(self._columns)}
+                                FROM {self.tablename}
+                                WHERE {self._field_id} = ?
+                                """,
+                                params=(album_id,),
+                                fetch_one=True,
+                                fetch_all=False)
+
+    def iter_album_names(self, batch_size: int = 1000):
+        """
+        Stream the ID and title of every album, fetching them from SQLite in batches.
+            :param batch_size: Number of rows fetched at a time.
+            :return: A generator of rows with the AlbumId and Title columns.
+        """
+        return self.iter_query(f"SELECT {self._field_id}, {self._field_title} FROM {self.tablename}",
+                               batch_size=batch_size)
@@ -1,6 +1,7 @@
 
 import sqlite3
 from db.dao.SQLiteDao import SQLiteDao
+from db.dao.Criteria import Criteria
 
 class ArtistDao(SQLiteDao):
     """
@@ -11,6 +12,7 @@ class ArtistDao(SQLiteDao):
     tablename = "artists"
     _field_id = "ArtistId"
     _field_name = "Name"
+    _columns = (_field_id, _field_name)
 
     def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
         """
@@ -29,6 +31,21 @@ class ArtistDao(SQLiteDao):
         return super().is_table_exist(self.tablename)
     
 
+    @classmethod
+    def create_table_artist_query(cls, if_not_exists: bool = False) -> str:
+        """
+        Build the CREATE TABLE statement of the artists table.
+            :param if_not_exists: If True, add IF NOT EXISTS so the statement is idempotent.
+            :return: The CREATE TABLE statement.
+        """
+        clause = "IF NOT EXISTS " if if_not_exists else ""
+        return f"""       
+                CREATE TABLE {clause}"{cls.tablename}"
+                (
+                    {cls._field_id} INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+                    {cls._field_name} NVARCHAR(120)
+                )"""
+
     def create_table_artist(self):
         """
         Create the users table in the database if it does not exist.
@@ -38,12 +55,7 @@ class ArtistDao(SQLiteDao):
         """
         self._ensure_connected()
         with self.conn:
-            self.conn.execute(f"""       
-                CREATE TABLE "artists"
-                (
-                    {self._field_id} INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
-                    {self._field_name} NVARCHAR(120)
-                )""")
+            self.conn.execute(self.create_table_artist_query())
             
     def get_artist_by_id(self, artist_id: int):
         """
@@ -89,6 +101,47 @@ class ArtistDao(SQLiteDao):
                                 fetch_one=False, 
                                 fetch_all=True)
     
+    def iter_all_artists(self, batch_size: int = 1000):
+        """
+        Stream all artists, fetching them from SQLite in batches.
+            :param batch_size: Number of rows fetched at a time.
+            :return: A generator of rows with the ArtistId and Name columns.
+        """
+        return self.iter_query(f"SELECT {self._field_id}, {self._field_name} FROM {self.tablename}",
+                               batch_size=batch_size)
+
+    def iter_find(self, criteria: Criteria, batch_size: int = 1000, timeout: float = None):
+        """
+        Stream the artists matching a Criteria, fetching them from SQLite in batches.
+            :param criteria: The query specification, using the DAO column names.
+            :param batch_size: Number of rows fetched at a time.
+            :param timeout: Deadline in seconds for the whole stream. Defaults to default_timeout.
+            :return: A generator of rows with the projected columns.
+        """
+        return self.iter_by_criteria(self.tablename, self._columns, criteria, batch_size=batch_size, timeout=timeout)
+
+    def find(self, criteria: Criteria, timeout: float = None):
+        """
+        Retrieve artists matching a Criteria (filters, ordering, limit and projection run in SQLite).
+            :param criteria: The query specification, using the DAO column names (e.g. ArtistDao._field_name).
+            :param timeout: Deadline in seconds; raises QueryTimeoutError when exceeded. Defaults to default_timeout.
+            :return: A list of rows with the projected columns.
+        """
+        return self.find_by_criteria(self.tablename, self._columns, criteria, timeout=timeout)
+
+    def get_artists_by_ids(self, artist_ids: list):
+        """
+        Retrieve several artists by their IDs in chunked queries.
+            :param artist_ids: The IDs of the artists to retrieve, in any order.
+            :return: A tuple (rows, missing_ids): rows in input order for the IDs that exist,
+                     and the input IDs that were not found.
+        """
+        found = self._get_many_by_ids(self.tablename, self._field_id,
+                                      (self._field_id, self._field_name), artist_ids)
+        rows = [found[artist_id] for artist_id in artist_ids if artist_id in found]
+        missing_ids = [artist_id for artist_id in artist_ids if artist_id not in found]
+        return rows, missing_ids
+    
     def insert(self, artist_name: str):
         """
         Add a new artist to the database.
@@ -106,6 +159,69 @@ class ArtistDao(SQLiteDao):
                                 max_retries=5, 
                                 retry_delay=0.1)
     
+    def insert_with_next_id(self, artist_name: str, next_id):
+        """
+        Add a new artist with an ID computed from the highest ID ever used in this database.
+        Used when IDs must follow an external scheme (e.g. shard-owned ID ranges); the lookup and
+        the insert run in one IMMEDIATE transaction so concurrent writers get distinct IDs.
+            :param artist_name: The name of the artist to add.
+            :param next_id: Callable receiving the highest ID used so far (0 if none) and returning the new ID.
+            :return: The ID of the newly added artist, or -1 if the database stayed locked.
+        """
+        self._ensure_connected()
+
+        def work(conn):
+            current_max = conn.execute(f"""
+                                    SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+                                               COALESCE((SELECT MAX({self._field_id}) FROM {self.tablename}), 0))
+                                    """, (self.tablename,)).fetchone()[0]
+            artist_id = next_id(current_max)
+            conn.execute(f"""
+                                    INSERT INTO {self.tablename}
+                                    ({self._field_id}, {self._field_name})
+                                    VALUES (?, ?)
+                                    """, (artist_id, artist_name))
+            return artist_id
+        artist_id = self._execute_transaction_with_retry(work, max_retries=5, retry_delay=0.1)
+        return artist_id if artist_id is not None else -1
+
+    def count_artists(self) -> int:
+        """
+        Count the artists without fetching them.
+            :return: The number of artists.
+        """
+        return self.count()
+
+    def count(self, criteria: Criteria = None, timeout: float = None) -> int:
+        """
+        Count the artists matching a Criteria in one COUNT(*) statement, without fetching them.
+        SQLite counts from the smallest index covering the filters (IX_ArtistName for name filters).
+            :param criteria: Filters (and limit/offset) on the DAO column names, or None to count every artist.
+            :param timeout: Deadline in seconds. Defaults to default_timeout.
+            :return: The number of matching artists.
+        """
+        return self.count_by_criteria(self.tablename, self._columns, criteria, timeout=timeout)
+
+    def exists(self, criteria: Criteria = None, timeout: float = None) -> bool:
+        """
+        Check whether any artist matches a Criteria, stopping at the first match.
+            :param criteria: Filters on the DAO column names, or None for any artist.
+            :param timeout: Deadline in seconds. Defaults to default_timeout.
+            :return: True if at least one artist matches.
+        """
+        return self.exists_by_criteria(self.tablename, self._columns, criteria, timeout=timeout)
+
+    def aggregate(self, function: str, column: str, criteria: Criteria = None, timeout: float = None):
+        """
+        Compute MIN, MAX, SUM, TOTAL, AVG or COUNT of a column over the artists matching a Criteria.
+            :param function: The aggregate function (see SQLiteDao.aggregate_functions).
+            :param column: The aggregated column (ArtistDao._field_id or ArtistDao._field_name).
+            :param criteria: The artists to aggregate, or None for all.
+            :param timeout: Deadline in seconds. Defaults to default_timeout.
+            :return: The aggregate value; None for MIN/MAX/SUM/AVG over no artist.
+        """
+        return self.aggregate_by_criteria(self.tablename, self._columns, function, column, criteria, timeout=timeout)
+
     def update(self, artist_id: int, artist_name: str):
         """
         Update an existing artist's name in the database.
@@ -124,6 +240,16 @@ class ArtistDao(SQLiteDao):
                                 max_retries=5, 
                                 retry_delay=0.1)
     
+    def update_columns(self, artist_id: int, changes: dict):
+        """
+        Update only the given columns of an artist.
+            :param artist_id: The ID of the artist to update.
+            :param changes: {column: new value}, using the DAO column names (e.g. ArtistDao._field_name).
+            :return: The number of updated rows.
+        """
+        self._ensure_connected()
+        return self._update_columns(self.tablename, self._field_id, self._columns, artist_id, changes)
+    
     def delete(self, artist_id: int):
         """
         Delete an artist from the database by their ID.
@@ -138,4 +264,207 @@ class ArtistDao(SQLiteDao):
                                     """, 
                                 params=(artist_id,), 
                                 max_retries=5, 
-                                retry_delay=0.1)
\ No newline at end of file
+                                retry_delay=0.1)
+
+    def upsert(self, artist_id: int, artist_name: str):
+        """
+        Insert an artist, or update its name if the ID already exists, in a single statement.
+            :param artist_id: The ID of the artist, or None to let the database assign one.
+            :param artist_name: The name of the artist.
+            :return: The written row (ArtistId, Name), or None if the database stayed locked.
+        """
+        self._ensure_connected()
+        rows = self._execute_returning_with_retry(
+                                query=f"""
+                                    INSERT INTO {self.tablename}
+                                    ({self._field_id}, {self._field_name})
+                                    VALUES (?, ?)
+                                    ON CONFLICT({self._field_id}) DO UPDATE SET {self._field_name} = excluded.{self._field_name}
+                                    RETURNING {self._field_id}, {self._field_name}
+                                    """,
+                                params=(artist_id, artist_name),
+                                max_retries=5,
+                                retry_delay=0.1)
+        return rows[0] if rows else None
+
+    def upsert_many(self, artists: list):
+        """
+        Upsert several artists in one transaction, with multi-row statements kept under SQLite's variable limit.
+            :param artists: A list of (artist_id, artist_name) tuples; artist_id may be None.
+            :return: The written rows (ArtistId, Name) in input order, or None if the database stayed locked.
+        """
+        self._ensure_connected()
+        chunk_size = max(1, self._get_max_variables() // 2)
+
+        def work(conn):
+            # RETURNING row order is unspecified, so new artists get explicit IDs (we hold the
+            # write lock) and every returned row is matched back to its input by ID.
+            next_id = conn.execute(f"""
+                                    SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0),
+                                               COALESCE((SELECT MAX({self._field_id}) FROM {self.tablename}), 0)) + 1
+                                    """, (self.tablename,)).fetchone()[0]
+            values = []
+            for artist_id, artist_name in artists:
+                if artist_id is None:
+                    artist_id, next_id = next_id, next_id + 1
+                values.append((artist_id, artist_name))
+
+            by_id = {}
+            for start in range(0, len(values), chunk_size):
+                chunk = values[start:start + chunk_size]
+                cursor = conn.execute(f"""
+                                    INSERT INTO {self.tablename}
+                                    ({self._field_id}, {self._field_name})
+                                    VALUES {", ".join("(?, ?)" for _ in chunk)}
+                                    ON CONFLICT({self._field_id}) DO UPDATE SET {self._field_name} = excluded.{self._field_name}
+                                    RETURNING {self._field_id}, {self._field_name}
+                                    """,
+                                    [value for artist in chunk for value in artist])
+                for row in cursor.fetchall():
+                    by_id[row[self._field_id]] = row
+                cursor.close()
+            return [by_id[artist_id] for artist_id, _ in values]
+        return self._execute_transaction_with_retry(work, max_retries=5, retry_delay=0.1)
+
+    def get_or_create(self, artist_name: str):
+        """
+        Retrieve an artist by name, inserting it if it does not exist.
+        The lookup and the insert run in the same IMMEDIATE transaction under a single lock
+        acquisition, so two callers can never both create the same artist.
+            :param artist_name: The name of the artist.
+            :return: A tuple (row, created) where created is True if the artist was inserted,
+                     or None if the database stayed locked.
+        """
+        self._ensure_connected()
+
+        def work(conn):
+            cursor = conn.execute(f"""
+                                    INSERT INTO {self.tablename} ({self._field_name})
+                                    SELECT ? WHERE NOT EXISTS (
+                                        SELECT 1 FROM {self.tablename} WHERE {self._field_name} = ?)
+                                    RETURNING {self._field_id}, {self._field_name}
+                                    """,
+                                    (artist_name, artist_name))
+            row = cursor.fetchone()
+            cursor.close()
+            if row is not None:
+                return row, True
+            row = conn.execute(f"""
+                                    SELECT {self._field_id}, {self._field_name}
+                                    FROM {self.tablename}
+                                    WHERE {self._field_name} = ?
+                                    """,
+                                    (artist_name,)).fetchone()
+            return row, False
+        return self._execute_transaction_with_retry(work, max_retries=5, retry_delay=0.1)
+
+    def get_or_create_many(self, artist_names: list):
+        """
+        Retrieve several artists by name, inserting the missing ones, in one transaction.
+            :param artist_names: A list of artist names; duplicates are resolved to the same row.
+            :return: The rows (ArtistId, Name) in input order, or None if the database stayed locked.
+        """
+        self._ensure_connected()
+        unique_names = list(dict.fromkeys(artist_names))
+        chunk_size = max(1, self._get_max_variables())
+
+        def work(conn):
+            by_name = {}
+            for start in range(0, len(unique_names), chunk_size):
+                chunk = unique_names[start:start + chunk_size]
+                for row in conn.execute(f"""
+                                    SELECT {self._field_id}, {self._field_name}
+                                    FROM {self.tablename}
+                                    WHERE {self._field_name} IN ({", ".join("?" for _ in chunk)})
+                                    """, chunk):
+                    by_name.setdefault(row[self._field_name], row)
+            missing = [name for name in unique_names if name not in by_name]
+            for start in range(0, len(missing), chunk_size):
+                chunk = missing[start:start + chunk_size]
+                cursor = conn.execute(f"""
+                                    INSERT INTO {self.tablename} ({self._field_name})
+                                    VALUES {", ".join("(?)" for _ in chunk)}
+                                    RETURNING {self._field_id}, {self._field_name}
+                                    """, chunk)
+                for row in cursor.fetchall():
+                    by_name[row[self._field_name]] = row
+                cursor.close()
+            return [by_name[name] for name in artist_names]
+        return self._execute_transaction_with_retry(work, max_retries=5, retry_delay=0.1)
+
+    def update_returning(self, artist_id: int, artist_name: str):
+        """
+        Update an artist's name and return the updated row in the same statement.
+            :param artist_id: The ID of the artist to update.
+            :param artist_name: The new name for the artist.
+            :return: The updated row (ArtistId, Name), or None if no artist has this ID.
+        """
+        self._ensure_connected()
+        rows = self._execute_returning_with_retry(
+                                query=f"""
+                                    UPDATE {self.tablename}
+                                    SET {self._field_name} = ?
+                                    WHERE {self._field_id} = ?
+                                    RETURNING {self._field_id}, {self._field_name}
+                                    """,
+                                params=(artist_name, artist_id),
+                                max_retries=5,
+                                retry_delay=0.1)
+        return rows[0] if rows else None
+
+    def update_many_returning(self, artists: list):
+        """
+        Update several artists' names in one transaction and return the updated rows.
+        Each chunk is a single UPDATE ... FROM (VALUES ...) statement.
+            :param artists: A list of (artist_id, artist_name) tuples.
+            :return: The updated rows (ArtistId, Name); IDs that do not exist are absent.
+        """
+        self._ensure_connected()
+        chunk_size = max(1, self._get_max_variables() // 2)
+
+        def work(conn):
+            updated = []
+            for start in range(0, len(artists), chunk_size):
+                chunk = artists[start:start + chunk_size]
+                cursor = conn.execute(f"""
+                                    UPDATE {self.tablename}
+                                    SET {self._field_name} = v.column2
+                                    FROM (VALUES {", ".join("(?, ?)" for _ in chunk)}) AS v
+                                    WHERE {self.tablename}.{self._field_id} = v.column1
+                                    RETURNING {self.tablename}.{self._field_id}, {self.tablename}.{self._field_name}
+                                    """,
+                                    [value for artist in chunk for value in artist])
+                updated.extend(cursor.fetchall())
+                cursor.close()
+            return updated
+        return self._execute_transaction_with_retry(work, max_retries=5, retry_delay=0.1)
+
+    def write_batch(self, updates: list, deletes: list):
+        """
+        Apply buffered updates and deletes in a single transaction.
+            :param updates: A list of (artist_id, artist_name) tuples.
+            :param deletes: A list of artist IDs to delete.
+            :return: A tuple (updated_rows, deleted_rows), or None if the database stayed locked.
+                     Admission control never sheds the batch: it waits for the write slot.
+        """
+        self._ensure_connected()
+
+        def work(conn):
+            updated = deleted = 0
+            if updates:
+                cursor = conn.executemany(f"""
+                                    UPDATE {self.tablename}
+                                    SET {self._field_name} = ?
+                                    WHERE {self._field_id} = ?
+                                    """,
+                                    [(artist_name, artist_id) for artist_id, artist_name in updates])
+                updated = cursor.rowcount
+                cursor.close()
+            if deletes:
+                cursor = conn.executemany(f"DELETE FROM {self.tablename} WHERE {self._field_id} = ?",
+                                          [(artist_id,) for artist_id in deletes])
+                deleted = cursor.rowcount
+                cursor.close()
+            return updated, deleted
+        # Buffered writes were already accepted from the caller: admission control must not shed them.
+        return self._execute_transaction_with_retry(work, max_retries=5, retry_delay=0.1, shed=False)
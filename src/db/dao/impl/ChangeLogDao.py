@@ -0,0 +1,224 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import re
+import sqlite3
+from db.dao.SQLiteDao import SQLiteDao
+
+class ChangeLogDao(SQLiteDao):
+    """
+    ChangeLogDao manages trigger-based change data capture.
+    Every insert, update and delete on a captured table appends a compact
+    (Seq, TableName, RowId, Operation, ChangedAt) entry to the change_log table.
+    Seq comes from AUTOINCREMENT, so it only grows and is never reused after compaction.
+    """
+
+    tablename = "change_log"
+    _field_seq = "Seq"
+    _field_table_name = "TableName"
+    _field_row_id = "RowId"
+    _field_operation = "Operation"
+    _field_changed_at = "ChangedAt"
+
+    _identifier = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
+        """
+        Initialize the DAO with a database connection.
+            :param connection: SQLite connection object. If None, ensure to set it before use.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        super().__init__(connection=connection, verbose=verbose)
+
+    def is_table_exist(self):
+        """
+        Check if the change_log table exists in the database.
+            :return: True if the table exists, False otherwise.
+        """
+        return super().is_table_exist(self.tablename)
+
+    @classmethod
+    def create_table_change_log_queries(cls) -> list:
+        """
+        Build the statements creating the change_log table and its lookup index if they do not exist.
+        They are applied by the schema migrations (SQLiteMigrations); the capture triggers stay opt-in.
+            :return: The CREATE TABLE and CREATE INDEX statements.
+        """
+        return [f"""
+                CREATE TABLE IF NOT EXISTS {cls.tablename}
+                (
+                    {cls._field_seq} INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+                    {cls._field_table_name} TEXT NOT NULL,
+                    {cls._field_row_id} INTEGER NOT NULL,
+                    {cls._field_operation} TEXT NOT NULL CHECK ({cls._field_operation} IN ('I', 'U', 'D')),
+                    {cls._field_changed_at} INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+                )""",
+                f"""
+                CREATE INDEX IF NOT EXISTS IX_ChangeLogTableRow
+                ON {cls.tablename} ({cls._field_table_name}, {cls._field_row_id})"""]
+
+    def _trigger_name(self, table_name: str, operation: str) -> str:
+        return f"trg_cdc_{table_name}_{operation}"
+
+    def _check_identifier(self, name: str):
+        # Table and column names end up in trigger DDL and cannot be bound as parameters.
+        if not self._identifier.match(name):
+            raise ValueError(f"{self.__class__.__name__}::Invalid identifier '{name}'.")
+
+    def enable_capture(self, table_name: str, pk_field: str):
+        """
+        Install the capture triggers on a table. Safe to call multiple times.
+            :param table_name: Name of the table to capture.
+            :param pk_field: Name of its integer primary key column.
+        """
+        self._check_identifier(table_name)
+        self._check_identifier(pk_field)
+        self._ensure_connected()
+        insert_log = f"INSERT INTO {self.tablename} ({self._field_table_name}, {self._field_row_id}, {self._field_operation})"
+        with self._write_lock:
+            with self.conn:
+                self.conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {self._trigger_name(table_name, 'insert')}
+                    AFTER INSERT ON "{table_name}"
+                    BEGIN
+                        {insert_log} VALUES ('{table_name}', NEW.{pk_field}, 'I');
+                    END""")
+                # A primary key change is recorded as a delete of the old key plus an update of the new one.
+                self.conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {self._trigger_name(table_name, 'update')}
+                    AFTER UPDATE ON "{table_name}"
+                    BEGIN
+                        {insert_log} SELECT '{table_name}', OLD.{pk_field}, 'D' WHERE OLD.{pk_field} IS NOT NEW.{pk_field};
+                        {insert_log} VALUES ('{table_name}', NEW.{pk_field}, 'U');
+                    END""")
+                self.conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {self._trigger_name(table_name, 'delete')}
+                    AFTER DELETE ON "{table_name}"
+                    BEGIN
+                        {insert_log} VALUES ('{table_name}', OLD.{pk_field}, 'D');
+                    END""")
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Change capture enabled on '{table_name}'.")
+
+    def disable_capture(self, table_name: str):
+        """
+        Remove the capture triggers from a table. Existing log entries are kept.
+            :param table_name: Name of the captured table.
+        """
+        self._check_identifier(table_name)
+        self._ensure_connected()
+        with self._write_lock:
+            with self.conn:
+                for operation in ("insert", "update", "delete"):
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {self._trigger_name(table_name, operation)}")
+
+    def get_captured_tables(self):
+        """
+        List the tables that currently have capture triggers.
+            :return: A sorted list of table names.
+        """
+        rows = self.execute_query(query="""
+                                SELECT DISTINCT tbl_name FROM sqlite_master
+                                WHERE type = 'trigger' AND name LIKE 'trg_cdc_%'
+                                """,
+                                fetch_all=True)
+        return sorted(row[0] for row in rows)
+
+    def get_changes_after(self, seq: int, limit: int = 1000, table_names=None):
+        """
+        Retrieve the log entries that follow a sequence number.
+            :param seq: Last sequence number already processed by the consumer (0 to start from the beginning).
+            :param limit: Maximum number of entries to return.
+            :param table_names: Optional list of table names to filter on.
+            :return: A list of rows ordered by Seq.
+        """
+        filter_clause = ""
+        params = [seq]
+        if table_names:
+            filter_clause = f"AND {self._field_table_name} IN ({', '.join('?' for _ in table_names)})"
+            params.extend(table_names)
+        params.append(limit)
+        return self.execute_query(query=
+                                 f"""
+                                SELECT {self._field_seq}, {self._field_table_name}, {self._field_row_id},
+                                       {self._field_operation}, {self._field_changed_at}
+                                FROM {self.tablename}
+                                WHERE {self._field_seq} > ? {filter_clause}
+                                ORDER BY {self._field_seq}
+                                LIMIT ?
+                                """,
+                                params=tuple(params),
+                                fetch_one=False,
+                                fetch_all=True)
+
+    def get_latest_seq(self) -> int:
+        """
+        Retrieve the highest sequence number ever assigned, including compacted entries.
+            :return: The latest sequence number, or 0 if nothing was logged.
+        """
+        row = self.execute_query(query=
+                                 f"""
+                                SELECT COALESCE(
+                                    (SELECT seq FROM sqlite_sequence WHERE name = ?),
+                                    (SELECT MAX({self._field_seq}) FROM {self.tablename}),
+                                    0)
+                                """,
+                                params=(self.tablename,),
+                                fetch_one=True)
+        return row[0]
+
+    def compact(self, up_to_seq: int) -> int:
+        """
+        Keep only the newest entry per (table, row) among entries up to a sequence number.
+        Consumers starting before 'up_to_seq' still see the final operation of every row.
+            :param up_to_seq: Highest sequence number included in the compaction.
+            :return: The number of entries removed.
+        """
+        self._ensure_connected()
+        return self._execute_update_delete_with_retry(
+                                query=f"""
+                                    DELETE FROM {self.tablename}
+                                    WHERE {self._field_seq} <= ?
+                                    AND {self._field_seq} NOT IN (
+                                        SELECT MAX({self._field_seq}) FROM {self.tablename}
+                                        WHERE {self._field_seq} <= ?
+                                        GROUP BY {self._field_table_name}, {self._field_row_id})
+                                    """,
+                                params=(up_to_seq, up_to_seq),
+                                max_retries=5,
+                                retry_delay=0.1)
+
+    def purge_before(self, seq: int) -> int:
+        """
+        Delete every entry with a sequence number lower than or equal to 'seq'.
+            :param seq: Highest sequence number to delete, typically the slowest consumer's position.
+            :return: The number of entries removed.
+        """
+        self._ensure_connected()
+        return self._execute_update_delete_with_retry(
+                                query=f"""
+                                    DELETE FROM {self.tablename}
+                                    WHERE {self._field_seq} <= ?
+                                    """,
+                                params=(seq,),
+                                max_retries=5,
+                                retry_delay=0.1)
+
+    def purge_older_than(self, max_age_seconds: int) -> int:
+        """
+        Delete every entry older than a retention period.
+            :param max_age_seconds: Retention period in seconds.
+            :return: The number of entries removed.
+        """
+        self._ensure_connected()
+        return self._execute_update_delete_with_retry(
+                                query=f"""
+                                    DELETE FROM {self.tablename}
+                                    WHERE {self._field_changed_at} < CAST(strftime('%s', 'now') AS INTEGER) - ?
+                                    """,
+                                params=(max_age_seconds,),
+                                max_retries=5,
+                                retry_delay=0.1)
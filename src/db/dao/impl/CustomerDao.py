@@ -0,0 +1,108 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import sqlite3
+from db.dao.SQLiteDao import SQLiteDao
+from db.dao.impl.EmployeeDao import EmployeeDao
+
+class CustomerDao(SQLiteDao):
+    """
+    CustomerDao reads customers, including every customer supported by a whole branch
+    of the employee hierarchy in a single WITH RECURSIVE statement.
+    """
+
+    tablename = "customers"
+
+    _field_id = "CustomerId"
+    _field_first_name = "FirstName"
+    _field_last_name = "LastName"
+    _field_company = "Company"
+    _field_address = "Address"
+    _field_city = "City"
+    _field_state = "State"
+    _field_country = "Country"
+    _field_postal_code = "PostalCode"
+    _field_phone = "Phone"
+    _field_fax = "Fax"
+    _field_email = "Email"
+    _field_support_rep_id = "SupportRepId"
+    _columns = (_field_id, _field_first_name, _field_last_name, _field_company, _field_address, _field_city,
+                _field_state, _field_country, _field_postal_code, _field_phone, _field_fax, _field_email,
+                _field_support_rep_id)
+
+    def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
+        """
+        Initialize the DAO with a database connection.
+            :param connection: SQLite connection object. If None, ensure to set it before use.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        super().__init__(connection=connection, verbose=verbose)
+
+    def is_table_exist(self):
+        """
+        Check if the customers table exists in the database.
+            :return: True if the table exists, False otherwise.
+        """
+        return super().is_table_exist(self.tablename)
+
+    def get_customer_by_id(self, customer_id: int):
+        """
+        Retrieve a customer by their ID.
+            :param customer_id: The ID of the customer to retrieve.
+            :return: A row with every customer column, or None if not found.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                SELECT {", ".join(self._columns)}
+                                FROM {self.tablename}
+                                WHERE {self._field_id} = ?
+                                """,
+                                params=(customer_id,),
+                                fetch_one=True,
+                                fetch_all=False)
+
+    def get_customers_by_support_reps(self, employee_ids: list):
+        """
+        Retrieve the customers supported by any of the given employees.
+            :param employee_ids: IDs of the support representatives.
+            :return: A list of rows ordered by customer ID.
+        """
+        rows = []
+        unique_ids = list(dict.fromkeys(employee_ids))
+        chunk_size = max(1, self._get_max_variables())
+        for start in range(0, len(unique_ids), chunk_size):
+            chunk = unique_ids[start:start + chunk_size]
+            rows.extend(self.execute_query(query=
+                                           f"""
+                                SELECT {", ".join(self._columns)}
+                                FROM {self.tablename}
+                                WHERE {self._field_support_rep_id} IN ({", ".join("?" for _ in chunk)})
+                                """,
+                                params=tuple(chunk),
+                                fetch_one=False,
+                                fetch_all=True))
+        rows.sort(key=lambda row: row[self._field_id])
+        return rows
+
+    def get_customers_under(self, manager_id: int, max_depth: int = None):
+        """
+        Retrieve the customers supported by a manager or anyone in their reporting subtree, in one statement.
+            :param manager_id: The ID of the manager at the top of the branch.
+            :param max_depth: Deepest level of the branch to include (0 for the manager only), or None for all.
+            :return: A list of rows with every customer column, ordered by customer ID.
+        """
+        params = (manager_id,) + ((max_depth,) if max_depth is not None else ())
+        columns = ", ".join(f"c.{column}" for column in self._columns)
+        return self.execute_query(query=
+                                  f"""
+                                {EmployeeDao.subtree_cte(max_depth)}
+                                SELECT {columns}
+                                FROM tree t JOIN {self.tablename} c ON c.{self._field_support_rep_id} = t.{EmployeeDao._field_id}
+                                ORDER BY c.{self._field_id}
+                                """,
+                                params=params,
+                                fetch_one=False,
+                                fetch_all=True)
@@ -0,0 +1,241 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import sqlite3
+from db.dao.SQLiteDao import SQLiteDao
+
+class EmployeeDao(SQLiteDao):
+    """
+    EmployeeDao reads employees and walks the management hierarchy formed by ReportsTo.
+    Subtree, ancestor and depth queries are single WITH RECURSIVE statements, whatever
+    the depth of the hierarchy. Walks carry the path of visited IDs, so a cycle in
+    ReportsTo ends the walk instead of looping.
+    An optional version row, bumped by triggers on every change to employees, tells
+    caches when the hierarchy must be reloaded.
+    """
+
+    tablename = "employees"
+    tablename_state = "employee_tree_state"
+
+    _field_id = "EmployeeId"
+    _field_last_name = "LastName"
+    _field_first_name = "FirstName"
+    _field_title = "Title"
+    _field_reports_to = "ReportsTo"
+    _field_birth_date = "BirthDate"
+    _field_hire_date = "HireDate"
+    _field_address = "Address"
+    _field_city = "City"
+    _field_state = "State"
+    _field_country = "Country"
+    _field_postal_code = "PostalCode"
+    _field_phone = "Phone"
+    _field_fax = "Fax"
+    _field_email = "Email"
+    _columns = (_field_id, _field_last_name, _field_first_name, _field_title, _field_reports_to,
+                _field_birth_date, _field_hire_date, _field_address, _field_city, _field_state,
+                _field_country, _field_postal_code, _field_phone, _field_fax, _field_email)
+
+    # Computed by the hierarchy queries
+    _field_depth = "Depth"
+    _field_path = "Path"
+
+    _field_version = "Version"
+    _trigger_names = ("trg_employee_tree_insert", "trg_employee_tree_update", "trg_employee_tree_delete")
+
+    def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
+        """
+        Initialize the DAO with a database connection.
+            :param connection: SQLite connection object. If None, ensure to set it before use.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        super().__init__(connection=connection, verbose=verbose)
+
+    def is_table_exist(self):
+        """
+        Check if the employees table exists in the database.
+            :return: True if the table exists, False otherwise.
+        """
+        return super().is_table_exist(self.tablename)
+
+    @classmethod
+    def subtree_cte(cls, max_depth: int = None) -> str:
+        """
+        Build the 'tree(EmployeeId, Depth, Path)' recursive CTE walking down from one employee.
+        Bind the root EmployeeId, followed by max_depth if one is given.
+            :param max_depth: Deepest level to walk (0 is the root), or None for the whole subtree.
+            :return: The CTE text, starting with WITH RECURSIVE.
+        """
+        depth_limit = "AND t.Depth < ?" if max_depth is not None else ""
+        return f"""
+            WITH RECURSIVE tree({cls._field_id}, {cls._field_depth}, {cls._field_path}) AS (
+                SELECT {cls._field_id}, 0, '/' || {cls._field_id} || '/'
+                FROM {cls.tablename} WHERE {cls._field_id} = ?
+                UNION ALL
+                SELECT e.{cls._field_id}, t.{cls._field_depth} + 1, t.{cls._field_path} || e.{cls._field_id} || '/'
+                FROM {cls.tablename} e JOIN tree t ON e.{cls._field_reports_to} = t.{cls._field_id}
+                WHERE instr(t.{cls._field_path}, '/' || e.{cls._field_id} || '/') = 0 {depth_limit}
+            )"""
+
+    def _select_columns(self, alias: str) -> str:
+        return ", ".join(f"{alias}.{column}" for column in self._columns)
+
+    def get_employee_by_id(self, employee_id: int):
+        """
+        Retrieve an employee by their ID.
+            :param employee_id: The ID of the employee to retrieve.
+            :return: A row with every employee column, or None if not found.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                SELECT {", ".join(self._columns)}
+                                FROM {self.tablename}
+                                WHERE {self._field_id} = ?
+                                """,
+                                params=(employee_id,),
+                                fetch_one=True,
+                                fetch_all=False)
+
+    def get_all_employees(self):
+        """
+        Retrieve all employees.
+            :return: A list of rows with every employee column, ordered by ID.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                SELECT {", ".join(self._columns)}
+                                FROM {self.tablename}
+                                ORDER BY {self._field_id}
+                                """,
+                                fetch_one=False,
+                                fetch_all=True)
+
+    def get_direct_reports(self, manager_id: int):
+        """
+        Retrieve the employees reporting directly to a manager.
+            :param manager_id: The ID of the manager.
+            :return: A list of rows ordered by ID.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                SELECT {", ".join(self._columns)}
+                                FROM {self.tablename}
+                                WHERE {self._field_reports_to} = ?
+                                ORDER BY {self._field_id}
+                                """,
+                                params=(manager_id,),
+                                fetch_one=False,
+                                fetch_all=True)
+
+    def get_subtree(self, employee_id: int, max_depth: int = None, include_root: bool = True):
+        """
+        Retrieve an employee and everyone reporting to them, directly or not, in one statement.
+            :param employee_id: The ID of the root employee.
+            :param max_depth: Deepest level to return (1 for direct reports), or None for every level.
+            :param include_root: If False, the root employee itself is left out.
+            :return: A list of rows with every employee column plus Depth (0 for the root),
+                     ordered by depth then ID. Empty if the employee does not exist.
+        """
+        params = (employee_id,) + ((max_depth,) if max_depth is not None else ()) + (0 if include_root else 1,)
+        return self.execute_query(query=
+                                  f"""
+                                {self.subtree_cte(max_depth)}
+                                SELECT {self._select_columns('e')}, t.{self._field_depth}
+                                FROM tree t JOIN {self.tablename} e ON e.{self._field_id} = t.{self._field_id}
+                                WHERE t.{self._field_depth} >= ?
+                                ORDER BY t.{self._field_depth}, e.{self._field_id}
+                                """,
+                                params=params,
+                                fetch_one=False,
+                                fetch_all=True)
+
+    def get_ancestors(self, employee_id: int, include_self: bool = True):
+        """
+        Retrieve the management chain of an employee in one statement.
+            :param employee_id: The ID of the employee.
+            :param include_self: If False, the employee itself is left out.
+            :return: A list of rows with every employee column plus Depth (distance to the employee),
+                     from the top of the hierarchy down to the employee. Empty if the employee does not exist.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                WITH RECURSIVE chain({self._field_id}, {self._field_reports_to}, {self._field_depth}, {self._field_path}) AS (
+                                    SELECT {self._field_id}, {self._field_reports_to}, 0, '/' || {self._field_id} || '/'
+                                    FROM {self.tablename} WHERE {self._field_id} = ?
+                                    UNION ALL
+                                    SELECT e.{self._field_id}, e.{self._field_reports_to}, c.{self._field_depth} + 1,
+                                           c.{self._field_path} || e.{self._field_id} || '/'
+                                    FROM {self.tablename} e JOIN chain c ON e.{self._field_id} = c.{self._field_reports_to}
+                                    WHERE instr(c.{self._field_path}, '/' || e.{self._field_id} || '/') = 0
+                                )
+                                SELECT {self._select_columns('e')}, c.{self._field_depth}
+                                FROM chain c JOIN {self.tablename} e ON e.{self._field_id} = c.{self._field_id}
+                                WHERE c.{self._field_depth} >= ?
+                                ORDER BY c.{self._field_depth} DESC
+                                """,
+                                params=(employee_id, 0 if include_self else 1),
+                                fetch_one=False,
+                                fetch_all=True)
+
+    def get_depths(self):
+        """
+        Compute the level of every employee in one statement (0 for employees without a manager).
+        Employees only reachable through a cycle have no level and are left out.
+            :return: A list of rows with the EmployeeId and Depth columns, ordered by depth then ID.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                WITH RECURSIVE levels({self._field_id}, {self._field_depth}, {self._field_path}) AS (
+                                    SELECT {self._field_id}, 0, '/' || {self._field_id} || '/'
+                                    FROM {self.tablename} WHERE {self._field_reports_to} IS NULL
+                                    UNION ALL
+                                    SELECT e.{self._field_id}, l.{self._field_depth} + 1, l.{self._field_path} || e.{self._field_id} || '/'
+                                    FROM {self.tablename} e JOIN levels l ON e.{self._field_reports_to} = l.{self._field_id}
+                                    WHERE instr(l.{self._field_path}, '/' || e.{self._field_id} || '/') = 0
+                                )
+                                SELECT {self._field_id}, {self._field_depth} FROM levels
+                                ORDER BY {self._field_depth}, {self._field_id}
+                                """,
+                                fetch_one=False,
+                                fetch_all=True)
+
+    @classmethod
+    def create_change_tracking_queries(cls) -> list:
+        """
+        Build the statements creating the hierarchy version row and the triggers bumping it on
+        every insert, update and delete on employees, if they do not exist.
+        They are applied by the schema migrations (SQLiteMigrations).
+            :return: The CREATE TABLE, INSERT and CREATE TRIGGER statements.
+        """
+        bump = f"UPDATE {cls.tablename_state} SET {cls._field_version} = {cls._field_version} + 1;"
+        queries = [f"""
+                CREATE TABLE IF NOT EXISTS {cls.tablename_state}
+                (
+                    Id INTEGER PRIMARY KEY CHECK (Id = 1),
+                    {cls._field_version} INTEGER NOT NULL DEFAULT 0
+                )""",
+                f"INSERT OR IGNORE INTO {cls.tablename_state} (Id) VALUES (1)"]
+        for trigger, event in zip(cls._trigger_names, ("INSERT", "UPDATE", "DELETE")):
+            queries.append(f"""
+                CREATE TRIGGER IF NOT EXISTS {trigger}
+                AFTER {event} ON {cls.tablename}
+                BEGIN {bump} END""")
+        return queries
+
+    def get_tree_version(self):
+        """
+        Read the hierarchy version.
+            :return: The number of changes made to employees since tracking was created,
+                     or None if the schema migrations never created the version row.
+        """
+        try:
+            row = self.execute_query(query=f"SELECT {self._field_version} FROM {self.tablename_state} WHERE Id = 1",
+                                     fetch_one=True)
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e):
+                return None
+            raise
+        return row[0] if row is not None else None
@@ -0,0 +1,360 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import re
+import sqlite3
+from db.dao.SQLiteDao import SQLiteDao
+
+class InvoiceDao(SQLiteDao):
+    """
+    InvoiceDao reads invoices and invoice lines from the hot database and from invoice
+    archives, separate database files ATTACHed to the connection under an alias.
+    It also moves old invoices into an archive in batched transactions, keeping the
+    manifest table (invoice_archives) that tells which dates and IDs every archive holds.
+    """
+
+    tablename = "invoices"
+    tablename_items = "invoice_items"
+    tablename_archives = "invoice_archives"
+
+    _field_id = "InvoiceId"
+    _field_customer_id = "CustomerId"
+    _field_date = "InvoiceDate"
+    _field_billing_address = "BillingAddress"
+    _field_billing_city = "BillingCity"
+    _field_billing_state = "BillingState"
+    _field_billing_country = "BillingCountry"
+    _field_billing_postal_code = "BillingPostalCode"
+    _field_total = "Total"
+    _columns = (_field_id, _field_customer_id, _field_date, _field_billing_address, _field_billing_city,
+                _field_billing_state, _field_billing_country, _field_billing_postal_code, _field_total)
+
+    _field_line_id = "InvoiceLineId"
+    _field_track_id = "TrackId"
+    _field_unit_price = "UnitPrice"
+    _field_quantity = "Quantity"
+    _item_columns = (_field_line_id, _field_id, _field_track_id, _field_unit_price, _field_quantity)
+
+    # Manifest of the archives, in the hot database
+    _field_period = "Period"
+    _field_path = "Path"
+    _field_first_date = "FirstDate"
+    _field_last_date = "LastDate"
+    _field_first_id = "FirstId"
+    _field_last_id = "LastId"
+    _field_invoice_count = "InvoiceCount"
+    _field_line_count = "LineCount"
+    _field_archived_at = "ArchivedAt"
+
+    # Column added to rows read from several databases: the schema the row came from
+    _field_source = "Source"
+
+    _identifier = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
+        """
+        Initialize the DAO with a database connection.
+            :param connection: SQLite connection object. If None, ensure to set it before use.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        super().__init__(connection=connection, verbose=verbose)
+
+    def is_table_exist(self):
+        """
+        Check if the invoices table exists in the database.
+            :return: True if the table exists, False otherwise.
+        """
+        return super().is_table_exist(self.tablename)
+
+    def has_archive_manifest(self) -> bool:
+        """
+        Check if the archive manifest exists in the database.
+            :return: True if the table exists, False otherwise.
+        """
+        return super().is_table_exist(self.tablename_archives)
+
+    @classmethod
+    def archive_alias(cls, period: str) -> str:
+        """
+        Schema name under which the archive of a period is attached.
+            :param period: Period key, e.g. '2009' or '2009_03'.
+            :return: The alias, e.g. 'archive_2009'.
+        """
+        return f"archive_{period}"
+
+    def _check_alias(self, alias: str):
+        # Aliases are interpolated into SQL.
+        if alias in ("main", "temp") or not self._identifier.match(alias):
+            raise ValueError(f"{self.__class__.__name__}::Invalid archive alias '{alias}'.")
+
+    @classmethod
+    def create_archive_manifest_queries(cls) -> list:
+        """
+        Build the statements creating the archive manifest and the invoice date index
+        if they do not exist. They are applied by the schema migrations (SQLiteMigrations).
+            :return: The CREATE TABLE and CREATE INDEX statements.
+        """
+        return [f"""
+                CREATE TABLE IF NOT EXISTS main.{cls.tablename_archives}
+                (
+                    {cls._field_period} TEXT PRIMARY KEY NOT NULL,
+                    {cls._field_path} TEXT NOT NULL,
+                    {cls._field_first_date} DATETIME,
+                    {cls._field_last_date} DATETIME,
+                    {cls._field_first_id} INTEGER,
+                    {cls._field_last_id} INTEGER,
+                    {cls._field_invoice_count} INTEGER NOT NULL DEFAULT 0,
+                    {cls._field_line_count} INTEGER NOT NULL DEFAULT 0,
+                    {cls._field_archived_at} TEXT
+                )""",
+                # Range reads and archive batches select invoices by date.
+                f"CREATE INDEX IF NOT EXISTS main.IX_InvoiceDate ON {cls.tablename} ({cls._field_date})"]
+
+    def get_archives(self):
+        """
+        Retrieve the manifest of the invoice archives, oldest first.
+            :return: A list of rows with every manifest column, empty if nothing was ever archived.
+        """
+        if not self.has_archive_manifest():
+            return []
+        return self.execute_query(query=
+                                  f"""
+                                SELECT {self._field_period}, {self._field_path}, {self._field_first_date}, {self._field_last_date},
+                                       {self._field_first_id}, {self._field_last_id}, {self._field_invoice_count},
+                                       {self._field_line_count}, {self._field_archived_at}
+                                FROM main.{self.tablename_archives}
+                                ORDER BY {self._field_first_date}
+                                """,
+                                fetch_one=False,
+                                fetch_all=True)
+
+    def get_attached_databases(self) -> dict:
+        """
+        List the databases attached to the connection.
+            :return: A dictionary mapping each schema name to its file path.
+        """
+        rows = self.execute_query(query="PRAGMA database_list", fetch_all=True)
+        return {row[1]: row[2] for row in rows}
+
+    def attach_archive(self, path: str, alias: str):
+        """
+        Attach an archive database, creating its tables if the file is new.
+        ATTACH cannot run inside a transaction.
+            :param path: Path of the archive file.
+            :param alias: Schema name of the archive, e.g. archive_alias(period).
+        """
+        self._ensure_connected()
+        self._check_alias(alias)
+        if alias in self.get_attached_databases():
+            return
+        with self._write_lock:
+            self.conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+            with self.conn:
+                # Same columns as the hot tables; foreign keys cannot point to another database file.
+                self.conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {alias}.{self.tablename}
+                    (
+                        {self._field_id} INTEGER PRIMARY KEY NOT NULL,
+                        {self._field_customer_id} INTEGER NOT NULL,
+                        {self._field_date} DATETIME NOT NULL,
+                        {self._field_billing_address} NVARCHAR(70),
+                        {self._field_billing_city} NVARCHAR(40),
+                        {self._field_billing_state} NVARCHAR(40),
+                        {self._field_billing_country} NVARCHAR(40),
+                        {self._field_billing_postal_code} NVARCHAR(10),
+                        {self._field_total} NUMERIC(10,2) NOT NULL
+                    )""")
+                self.conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {alias}.{self.tablename_items}
+                    (
+                        {self._field_line_id} INTEGER PRIMARY KEY NOT NULL,
+                        {self._field_id} INTEGER NOT NULL,
+                        {self._field_track_id} INTEGER NOT NULL,
+                        {self._field_unit_price} NUMERIC(10,2) NOT NULL,
+                        {self._field_quantity} INTEGER NOT NULL
+                    )""")
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {alias}.IX_InvoiceDate ON {self.tablename} ({self._field_date})")
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {alias}.IX_InvoiceCustomerId ON {self.tablename} ({self._field_customer_id})")
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {alias}.IX_InvoiceLineInvoiceId ON {self.tablename_items} ({self._field_id})")
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Attached archive '{path}' as {alias}.")
+
+    def detach_archive(self, alias: str):
+        """
+        Detach an archive database; does nothing if it is not attached.
+            :param alias: Schema name of the archive.
+        """
+        self._ensure_connected()
+        self._check_alias(alias)
+        if alias not in self.get_attached_databases():
+            return
+        with self._write_lock:
+            self.conn.execute(f"DETACH DATABASE {alias}")
+
+    def get_archivable_periods(self, cutoff: str, period_format: str):
+        """
+        Group the hot invoices older than a cutoff by archive period.
+            :param cutoff: Invoices dated strictly before this 'YYYY-MM-DD[ HH:MM:SS]' are archivable.
+            :param period_format: strftime format of the period key, e.g. '%Y'.
+            :return: A list of rows with the Period and InvoiceCount columns, oldest first.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                SELECT strftime(?, {self._field_date}) AS {self._field_period},
+                                       COUNT(*) AS {self._field_invoice_count}
+                                FROM main.{self.tablename}
+                                WHERE {self._field_date} < ?
+                                GROUP BY {self._field_period}
+                                ORDER BY {self._field_period}
+                                """,
+                                params=(period_format, cutoff),
+                                fetch_one=False,
+                                fetch_all=True)
+
+    def archive_batch(self, alias: str, path: str, period: str, start: str, end: str, batch_size: int):
+        """
+        Move one batch of hot invoices dated in [start, end), with their lines, to an attached archive.
+        Copying, deleting from the hot tables and updating the manifest happen in one transaction.
+        Rows are copied with INSERT OR REPLACE, so a batch interrupted between the two database files
+        (possible in WAL mode, where commits are atomic per file only) is simply moved again.
+        The moved lines keep their revenue in the sales summaries (see SalesAnalyticsDao.set_archiving).
+            :param alias: Schema name of the attached archive.
+            :param path: Path of the archive file, recorded in the manifest.
+            :param period: Period key of the archive.
+            :param start: First date of the batch (inclusive).
+            :param end: Last date of the batch (exclusive).
+            :param batch_size: Maximum number of invoices moved.
+            :return: A tuple (invoices, lines) moved, (0, 0) when nothing is left in the range,
+                     or None if the database stayed locked.
+        """
+        from db.dao.impl.SalesAnalyticsDao import SalesAnalyticsDao # It imports InvoiceDao
+        self._check_alias(alias)
+        columns = ", ".join(self._columns)
+        item_columns = ", ".join(self._item_columns)
+        batch_ids = f"""SELECT {self._field_id} FROM main.{self.tablename}
+                        WHERE {self._field_date} >= ? AND {self._field_date} < ?
+                        ORDER BY {self._field_id} LIMIT ?"""
+        params = (start, end, batch_size)
+
+        def work(conn):
+            summary = conn.execute(f"""
+                SELECT COUNT(*), MIN({self._field_date}), MAX({self._field_date}), MIN({self._field_id}), MAX({self._field_id})
+                FROM main.{self.tablename} WHERE {self._field_id} IN ({batch_ids})""", params).fetchone()
+            invoices, first_date, last_date, first_id, last_id = tuple(summary)
+            if invoices == 0:
+                return 0, 0
+            conn.execute(f"""
+                INSERT OR REPLACE INTO {alias}.{self.tablename} ({columns})
+                SELECT {columns} FROM main.{self.tablename} WHERE {self._field_id} IN ({batch_ids})""", params)
+            cursor = conn.execute(f"""
+                INSERT OR REPLACE INTO {alias}.{self.tablename_items} ({item_columns})
+                SELECT {item_columns} FROM main.{self.tablename_items} WHERE {self._field_id} IN ({batch_ids})""", params)
+            lines = cursor.rowcount
+            SalesAnalyticsDao.set_archiving(conn, True)
+            conn.execute(f"DELETE FROM main.{self.tablename_items} WHERE {self._field_id} IN ({batch_ids})", params)
+            SalesAnalyticsDao.set_archiving(conn, False)
+            conn.execute(f"DELETE FROM main.{self.tablename} WHERE {self._field_id} IN ({batch_ids})", params)
+            conn.execute(f"""
+                INSERT INTO main.{self.tablename_archives}
+                    ({self._field_period}, {self._field_path}, {self._field_first_date}, {self._field_last_date},
+                     {self._field_first_id}, {self._field_last_id}, {self._field_invoice_count}, {self._field_line_count},
+                     {self._field_archived_at})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                ON CONFLICT({self._field_period}) DO UPDATE SET
+                    {self._field_path} = excluded.{self._field_path},
+                    {self._field_first_date} = MIN({self._field_first_date}, excluded.{self._field_first_date}),
+                    {self._field_last_date} = MAX({self._field_last_date}, excluded.{self._field_last_date}),
+                    {self._field_first_id} = MIN({self._field_first_id}, excluded.{self._field_first_id}),
+                    {self._field_last_id} = MAX({self._field_last_id}, excluded.{self._field_last_id}),
+                    {self._field_invoice_count} = {self._field_invoice_count} + excluded.{self._field_invoice_count},
+                    {self._field_line_count} = {self._field_line_count} + excluded.{self._field_line_count},
+                    {self._field_archived_at} = excluded.{self._field_archived_at}""",
+                (period, path, first_date, last_date, first_id, last_id, invoices, lines))
+            return invoices, lines
+        return self._execute_transaction_with_retry(work)
+
+    def _select_invoices(self, schema: str, where_clause: str) -> str:
+        return f"""SELECT {", ".join(self._columns)}, '{schema}' AS {self._field_source}
+                   FROM {schema}.{self.tablename} {where_clause}"""
+
+    def get_invoices_by_ids(self, invoice_ids: list, schema: str = "main") -> dict:
+        """
+        Retrieve several invoices of one database by their IDs in chunked queries.
+            :param invoice_ids: The IDs of the invoices to retrieve.
+            :param schema: 'main' for the hot database, or the alias of an attached archive.
+            :return: A dictionary mapping each found ID to its row.
+        """
+        if schema != "main":
+            self._check_alias(schema)
+        return self._get_many_by_ids(f"{schema}.{self.tablename}", self._field_id, self._columns, invoice_ids)
+
+    def get_invoices_by_date_range(self, schemas: list, start: str = None, end: str = None, customer_id: int = None):
+        """
+        Retrieve the invoices dated in [start, end) from the hot database and/or attached archives,
+        in one UNION ALL statement.
+            :param schemas: 'main' and/or aliases of attached archives.
+            :param start: First date (inclusive), or None for no lower bound.
+            :param end: Last date (exclusive), or None for no upper bound.
+            :param customer_id: Restrict to one customer, or None for every customer.
+            :return: A list of rows ordered by date and ID, with a Source column naming the schema.
+        """
+        conditions = []
+        branch_params = []
+        if start is not None:
+            conditions.append(f"{self._field_date} >= ?")
+            branch_params.append(start)
+        if end is not None:
+            conditions.append(f"{self._field_date} < ?")
+            branch_params.append(end)
+        if customer_id is not None:
+            conditions.append(f"{self._field_customer_id} = ?")
+            branch_params.append(customer_id)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        branches = []
+        for schema in schemas:
+            if schema != "main":
+                self._check_alias(schema)
+            branches.append(self._select_invoices(schema, where_clause))
+        query = " UNION ALL ".join(branches) + f" ORDER BY {self._field_date}, {self._field_id}"
+        return self.execute_query(query=query, params=tuple(branch_params) * len(branches),
+                                  fetch_one=False, fetch_all=True)
+
+    def iter_items_after(self, after_rowid: int = 0, columns=_item_columns, batch_size: int = 1000):
+        """
+        Stream the invoice lines of the hot database added after a rowid watermark, in rowid order.
+            :param after_rowid: Only lines with a greater rowid are read (0 for every line).
+            :param columns: Columns to read, among _item_columns.
+            :param batch_size: Number of rows fetched at a time.
+            :return: A generator of rows: the rowid followed by the requested columns.
+        """
+        return self.iter_after_rowid(self.tablename_items, self._item_columns, columns,
+                                     after_rowid=after_rowid, batch_size=batch_size)
+
+    def get_max_item_rowid(self) -> int:
+        """
+        Get the largest rowid of the invoice lines of the hot database, or 0 if there are none.
+        """
+        return self.get_max_rowid(self.tablename_items)
+
+    def get_invoice_items(self, invoice_id: int, schema: str = "main"):
+        """
+        Retrieve the lines of an invoice.
+            :param invoice_id: The ID of the invoice.
+            :param schema: 'main' for the hot database, or the alias of an attached archive.
+            :return: A list of rows ordered by line ID.
+        """
+        if schema != "main":
+            self._check_alias(schema)
+        return self.execute_query(query=
+                                  f"""
+                                SELECT {", ".join(self._item_columns)}
+                                FROM {schema}.{self.tablename_items}
+                                WHERE {self._field_id} = ?
+                                ORDER BY {self._field_line_id}
+                                """,
+                                params=(invoice_id,),
+                                fetch_one=False,
+                                fetch_all=True)
@@ -0,0 +1,450 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import os
+import sqlite3
+from db.dao.SQLiteDao import SQLiteDao
+from db.dao.impl.InvoiceDao import InvoiceDao
+
+class SalesAnalyticsDao(SQLiteDao):
+    """
+    SalesAnalyticsDao manages materialized sales summary tables.
+    Revenue per artist, genre, customer country and month is kept in small
+    summary tables that are maintained incrementally by triggers on
+    invoice_items and invoices, so reading them never joins
+    invoices -> invoice_items -> tracks -> albums -> artists. Triggers on tracks
+    (GenreId, AlbumId) and albums (ArtistId) move the revenue of reassigned lines.
+    Invoice lines moved to an archive keep their revenue: archive batches set the
+    Archiving flag of the state row, which the delete trigger checks, and
+    rebuild_summaries() reads the archives listed in the manifest.
+    """
+
+    tablename_state = "sales_summary_state"
+    _field_revenue = "Revenue"
+    _field_quantity = "Quantity"
+    _field_line_count = "LineCount"
+    _field_rebuilt_at = "RebuiltAt"
+    _field_last_change_at = "LastChangeAt"
+    _field_tracked_lines = "TrackedLines"
+    _field_archiving = "Archiving"
+    _field_needs_rebuild = "NeedsRebuild"
+
+    # Columns added to the state table after its first release, with their definitions
+    _added_state_columns = {
+        _field_archiving: "INTEGER NOT NULL DEFAULT 0",
+        _field_needs_rebuild: "INTEGER NOT NULL DEFAULT 0",
+    }
+
+    # Temporary table collecting the lines of the archives during a rebuild
+    tablename_archived_lines = "sales_archived_lines"
+
+    # Key expressions are written against an invoice_items row alias ('{r}').
+    # Dimensions that only depend on the invoice also define 'invoice_key',
+    # written against an invoices row alias ('{inv}'), used when an invoice moves.
+    _dimensions = {
+        "artist": {
+            "tablename": "sales_by_artist",
+            "key": "ArtistId",
+            "key_type": "INTEGER",
+            "item_key": "(SELECT COALESCE(al.ArtistId, 0) FROM tracks t LEFT JOIN albums al ON al.AlbumId = t.AlbumId WHERE t.TrackId = {r}.TrackId)",
+        },
+        "genre": {
+            "tablename": "sales_by_genre",
+            "key": "GenreId",
+            "key_type": "INTEGER",
+            "item_key": "(SELECT COALESCE(t.GenreId, 0) FROM tracks t WHERE t.TrackId = {r}.TrackId)",
+        },
+        "country": {
+            "tablename": "sales_by_country",
+            "key": "Country",
+            "key_type": "TEXT",
+            "invoice_key": "COALESCE({inv}.BillingCountry, '')",
+        },
+        "month": {
+            "tablename": "sales_by_month",
+            "key": "Month",
+            "key_type": "TEXT",
+            "invoice_key": "strftime('%Y-%m', {inv}.InvoiceDate)",
+        },
+    }
+
+    _trigger_names = (
+        "trg_sales_summary_item_insert",
+        "trg_sales_summary_item_delete",
+        "trg_sales_summary_item_update",
+        "trg_sales_summary_invoice_update",
+        "trg_sales_summary_track_update",
+        "trg_sales_summary_album_update",
+    )
+
+    def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
+        """
+        Initialize the DAO with a database connection.
+            :param connection: SQLite connection object. If None, ensure to set it before use.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        super().__init__(connection=connection, verbose=verbose)
+
+    def _item_key(self, dimension: str, row_alias: str, schema: str = None) -> str:
+        """Build the SQL expression computing a dimension key from an invoice_items row.
+            :param schema: Schema holding the invoice of the row (an attached archive), or None for the default.
+        """
+        spec = self._dimensions[dimension]
+        if "item_key" in spec:
+            return spec["item_key"].format(r=row_alias)
+        invoice_key = spec["invoice_key"].format(inv="inv")
+        invoices = f"{schema}.invoices" if schema else "invoices"
+        return f"(SELECT {invoice_key} FROM {invoices} inv WHERE inv.InvoiceId = {row_alias}.InvoiceId)"
+
+    def _apply_line_sql(self, dimension: str, row_alias: str, sign: str) -> str:
+        """Build the upsert that adds (sign='+') or removes (sign='-') one invoice line from a summary."""
+        spec = self._dimensions[dimension]
+        return f"""
+            INSERT INTO {spec['tablename']} ({spec['key']}, {self._field_revenue}, {self._field_quantity}, {self._field_line_count})
+            VALUES ({self._item_key(dimension, row_alias)},
+                    {sign}{row_alias}.UnitPrice * {row_alias}.Quantity,
+                    {sign}{row_alias}.Quantity,
+                    {sign}1)
+            ON CONFLICT({spec['key']}) DO UPDATE SET
+                {self._field_revenue} = {self._field_revenue} + excluded.{self._field_revenue},
+                {self._field_quantity} = {self._field_quantity} + excluded.{self._field_quantity},
+                {self._field_line_count} = {self._field_line_count} + excluded.{self._field_line_count};"""
+
+    def _move_invoice_sql(self, dimension: str) -> str:
+        """Build the statements moving every line of an invoice from its OLD key to its NEW key."""
+        spec = self._dimensions[dimension]
+        return self._move_lines_sql(dimension, "InvoiceId = NEW.InvoiceId",
+                                    spec['invoice_key'].format(inv='OLD'), spec['invoice_key'].format(inv='NEW'))
+
+    def _move_lines_sql(self, dimension: str, lines_where: str, old_key: str, new_key: str) -> str:
+        """Build the statements moving the invoice lines matching 'lines_where' from old_key to new_key."""
+        spec = self._dimensions[dimension]
+        revenue = f"(SELECT COALESCE(SUM(UnitPrice * Quantity), 0) FROM invoice_items WHERE {lines_where})"
+        quantity = f"(SELECT COALESCE(SUM(Quantity), 0) FROM invoice_items WHERE {lines_where})"
+        line_count = f"(SELECT COUNT(*) FROM invoice_items WHERE {lines_where})"
+        return f"""
+            UPDATE {spec['tablename']} SET
+                {self._field_revenue} = {self._field_revenue} - {revenue},
+                {self._field_quantity} = {self._field_quantity} - {quantity},
+                {self._field_line_count} = {self._field_line_count} - {line_count}
+            WHERE {spec['key']} = {old_key};
+            INSERT INTO {spec['tablename']} ({spec['key']}, {self._field_revenue}, {self._field_quantity}, {self._field_line_count})
+            SELECT {new_key}, {revenue}, {quantity}, {line_count} WHERE 1
+            ON CONFLICT({spec['key']}) DO UPDATE SET
+                {self._field_revenue} = {self._field_revenue} + excluded.{self._field_revenue},
+                {self._field_quantity} = {self._field_quantity} + excluded.{self._field_quantity},
+                {self._field_line_count} = {self._field_line_count} + excluded.{self._field_line_count};"""
+
+    def _reassigned_sql(self) -> str:
+        """Build the statement recording a reassignment: archived lines cannot be moved by a trigger,
+        so when some exist (more lines tracked than hot lines) the summaries need a rebuild."""
+        return f"""
+            UPDATE {self.tablename_state}
+            SET {self._field_needs_rebuild} = 1
+            WHERE {self._field_tracked_lines} != (SELECT COUNT(*) FROM invoice_items);"""
+
+    def _state_sql(self, delta: str) -> str:
+        """Build the statement recording a change in the summary state row."""
+        return f"""
+            UPDATE {self.tablename_state}
+            SET {self._field_tracked_lines} = {self._field_tracked_lines} + ({delta}),
+                {self._field_last_change_at} = datetime('now');"""
+
+    @classmethod
+    def set_archiving(cls, conn, archiving: bool):
+        """
+        Flag archival moves inside the current transaction of 'conn': invoice lines deleted while
+        the flag is set keep their revenue in the summaries. Does nothing if the summaries are not installed.
+            :param conn: Connection running the archive transaction.
+            :param archiving: True before deleting the archived lines, False once they are deleted.
+        """
+        columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({cls.tablename_state})").fetchall()]
+        if not columns:
+            return
+        if cls._field_archiving not in columns:
+            raise Exception(f"{cls.__name__}::The sales summaries predate archiving: call create_summary_tables() "
+                            f"before archiving, or the archived revenue would leave them.")
+        conn.execute(f"UPDATE main.{cls.tablename_state} SET {cls._field_archiving} = ? WHERE Id = 1", (int(archiving),))
+
+    def is_table_exist(self):
+        """
+        Check if the summary state table exists in the database.
+            :return: True if the summary tables have been created, False otherwise.
+        """
+        return super().is_table_exist(self.tablename_state)
+
+    def are_triggers_installed(self) -> bool:
+        """
+        Check that every maintenance trigger is present.
+            :return: True if all summary triggers exist, False otherwise.
+        """
+        placeholders = ", ".join("?" for _ in self._trigger_names)
+        row = self.execute_query(query=f"""
+                                SELECT COUNT(*) AS n FROM sqlite_master
+                                WHERE type = 'trigger' AND name IN ({placeholders})
+                                """,
+                                params=self._trigger_names,
+                                fetch_one=True)
+        return row[0] == len(self._trigger_names)
+
+    def create_summary_tables(self):
+        """
+        Create the summary tables, the state row and the maintenance triggers if they do not exist.
+        The summaries are empty until rebuild_summaries() is called.
+        """
+        self._ensure_connected()
+        statements = []
+        for spec in self._dimensions.values():
+            statements.append(f"""
+                CREATE TABLE IF NOT EXISTS {spec['tablename']}
+                (
+                    {spec['key']} {spec['key_type']} PRIMARY KEY NOT NULL,
+                    {self._field_revenue} REAL NOT NULL DEFAULT 0,
+                    {self._field_quantity} INTEGER NOT NULL DEFAULT 0,
+                    {self._field_line_count} INTEGER NOT NULL DEFAULT 0
+                )""")
+        statements.append(f"""
+                CREATE TABLE IF NOT EXISTS {self.tablename_state}
+                (
+                    Id INTEGER PRIMARY KEY CHECK (Id = 1),
+                    {self._field_rebuilt_at} TEXT,
+                    {self._field_last_change_at} TEXT,
+                    {self._field_tracked_lines} INTEGER NOT NULL DEFAULT 0,
+                    {self._field_archiving} INTEGER NOT NULL DEFAULT 0,
+                    {self._field_needs_rebuild} INTEGER NOT NULL DEFAULT 0
+                )""")
+        statements.append(f"INSERT OR IGNORE INTO {self.tablename_state} (Id) VALUES (1)")
+
+        with self._write_lock:
+            with self.conn:
+                for statement in statements:
+                    self.conn.execute(statement)
+                # State tables created by an older version lack the columns added since.
+                columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({self.tablename_state})").fetchall()]
+                for column, definition in self._added_state_columns.items():
+                    if column not in columns:
+                        self.conn.execute(f"ALTER TABLE {self.tablename_state} ADD COLUMN {column} {definition}")
+                # Triggers are replaced when their definition changed, e.g. by an upgrade.
+                installed = dict(self.conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall())
+                for name, sql in self._trigger_sql().items():
+                    if installed.get(name) != sql:
+                        self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                        self.conn.execute(sql)
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Summary tables and triggers are installed.")
+
+    def _trigger_sql(self) -> dict:
+        """CREATE TRIGGER statement of every maintenance trigger, as SQLite stores it in sqlite_master."""
+        insert_body = "".join(self._apply_line_sql(d, "NEW", "+") for d in self._dimensions)
+        delete_body = "".join(self._apply_line_sql(d, "OLD", "-") for d in self._dimensions)
+        move_body = "".join(self._move_invoice_sql(d) for d, s in self._dimensions.items() if "invoice_key" in s)
+        archiving = f"(SELECT {self._field_archiving} FROM {self.tablename_state} WHERE Id = 1)"
+        artist_of_album = "COALESCE((SELECT ArtistId FROM albums WHERE AlbumId = {album}), 0)"
+        track_body = (self._move_lines_sql("genre", "TrackId = NEW.TrackId", "COALESCE(OLD.GenreId, 0)",
+                                           "COALESCE(NEW.GenreId, 0)")
+                      + self._move_lines_sql("artist", "TrackId = NEW.TrackId", artist_of_album.format(album="OLD.AlbumId"),
+                                             artist_of_album.format(album="NEW.AlbumId")))
+        album_body = self._move_lines_sql("artist", "TrackId IN (SELECT TrackId FROM tracks WHERE AlbumId = NEW.AlbumId)",
+                                          "COALESCE(OLD.ArtistId, 0)", "COALESCE(NEW.ArtistId, 0)")
+        triggers = {
+            "trg_sales_summary_item_insert": f"""CREATE TRIGGER trg_sales_summary_item_insert
+                AFTER INSERT ON invoice_items
+                BEGIN {insert_body} {self._state_sql('1')}
+                END""",
+            # Lines deleted by an archive batch keep their revenue: they are still sales.
+            "trg_sales_summary_item_delete": f"""CREATE TRIGGER trg_sales_summary_item_delete
+                AFTER DELETE ON invoice_items
+                WHEN {archiving} IS NOT 1
+                BEGIN {delete_body} {self._state_sql('-1')}
+                END""",
+            "trg_sales_summary_item_update": f"""CREATE TRIGGER trg_sales_summary_item_update
+                AFTER UPDATE OF InvoiceId, TrackId, UnitPrice, Quantity ON invoice_items
+                BEGIN {delete_body} {insert_body} {self._state_sql('0')}
+                END""",
+            "trg_sales_summary_invoice_update": f"""CREATE TRIGGER trg_sales_summary_invoice_update
+                AFTER UPDATE OF BillingCountry, InvoiceDate ON invoices
+                WHEN OLD.BillingCountry IS NOT NEW.BillingCountry OR OLD.InvoiceDate IS NOT NEW.InvoiceDate
+                BEGIN {move_body} {self._state_sql('0')}
+                END""",
+            "trg_sales_summary_track_update": f"""CREATE TRIGGER trg_sales_summary_track_update
+                AFTER UPDATE OF GenreId, AlbumId ON tracks
+                WHEN OLD.GenreId IS NOT NEW.GenreId OR OLD.AlbumId IS NOT NEW.AlbumId
+                BEGIN {track_body} {self._reassigned_sql()} {self._state_sql('0')}
+                END""",
+            "trg_sales_summary_album_update": f"""CREATE TRIGGER trg_sales_summary_album_update
+                AFTER UPDATE OF ArtistId ON albums
+                WHEN OLD.ArtistId IS NOT NEW.ArtistId
+                BEGIN {album_body} {self._reassigned_sql()} {self._state_sql('0')}
+                END""",
+        }
+        return triggers
+
+    def drop_summary_tables(self):
+        """
+        Drop the maintenance triggers and every summary table.
+        """
+        self._ensure_connected()
+        with self._write_lock:
+            with self.conn:
+                for trigger in self._trigger_names:
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                for spec in self._dimensions.values():
+                    self.conn.execute(f"DROP TABLE IF EXISTS {spec['tablename']}")
+                self.conn.execute(f"DROP TABLE IF EXISTS {self.tablename_state}")
+
+    def _collect_archived_lines(self) -> int:
+        """
+        Aggregate the lines of every archive of the manifest into a temporary table, one archive
+        attached at a time (ATTACH cannot run inside the rebuild transaction).
+            :return: The number of archived lines collected.
+        """
+        invoice_dao = InvoiceDao(connection=self.conn, verbose=self.verbose)
+        archives = invoice_dao.get_archives()
+        with self._write_lock:
+            with self.conn:
+                self.conn.execute(f"""
+                    CREATE TEMP TABLE IF NOT EXISTS {self.tablename_archived_lines}
+                    (Dimension TEXT NOT NULL, SummaryKey, {self._field_revenue} REAL, {self._field_quantity} INTEGER,
+                     {self._field_line_count} INTEGER)""")
+                self.conn.execute(f"DELETE FROM temp.{self.tablename_archived_lines}")
+        lines = 0
+        for archive in archives:
+            path = archive[InvoiceDao._field_path]
+            if not os.path.exists(path):
+                # The rebuild would silently drop the archived revenue.
+                raise Exception(f"{self.__class__.__name__}::Invoice archive '{path}' is missing.")
+            alias = InvoiceDao.archive_alias(archive[InvoiceDao._field_period])
+            invoice_dao.attach_archive(path, alias)
+            try:
+                with self._write_lock:
+                    with self.conn:
+                        for dimension in self._dimensions:
+                            cursor = self.conn.execute(f"""
+                                INSERT INTO temp.{self.tablename_archived_lines}
+                                SELECT ?, {self._item_key(dimension, 'ii', schema=alias)} AS k,
+                                       SUM(ii.UnitPrice * ii.Quantity), SUM(ii.Quantity), COUNT(*)
+                                FROM {alias}.invoice_items ii
+                                GROUP BY k""", (dimension,))
+                            cursor.close()
+                        lines += self.conn.execute(f"SELECT COUNT(*) FROM {alias}.invoice_items").fetchone()[0]
+            finally:
+                invoice_dao.detach_archive(alias)
+        return lines
+
+    def rebuild_summaries(self) -> int:
+        """
+        Recompute every summary table from invoice_items and the invoice archives of the manifest,
+        replacing the summaries in a single transaction.
+            :return: The number of invoice lines aggregated.
+        """
+        self._ensure_connected()
+        archived_lines = self._collect_archived_lines()
+        with self._write_lock:
+            with self.conn:
+                for dimension, spec in self._dimensions.items():
+                    self.conn.execute(f"DELETE FROM {spec['tablename']}")
+                    self.conn.execute(f"""
+                        INSERT INTO {spec['tablename']} ({spec['key']}, {self._field_revenue}, {self._field_quantity}, {self._field_line_count})
+                        SELECT {self._item_key(dimension, 'ii')} AS k,
+                               SUM(ii.UnitPrice * ii.Quantity),
+                               SUM(ii.Quantity),
+                               COUNT(*)
+                        FROM invoice_items ii
+                        GROUP BY k""")
+                    self.conn.execute(f"""
+                        INSERT INTO {spec['tablename']} ({spec['key']}, {self._field_revenue}, {self._field_quantity}, {self._field_line_count})
+                        SELECT SummaryKey, SUM({self._field_revenue}), SUM({self._field_quantity}), SUM({self._field_line_count})
+                        FROM temp.{self.tablename_archived_lines}
+                        WHERE Dimension = ?
+                        GROUP BY SummaryKey
+                        ON CONFLICT({spec['key']}) DO UPDATE SET
+                            {self._field_revenue} = {self._field_revenue} + excluded.{self._field_revenue},
+                            {self._field_quantity} = {self._field_quantity} + excluded.{self._field_quantity},
+                            {self._field_line_count} = {self._field_line_count} + excluded.{self._field_line_count}""",
+                        (dimension,))
+                self.conn.execute(f"DELETE FROM temp.{self.tablename_archived_lines}")
+                cursor = self.conn.execute(f"""
+                    UPDATE {self.tablename_state}
+                    SET {self._field_tracked_lines} = (SELECT COUNT(*) FROM invoice_items) + ?,
+                        {self._field_needs_rebuild} = 0,
+                        {self._field_rebuilt_at} = datetime('now'),
+                        {self._field_last_change_at} = datetime('now')
+                    RETURNING {self._field_tracked_lines}""", (archived_lines,))
+                tracked_lines = cursor.fetchone()[0]
+                cursor.close()
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Summaries rebuilt from {tracked_lines} invoice lines.")
+        return tracked_lines
+
+    def get_summary(self, dimension: str, limit: int = None, order_by_revenue: bool = True):
+        """
+        Retrieve the rows of one summary table.
+            :param dimension: One of 'artist', 'genre', 'country' or 'month'.
+            :param limit: Maximum number of rows to return, or None for all rows.
+            :param order_by_revenue: If True, order by revenue descending, otherwise by key.
+            :return: A list of rows with the key, Revenue, Quantity and LineCount columns.
+        """
+        if dimension not in self._dimensions:
+            raise ValueError(f"{self.__class__.__name__}::Unknown summary dimension '{dimension}'.")
+        spec = self._dimensions[dimension]
+        order = f"{self._field_revenue} DESC" if order_by_revenue else spec['key']
+        params = ()
+        limit_clause = ""
+        if limit is not None:
+            limit_clause = "LIMIT ?"
+            params = (limit,)
+        return self.execute_query(query=
+                                 f"""
+                                SELECT {spec['key']} AS SummaryKey,
+                                       ROUND({self._field_revenue}, 2) AS {self._field_revenue},
+                                       {self._field_quantity}, {self._field_line_count}
+                                FROM {spec['tablename']}
+                                WHERE {self._field_line_count} > 0
+                                ORDER BY {order}
+                                {limit_clause}
+                                """,
+                                params=params,
+                                fetch_one=False,
+                                fetch_all=True)
+
+    def get_staleness(self):
+        """
+        Report how fresh the summaries are.
+        The summaries are stale when the triggers are missing or when invoice lines were
+        written while the triggers were not installed (tracked count differs from the source).
+        Source lines are the hot lines plus the archived lines recorded in the manifest.
+        They are also stale when a track or album was reassigned while archived lines exist,
+        since the triggers only move the revenue of the hot lines.
+            :return: A dictionary with rebuilt_at, last_change_at, tracked_lines, source_lines,
+                     triggers_installed, needs_rebuild and is_stale keys.
+        """
+        if not self.is_table_exist():
+            return {"rebuilt_at": None, "last_change_at": None, "tracked_lines": 0,
+                    "source_lines": None, "triggers_installed": False, "needs_rebuild": True, "is_stale": True}
+        state = self.execute_query(query=
+                                   f"""
+                                SELECT *, (SELECT COUNT(*) FROM invoice_items) AS SourceLines
+                                FROM {self.tablename_state}
+                                WHERE Id = 1
+                                """,
+                                fetch_one=True)
+        triggers_installed = self.are_triggers_installed()
+        # Missing in state tables not upgraded by create_summary_tables() yet
+        needs_rebuild = bool(state[self._field_needs_rebuild]) if self._field_needs_rebuild in state.keys() else False
+        source_lines = state["SourceLines"] + sum(archive[InvoiceDao._field_line_count]
+                                                  for archive in InvoiceDao(connection=self.conn).get_archives())
+        return {
+            "rebuilt_at": state[self._field_rebuilt_at],
+            "last_change_at": state[self._field_last_change_at],
+            "tracked_lines": state[self._field_tracked_lines],
+            "source_lines": source_lines,
+            "triggers_installed": triggers_installed,
+            "needs_rebuild": needs_rebuild,
+            "is_stale": (not triggers_installed
+                         or needs_rebuild
+                         or state[self._field_rebuilt_at] is None
+                         or state[self._field_tracked_lines] != source_lines),
+        }
@@ -0,0 +1,87 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import sqlite3
+from db.dao.SQLiteDao import SQLiteDao
+
+class TrackDao(SQLiteDao):
+    """
+    TrackDao reads tracks.
+    """
+
+    tablename = "tracks"
+
+    _field_id = "TrackId"
+    _field_name = "Name"
+    _field_album_id = "AlbumId"
+    _field_composer = "Composer"
+    _columns = (_field_id, _field_name, _field_album_id, _field_composer)
+
+    # Numeric columns, read by the analytics snapshots
+    _field_media_type_id = "MediaTypeId"
+    _field_genre_id = "GenreId"
+    _field_milliseconds = "Milliseconds"
+    _field_bytes = "Bytes"
+    _field_unit_price = "UnitPrice"
+    _numeric_columns = (_field_id, _field_album_id, _field_media_type_id, _field_genre_id, _field_milliseconds,
+                        _field_bytes, _field_unit_price)
+
+    def __init__(self,connection: sqlite3.Connection = None,verbose: bool = False):
+        """
+        Initialize the DAO with a database connection.
+            :param connection: SQLite connection object. If None, ensure to set it before use.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        super().__init__(connection=connection, verbose=verbose)
+
+    def is_table_exist(self):
+        """
+        Check if the tracks table exists in the database.
+            :return: True if the table exists, False otherwise.
+        """
+        return super().is_table_exist(self.tablename)
+
+    def get_track_by_id(self, track_id: int):
+        """
+        Retrieve a track by ID.
+            :param track_id: The ID of the track to retrieve.
+            :return: A row with the TrackId, Name, AlbumId and Composer columns, or None if not found.
+        """
+        return self.execute_query(query=
+                                  f"""
+                                SELECT {", ".join(self._columns)}
+                                FROM {self.tablename}
+                                WHERE {self._field_id} = ?
+                                """,
+                                params=(track_id,),
+                                fetch_one=True,
+                                fetch_all=False)
+
+    def iter_track_names(self, batch_size: int = 1000):
+        """
+        Stream the ID and name of every track, fetching them from SQLite in batches.
+            :param batch_size: Number of rows fetched at a time.
+            :return: A generator of rows with the TrackId and Name columns.
+        """
+        return self.iter_query(f"SELECT {self._field_id}, {self._field_name} FROM {self.tablename}",
+                               batch_size=batch_size)
+
+    def iter_tracks_after(self, after_rowid: int = 0, columns=_numeric_columns, batch_size: int = 1000):
+        """
+        Stream the tracks added after a rowid watermark, in rowid order.
+            :param after_rowid: Only tracks with a greater rowid are read (0 for every track).
+            :param columns: Columns to read, among _columns and _numeric_columns.
+            :param batch_size: Number of rows fetched at a time.
+            :return: A generator of rows: the rowid followed by the requested columns.
+        """
+        return self.iter_after_rowid(self.tablename, self._columns + self._numeric_columns, columns,
+                                     after_rowid=after_rowid, batch_size=batch_size)
+
+    def get_max_track_rowid(self) -> int:
+        """
+        Get the largest rowid of the tracks table, or 0 if it is empty.
+        """
+        return self.get_max_rowid(self.tablename)
@@ -1,6 +1,20 @@
 from db.factories.IDbFactory import IDbFactory
+from db.dao.QueryGuard import QueryGuard
+from db.dao.AdmissionController import AdmissionController
+from db.connection.IDbConnectionProvider import IDbConnectionProvider
 from db.connection.impl.SQLiteConnectionProvider import SQLiteConnectionProvider
+from db.connection.impl.SQLiteReplicaConnectionProvider import SQLiteReplicaConnectionProvider
+from db.services.BackupService import BackupService
+from db.services.MaintenanceService import MaintenanceService
+from db.services.InvoiceArchiver import InvoiceArchiver
 from db.dao.impl.ArtistDao import ArtistDao
+from db.migrations.MigrationRunner import MigrationRunner
+from db.migrations.SQLiteMigrations import MIGRATIONS
+from db.dao.impl.SalesAnalyticsDao import SalesAnalyticsDao
+from db.dao.impl.InvoiceDao import InvoiceDao
+from db.dao.impl.EmployeeDao import EmployeeDao
+from db.dao.impl.CustomerDao import CustomerDao
+import weakref
 # Import other DAOs as needed
 
 class SQLiteDbFactory(IDbFactory):
@@ -10,36 +24,125 @@ class SQLiteDbFactory(IDbFactory):
     and perform business logic operations related to the database.
     This factory is designed to be used in a music database application, managing entities like artists, ..."""
 
-    def __init__(self, database_path: str, verbose: bool = False):
+    def __init__(self, database_path: str, verbose: bool = False, in_memory_replica: bool = False,
+                 query_timeout: float = None, connection_provider: IDbConnectionProvider = None,
+                 admission: AdmissionController = None):
         """
         Initializes the SQLiteDbFactory with the database path and verbosity level.
             :param database_path: Path to the SQLite database file.
             :param verbose: If True, enables verbose logging for debugging.
+            :param in_memory_replica: If True, load the database into memory and serve reads from it,
+                                      writing through to the file.
+            :param query_timeout: Default deadline, in seconds, of the DAO queries run on this factory's connections.
+            :param connection_provider: Provider to get connections from instead of opening the file directly,
+                                        e.g. TenantConnectionProvider.for_tenant(); in_memory_replica is then ignored.
+            :param admission: Admission controller queueing the DAO work run on this factory's connections;
+                              share one instance between factories of the same database.
         """
         super().__init__(database_path, verbose)
-        self._connection_provider = SQLiteConnectionProvider(database_path)
+        self.query_timeout = query_timeout
+        self.admission = admission
+        # Connections handed out, so cancel_running_queries() can reach them; closed ones drop out.
+        self._connections = weakref.WeakSet()
+        self._maintenance = None
+        if connection_provider is not None:
+            self._connection_provider = connection_provider
+        elif in_memory_replica:
+            self._connection_provider = SQLiteReplicaConnectionProvider(database_path, verbose=verbose)
+        else:
+            self._connection_provider = SQLiteConnectionProvider(database_path)
         self.initialize_database_tables()
 
+    def _file_connection_provider(self) -> IDbConnectionProvider:
+        """Provider of connections to the database file itself: this factory's provider (e.g. a tenant
+        pool, whose connection cap then applies), except for an in-memory replica."""
+        if isinstance(self._connection_provider, SQLiteReplicaConnectionProvider):
+            return SQLiteConnectionProvider(self.database_path)
+        return self._connection_provider
+
     def get_connection(self):
         """Provides a new SQLite connection."""
-        return self._connection_provider.get_connection()
+        conn = self._connection_provider.get_connection()
+        conn.default_query_timeout = self.query_timeout
+        conn.admission_controller = self.admission
+        self._connections.add(conn)
+        return conn
+
+    def cancel_running_queries(self) -> int:
+        """Cancel the DAO queries running on every connection provided by this factory.
+            They raise QueryTimeoutError with cancelled=True; the connections stay usable.
+            :return: The number of queries that were running.
+        """
+        return sum(QueryGuard.cancel(conn) for conn in list(self._connections))
 
     def initialize_database_tables(self):
-        """Ensures all required tables exist in the database."""
-        with self.get_connection() as conn:
-            # Initialize all your tables here
-            artist_dao = ArtistDao(connection=conn, verbose=self.verbose)
-            if not artist_dao.is_table_exist():
-                artist_dao.create_table_artist()  # Fix this method name
-            
-            # Add other table initializations
-            # album_dao = AlbumDao(connection=conn, verbose=self.verbose)
-            # track_dao = TrackDao(connection=conn, verbose=self.verbose)
-            # etc.
+        """Ensures the database schema is at the latest migration version.
+        When the schema is current this is a single PRAGMA user_version check,
+        and nothing at all once this process has checked the same database.
+        """
+        # Add new tables as migrations in db/migrations/SQLiteMigrations.py
+        MigrationRunner(self._connection_provider, self.database_path, MIGRATIONS,
+                        verbose=self.verbose).ensure_current()
+
+    def start_maintenance(self, check_interval: float = 30.0, **options) -> MaintenanceService:
+        """Start background maintenance (optimize/ANALYZE, WAL checkpoints, incremental vacuum,
+        integrity checks) of this factory's database.
+            :param check_interval: Seconds between two checks for due tasks.
+            :param options: MaintenanceService options (intervals, thresholds, maintenance_window, ...).
+            :return: The running MaintenanceService, e.g. to read its reports.
+        """
+        if self._maintenance is None:
+            # Maintenance works on the database file itself, never through an in-memory replica.
+            self._maintenance = MaintenanceService(self._file_connection_provider(),
+                                                   verbose=self.verbose, **options)
+            self._maintenance.start(check_interval)
+        return self._maintenance
+
+    def stop_maintenance(self, timeout: float = None):
+        """Stop background maintenance, waiting for a running task to finish.
+            :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        """
+        if self._maintenance is not None:
+            self._maintenance.stop(timeout)
+            self._maintenance = None
+
+    def get_backup_service(self, pages_per_step: int = 64, step_sleep: float = 0.005) -> BackupService:
+        """Get a BackupService taking online backups of this factory's database.
+            :param pages_per_step: Number of pages copied per backup step.
+            :param step_sleep: Seconds to sleep between steps.
+        """
+        return BackupService(self._connection_provider, pages_per_step=pages_per_step,
+                             step_sleep=step_sleep, verbose=self.verbose)
 
     def get_artist_dao(self):
         """Get a new instance of ArtistDao."""
         return ArtistDao(connection=self.get_connection(), verbose=self.verbose)
+
+    def get_sales_analytics_dao(self):
+        """Get a new instance of SalesAnalyticsDao.
+        The summary tables and their triggers are created if they do not exist yet.
+        """
+        analytics_dao = SalesAnalyticsDao(connection=self.get_connection(), verbose=self.verbose)
+        analytics_dao.create_summary_tables()
+        return analytics_dao
+
+    def get_employee_dao(self):
+        """Get a new instance of EmployeeDao."""
+        return EmployeeDao(connection=self.get_connection(), verbose=self.verbose)
+
+    def get_customer_dao(self):
+        """Get a new instance of CustomerDao."""
+        return CustomerDao(connection=self.get_connection(), verbose=self.verbose)
+
+    def get_invoice_dao(self):
+        """Get a new instance of InvoiceDao, on a connection to the database file
+        (archives are attached to it, which an in-memory replica cannot serve).
+        """
+        conn = self._file_connection_provider().get_connection()
+        conn.default_query_timeout = self.query_timeout
+        conn.admission_controller = self.admission
+        self._connections.add(conn)
+        return InvoiceDao(connection=conn, verbose=self.verbose)
     
 
     # Business logic methods for your domain
@@ -99,4 +202,28 @@ class SQLiteDbFactory(IDbFactory):
             return artist_dao.update(artist_id, artist_name)
     
 
+    def rebuild_sales_summaries(self):
+        """Fully rebuild the materialized sales summaries (revenue per artist, genre, country and month).
+            :return: The number of invoice lines aggregated.
+        """
+        with self.get_connection() as conn:
+            analytics_dao = SalesAnalyticsDao(connection=conn, verbose=self.verbose)
+            analytics_dao.create_summary_tables()
+            return analytics_dao.rebuild_summaries()
+
+    def archive_invoices(self, cutoff, archive_dir: str = None, period: str = "year",
+                         batch_size: int = 500, batch_pause: float = 0.0):
+        """Move the invoices dated before a cutoff, with their lines, into archive database files.
+            :param cutoff: A date, datetime or 'YYYY-MM-DD[ HH:MM:SS]' text.
+            :param archive_dir: Directory of the archive files, defaults to 'archive' next to the database.
+            :param period: 'year' or 'month': the range of invoice dates stored in one archive file.
+            :param batch_size: Number of invoices moved per transaction.
+            :param batch_pause: Seconds to sleep between two batches.
+            :return: The InvoiceArchiver report (invoices, lines, batches, archives, seconds, invoices_per_sec).
+        """
+        archiver = InvoiceArchiver(self._file_connection_provider(), archive_dir=archive_dir,
+                                   period=period, batch_size=batch_size, batch_pause=batch_pause,
+                                   verbose=self.verbose)
+        return archiver.archive_before(cutoff)
+
     # Add similar methods for other entities (albums, tracks, etc.)
\ No newline at end of file
@@ -1,44 +1,239 @@
 from db.factories.IDbFactory import IDbFactory
+from db.dao.QueryGuard import QueryGuard
+from db.dao.AdmissionController import AdmissionController
+from db.connection.IDbConnectionProvider import IDbConnectionProvider
 from db.connection.impl.SQLiteConnectionProvider import SQLiteConnectionProvider
+from db.connection.impl.SQLiteReplicaConnectionProvider import SQLiteReplicaConnectionProvider
+from db.services.BackupService import BackupService
+from db.services.MaintenanceService import MaintenanceService
+from db.services.InvoiceArchiver import InvoiceArchiver
+from db.services.AutocompleteService import AutocompleteService
+from db.services.ColumnarSnapshot import ColumnarSnapshot
 from db.repositories.impl.ArtistRepository import ArtistRepository
+from db.repositories.impl.WriteBehindArtistRepository import WriteBehindArtistRepository
+from db.repositories.impl.SalesAnalyticsRepository import SalesAnalyticsRepository
+from db.repositories.impl.ChangeLogRepository import ChangeLogRepository
+from db.repositories.impl.InvoiceRepository import InvoiceRepository
+from db.repositories.impl.EmployeeRepository import EmployeeRepository
 from db.dao.impl.ArtistDao import ArtistDao
+from db.dao.impl.AlbumDao import AlbumDao
+from db.dao.impl.TrackDao import TrackDao
+from db.migrations.MigrationRunner import MigrationRunner
+from db.migrations.SQLiteMigrations import MIGRATIONS
 from typing import Optional
+import weakref
 from db.models.Artist import Artist
 
 # Import other repositories as needed
 
 class SQLiteRepositoryFactory(IDbFactory):
 
+    # (table, primary key) of the entities whose changes are captured by enable_change_capture()
+    CAPTURED_ENTITIES = [
+        (ArtistDao.tablename, ArtistDao._field_id),
+        (AlbumDao.tablename, AlbumDao._field_id),
+        (TrackDao.tablename, TrackDao._field_id),
+    ]
 
-    def __init__(self, database_path: str, verbose: bool = False):
+    def __init__(self, database_path: str, verbose: bool = False, in_memory_replica: bool = False,
+                 query_timeout: float = None, connection_provider: IDbConnectionProvider = None,
+                 admission: AdmissionController = None):
         """
         Initializes the SQLiteDbFactory with the database path and verbosity level.
 
             :param database_path: Path to the SQLite database file.
             :param verbose: If True, enables verbose logging for debugging.
+            :param in_memory_replica: If True, load the database into memory and serve reads from it,
+                                      writing through to the file.
+            :param query_timeout: Default deadline, in seconds, of the DAO queries run on this factory's connections.
+            :param connection_provider: Provider to get connections from instead of opening the file directly,
+                                        e.g. TenantConnectionProvider.for_tenant(); in_memory_replica is then ignored.
+            :param admission: Admission controller queueing the DAO work run on this factory's connections;
+                              share one instance between factories of the same database.
         """
         super().__init__(database_path, verbose)
-        self._connection_provider = SQLiteConnectionProvider(database_path)
+        self.query_timeout = query_timeout
+        self.admission = admission
+        # Connections handed out, so cancel_running_queries() can reach them; closed ones drop out.
+        self._connections = weakref.WeakSet()
+        self._maintenance = None
+        self._autocomplete = None
+        if connection_provider is not None:
+            self._connection_provider = connection_provider
+        elif in_memory_replica:
+            self._connection_provider = SQLiteReplicaConnectionProvider(database_path, verbose=verbose)
+        else:
+            self._connection_provider = SQLiteConnectionProvider(database_path)
         self.initialize_database_tables()
 
+    def _file_connection_provider(self) -> IDbConnectionProvider:
+        """Provider of connections to the database file itself: this factory's provider (e.g. a tenant
+        pool, whose connection cap then applies), except for an in-memory replica."""
+        if isinstance(self._connection_provider, SQLiteReplicaConnectionProvider):
+            return SQLiteConnectionProvider(self.database_path)
+        return self._connection_provider
+
     def get_connection(self):
         """Provides a new SQLite connection."""
-        return self._connection_provider.get_connection()
+        conn = self._connection_provider.get_connection()
+        conn.default_query_timeout = self.query_timeout
+        conn.admission_controller = self.admission
+        self._connections.add(conn)
+        return conn
+
+    def cancel_running_queries(self) -> int:
+        """Cancel the DAO queries running on every connection provided by this factory.
+            They raise QueryTimeoutError with cancelled=True; the connections stay usable.
+            :return: The number of queries that were running.
+        """
+        return sum(QueryGuard.cancel(conn) for conn in list(self._connections))
 
     def initialize_database_tables(self):
-        """Ensures all required tables exist in the database."""
-        with self.get_connection() as conn:
-            # Initialize all your tables here
-            artist_dao = ArtistDao(connection=conn, verbose=self.verbose)
-            if not artist_dao.is_table_exist():
-                artist_dao.create_table_artist()
-            
-            # Add other table initializations
-            # album_dao = AlbumDao(connection=conn, verbose=self.verbose)
-            # etc.
+        """Ensures the database schema is at the latest migration version.
+        When the schema is current this is a single PRAGMA user_version check,
+        and nothing at all once this process has checked the same database.
+        """
+        # Add new tables as migrations in db/migrations/SQLiteMigrations.py
+        MigrationRunner(self._connection_provider, self.database_path, MIGRATIONS,
+                        verbose=self.verbose).ensure_current()
+
+    def start_maintenance(self, check_interval: float = 30.0, **options) -> MaintenanceService:
+        """Start background maintenance (optimize/ANALYZE, WAL checkpoints, incremental vacuum,
+        integrity checks) of this factory's database.
+            :param check_interval: Seconds between two checks for due tasks.
+            :param options: MaintenanceService options (intervals, thresholds, maintenance_window, ...).
+            :return: The running MaintenanceService, e.g. to read its reports.
+        """
+        if self._maintenance is None:
+            # Maintenance works on the database file itself, never through an in-memory replica.
+            self._maintenance = MaintenanceService(self._file_connection_provider(),
+                                                   verbose=self.verbose, **options)
+            self._maintenance.start(check_interval)
+        return self._maintenance
+
+    def stop_maintenance(self, timeout: float = None):
+        """Stop background maintenance, waiting for a running task to finish.
+            :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        """
+        if self._maintenance is not None:
+            self._maintenance.stop(timeout)
+            self._maintenance = None
+
+    def get_backup_service(self, pages_per_step: int = 64, step_sleep: float = 0.005) -> BackupService:
+        """Get a BackupService taking online backups of this factory's database.
+            :param pages_per_step: Number of pages copied per backup step.
+            :param step_sleep: Seconds to sleep between steps.
+        """
+        return BackupService(self._connection_provider, pages_per_step=pages_per_step,
+                             step_sleep=step_sleep, verbose=self.verbose)
+
+    def get_autocomplete_service(self, kinds=AutocompleteService.KINDS, match_words: bool = True) -> AutocompleteService:
+        """Get the autocomplete index of artist, album and track names, built by a streaming scan on first call.
+        Artist repositories created by this factory afterwards keep it in sync with their writes.
+            :param kinds: The kinds of names to index ('artist', 'album', 'track'); only used on first call.
+            :param match_words: If True, names also match on the start of every word; only used on first call.
+        """
+        if self._autocomplete is None:
+            autocomplete = AutocompleteService(self.get_connection(), kinds=kinds, match_words=match_words,
+                                               verbose=self.verbose)
+            autocomplete.build()
+            self._autocomplete = autocomplete
+        return self._autocomplete
+
+    def get_tracks_snapshot(self, chunk_rows: int = 50000) -> ColumnarSnapshot:
+        """Load the numeric columns of tracks into NumPy arrays for vectorized analytics (requires NumPy).
+        Call refresh() on the snapshot to append the tracks added since.
+            :param chunk_rows: Number of rows converted to arrays at a time.
+        """
+        snapshot = ColumnarSnapshot.tracks(self.get_connection(), chunk_rows=chunk_rows, verbose=self.verbose)
+        snapshot.load()
+        return snapshot
+
+    def get_sales_snapshot(self, chunk_rows: int = 50000) -> ColumnarSnapshot:
+        """Load the invoice lines into NumPy arrays for vectorized analytics (requires NumPy).
+        Call refresh() on the snapshot to append the lines added since.
+            :param chunk_rows: Number of rows converted to arrays at a time.
+        """
+        snapshot = ColumnarSnapshot.sales(self.get_connection(), chunk_rows=chunk_rows, verbose=self.verbose)
+        snapshot.load()
+        return snapshot
 
     def get_artist_repository(self) -> ArtistRepository:
         """Get an ArtistRepository with a new connection."""
-        return ArtistRepository(connection=self.get_connection(), verbose=self.verbose)
+        return ArtistRepository(connection=self.get_connection(), verbose=self.verbose, autocomplete=self._autocomplete)
+
+    def get_write_behind_artist_repository(self, max_pending: int = 1000,
+                                           flush_interval: float = 1.0) -> WriteBehindArtistRepository:
+        """Get an ArtistRepository in write-behind mode with a new connection.
+        Updates and deletes are buffered, merged per artist and flushed in batches; call close() when done.
+            :param max_pending: Number of pending artists triggering a flush.
+            :param flush_interval: Maximum age, in seconds, of a pending write.
+        """
+        return WriteBehindArtistRepository(connection=self.get_connection(), verbose=self.verbose,
+                                           max_pending=max_pending, flush_interval=flush_interval,
+                                           autocomplete=self._autocomplete)
+
+    def get_sales_analytics_repository(self) -> SalesAnalyticsRepository:
+        """Get a SalesAnalyticsRepository with a new connection.
+        The summary tables and their triggers are created (and rebuilt if stale) on first use.
+        """
+        repository = SalesAnalyticsRepository(connection=self.get_connection(), verbose=self.verbose)
+        repository.ensure_summaries()
+        return repository
+
+    def get_invoice_repository(self, max_attached: int = 8) -> InvoiceRepository:
+        """Get an InvoiceRepository reading the hot invoices and, only when a query needs them, their archives.
+        It always gets a connection to the database file: archives are attached to that connection,
+        which an in-memory replica cannot serve.
+            :param max_attached: Maximum number of archives kept attached to the connection.
+        """
+        conn = self._file_connection_provider().get_connection()
+        conn.default_query_timeout = self.query_timeout
+        conn.admission_controller = self.admission
+        self._connections.add(conn)
+        return InvoiceRepository(connection=conn, verbose=self.verbose, max_attached=max_attached)
+
+    def archive_invoices(self, cutoff, archive_dir: str = None, period: str = "year",
+                         batch_size: int = 500, batch_pause: float = 0.0) -> dict:
+        """Move the invoices dated before a cutoff, with their lines, into archive database files.
+            :param cutoff: A date, datetime or 'YYYY-MM-DD[ HH:MM:SS]' text.
+            :param archive_dir: Directory of the archive files, defaults to 'archive' next to the database.
+            :param period: 'year' or 'month': the range of invoice dates stored in one archive file.
+            :param batch_size: Number of invoices moved per transaction.
+            :param batch_pause: Seconds to sleep between two batches.
+            :return: The InvoiceArchiver report (invoices, lines, batches, archives, seconds, invoices_per_sec).
+        """
+        archiver = InvoiceArchiver(self._file_connection_provider(), archive_dir=archive_dir,
+                                   period=period, batch_size=batch_size, batch_pause=batch_pause,
+                                   verbose=self.verbose)
+        return archiver.archive_before(cutoff)
+
+    def get_employee_repository(self, cached_tree: bool = False) -> EmployeeRepository:
+        """Get an EmployeeRepository (reporting hierarchy and the customers under it) with a new connection.
+            :param cached_tree: If True, answer hierarchy queries from an in-memory tree, rebuilt when
+                                employee rows change (version triggers from the schema migrations).
+        """
+        return EmployeeRepository(connection=self.get_connection(), verbose=self.verbose, cached_tree=cached_tree)
+
+    def enable_change_capture(self, captured: Optional[list] = None):
+        """Install the capture triggers; the change log table is created by the schema migrations.
+            :param captured: A list of (table_name, pk_field) tuples, defaults to CAPTURED_ENTITIES.
+        """
+        with self.get_connection() as conn:
+            ChangeLogRepository(connection=conn, verbose=self.verbose).ensure_capture(
+                captured if captured is not None else self.CAPTURED_ENTITIES)
+
+    def get_change_log_repository(self) -> ChangeLogRepository:
+        """Get a ChangeLogRepository with a new connection, to tail captured changes."""
+        return ChangeLogRepository(connection=self.get_connection(), verbose=self.verbose)
+
+    def rebuild_sales_summaries(self) -> int:
+        """Fully rebuild the materialized sales summaries.
+            :return: The number of invoice lines aggregated.
+        """
+        with self.get_connection() as conn:
+            repository = SalesAnalyticsRepository(connection=conn, verbose=self.verbose)
+            repository.ensure_summaries()
+            return repository.rebuild()
     
    
@@ -0,0 +1,51 @@
+from db.factories.IDbFactory import IDbFactory
+from db.connection.impl.ShardedSQLiteConnectionProvider import ShardedSQLiteConnectionProvider
+from db.repositories.impl.ShardedArtistRepository import ShardedArtistRepository
+from db.migrations.MigrationRunner import MigrationRunner
+from db.migrations.SQLiteMigrations import MIGRATIONS
+from typing import List, Optional, Sequence
+
+class ShardedRepositoryFactory(IDbFactory):
+    """
+    Repository factory for a dataset partitioned across several SQLite files.
+    Every shard holds the full schema; rows are routed by ID.
+    """
+
+    def __init__(self, database_paths: Sequence[str], strategy: str = "hash",
+                 range_bounds: Optional[Sequence[int]] = None, verbose: bool = False):
+        """
+        Initializes the ShardedRepositoryFactory with the shard paths and routing strategy.
+
+            :param database_paths: One SQLite database file per shard, in shard order.
+            :param strategy: 'hash' (ID modulo shard count) or 'range'.
+            :param range_bounds: For 'range', the exclusive upper ID bound of every shard but the last.
+            :param verbose: If True, enables verbose logging for debugging.
+        """
+        super().__init__(database_paths[0] if database_paths else "", verbose)
+        self._connection_provider = ShardedSQLiteConnectionProvider(database_paths, strategy=strategy,
+                                                                    range_bounds=range_bounds)
+        self.database_paths: List[str] = list(database_paths)
+        self.initialize_database_tables()
+
+    @property
+    def shard_count(self) -> int:
+        """Number of shards."""
+        return self._connection_provider.shard_count
+
+    def get_connection(self, shard_index: int = 0):
+        """Provides a new SQLite connection to one shard."""
+        return self._connection_provider.get_connection(shard_index)
+
+    def get_connection_provider(self) -> ShardedSQLiteConnectionProvider:
+        """Provides the sharded connection provider, e.g. as a resharding target."""
+        return self._connection_provider
+
+    def initialize_database_tables(self):
+        """Ensures every shard's schema is at the latest migration version."""
+        for shard_index, path in enumerate(self.database_paths):
+            MigrationRunner(self._connection_provider.get_shard_provider(shard_index), path, MIGRATIONS,
+                            verbose=self.verbose).ensure_current()
+
+    def get_artist_repository(self) -> ShardedArtistRepository:
+        """Get a ShardedArtistRepository with one new connection per shard."""
+        return ShardedArtistRepository(connection_provider=self._connection_provider, verbose=self.verbose)
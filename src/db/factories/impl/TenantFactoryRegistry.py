@@ -0,0 +1,100 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Union
+from db.connection.impl.TenantConnectionProvider import TenantConnectionProvider
+from db.factories.impl.SQLiteRepositoryFactory import SQLiteRepositoryFactory
+
+
+class TenantFactoryRegistry:
+    """
+    One SQLiteRepositoryFactory per tenant database, all sharing a TenantConnectionProvider.
+    Repositories of every tenant lease their connections from the same pool, so the number
+    of open files stays under 'max_open' however many tenants are served. Factories are
+    cheap and kept in an LRU of 'max_factories'; the schema of a tenant is checked only the
+    first time one of its connections is opened.
+    """
+
+    def __init__(self, database_path: Union[str, Callable[[str], str]], max_open: int = 64,
+                 idle_timeout: Optional[float] = 300.0, acquire_timeout: Optional[float] = 30.0,
+                 max_factories: int = 1024, query_timeout: float = None, verbose: bool = False):
+        """
+        Initialize the registry.
+            :param database_path: Path template with a '{tenant}' field, or a callable mapping a tenant ID to its path.
+            :param max_open: Maximum number of connections open at the same time, all tenants together.
+            :param idle_timeout: Seconds after which an idle connection is closed, or None to keep it.
+            :param acquire_timeout: Maximum seconds to wait for a free connection slot, or None to wait indefinitely.
+            :param max_factories: Maximum number of tenant factories kept.
+            :param query_timeout: Default deadline, in seconds, of the DAO queries of every tenant.
+            :param verbose: If True, enables verbose logging for debugging.
+        """
+        if max_factories < 1:
+            raise ValueError(f"{self.__class__.__name__}::max_factories must be >= 1.")
+        self.provider = TenantConnectionProvider(database_path, max_open=max_open, idle_timeout=idle_timeout,
+                                                 acquire_timeout=acquire_timeout, verbose=verbose)
+        self.max_factories = max_factories
+        self.query_timeout = query_timeout
+        self.verbose = verbose
+        self._factories: "OrderedDict[str, SQLiteRepositoryFactory]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._factory_hits = 0
+        self._factory_creations = 0
+        self._factory_evictions = 0
+
+    def get_factory(self, tenant: str) -> SQLiteRepositoryFactory:
+        """
+        Get the repository factory of a tenant.
+            :param tenant: The tenant ID.
+            :return: A SQLiteRepositoryFactory whose connections are leased from the shared pool;
+                     close the repositories (or their connections) when done to give them back.
+        """
+        with self._lock:
+            factory = self._factories.get(tenant)
+            if factory is not None:
+                self._factories.move_to_end(tenant)
+                self._factory_hits += 1
+                return factory
+        # Built outside the lock: the first schema check of a tenant may take a while.
+        factory = SQLiteRepositoryFactory(self.provider.database_path(tenant), verbose=self.verbose,
+                                          query_timeout=self.query_timeout,
+                                          connection_provider=self.provider.for_tenant(tenant))
+        evicted = []
+        with self._lock:
+            existing = self._factories.get(tenant)
+            if existing is not None:
+                self._factories.move_to_end(tenant)
+                return existing
+            self._factories[tenant] = factory
+            self._factory_creations += 1
+            while len(self._factories) > self.max_factories:
+                evicted.append(self._factories.popitem(last=False)[1])
+                self._factory_evictions += 1
+        for old in evicted:
+            old.stop_maintenance()
+        return factory
+
+    def get_stats(self) -> dict:
+        """
+        Report the activity of the connection pool and of the factory cache.
+            :return: The TenantConnectionProvider stats plus factories, factory_hits, factory_creations
+                     and factory_evictions.
+        """
+        stats = self.provider.get_stats()
+        with self._lock:
+            stats.update(factories=len(self._factories), factory_hits=self._factory_hits,
+                         factory_creations=self._factory_creations, factory_evictions=self._factory_evictions)
+        return stats
+
+    def close(self):
+        """Stop the factories' maintenance and close the pooled connections."""
+        with self._lock:
+            factories = list(self._factories.values())
+            self._factories.clear()
+        for factory in factories:
+            factory.stop_maintenance()
+        self.provider.close()
@@ -0,0 +1,23 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    One versioned schema change.
+    'apply' receives an open connection inside a transaction and must not commit;
+    the runner commits it together with the new PRAGMA user_version.
+    """
+    version: int
+    description: str
+    apply: Callable[[Any], None]
+
+    def __str__(self):
+        """String representation of the Migration object."""
+        return f"Migration(version={self.version}, description='{self.description}')"
@@ -0,0 +1,111 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import os
+import threading
+from typing import Dict, List, Sequence, Tuple
+from db.connection.IDbConnectionProvider import IDbConnectionProvider
+from db.migrations.Migration import Migration
+
+class MigrationRunner:
+    """
+    Applies ordered, transactional schema migrations and records the schema
+    version in PRAGMA user_version.
+
+    Startup cost when the schema is current is a single 'PRAGMA user_version'
+    query, and nothing at all once the result is cached: the checked version is
+    remembered per process and database path, so building many factories on the
+    same file only checks it once.
+    """
+
+    # (pid, absolute database path) -> schema version known to be applied
+    _checked_versions: Dict[Tuple[int, str], int] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, connection_provider: IDbConnectionProvider, database_path: str,
+                 migrations: Sequence[Migration], verbose: bool = False):
+        """
+        Initialize the runner.
+            :param connection_provider: Provider of connections to the database to migrate.
+            :param database_path: Path of the database, used as the cache key.
+            :param migrations: The migrations, with unique versions.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self._connection_provider = connection_provider
+        self.database_path = database_path
+        self.migrations: List[Migration] = sorted(migrations, key=lambda m: m.version)
+        self.verbose = verbose
+        versions = [m.version for m in self.migrations]
+        if len(set(versions)) != len(versions) or (versions and versions[0] < 1):
+            raise ValueError(f"{self.__class__.__name__}::Migration versions must be unique and start at 1 or above.")
+
+    @property
+    def target_version(self) -> int:
+        """The version the schema has once every migration is applied."""
+        return self.migrations[-1].version if self.migrations else 0
+
+    def _cache_key(self):
+        # In-memory databases are private to each connection and cannot be cached.
+        if self.database_path == ":memory:" or self.database_path.startswith("file::memory:"):
+            return None
+        return (os.getpid(), os.path.abspath(self.database_path))
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Forget every checked version, forcing the next ensure_current() to query the database.
+        """
+        with cls._cache_lock:
+            cls._checked_versions.clear()
+
+    def ensure_current(self) -> int:
+        """
+        Bring the schema to the target version.
+        Returns immediately if this process already checked this database.
+            :return: The number of migrations applied.
+        """
+        key = self._cache_key()
+        if key is not None and self._checked_versions.get(key, -1) >= self.target_version:
+            return 0
+
+        conn = self._connection_provider.get_connection()
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            applied = 0
+            if version < self.target_version:
+                applied = self._migrate(conn)
+                version = self.target_version
+            elif self.verbose:
+                print(f"{self.__class__.__name__}::Schema of '{self.database_path}' is current (version {version}).")
+        finally:
+            conn.close()
+
+        if key is not None:
+            with self._cache_lock:
+                self._checked_versions[key] = version
+        return applied
+
+    def _migrate(self, conn) -> int:
+        applied = 0
+        for migration in self.migrations:
+            # BEGIN IMMEDIATE takes the write lock before re-reading the version,
+            # so two processes starting together never apply the same migration twice.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = conn.execute("PRAGMA user_version").fetchone()[0]
+                if migration.version <= current:
+                    conn.rollback()
+                    continue
+                if self.verbose:
+                    print(f"{self.__class__.__name__}::Applying {migration} to '{self.database_path}'.")
+                migration.apply(conn)
+                conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+                conn.commit()
+                applied += 1
+            except Exception:
+                conn.rollback()
+                raise
+        return applied
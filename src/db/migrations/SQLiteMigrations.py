@@ -0,0 +1,66 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+"""
+Ordered schema migrations of the music database.
+
+Rules for adding a migration:
+- Append it with the next version number; never edit or renumber a released one.
+- The 'apply' function runs inside a transaction and must not commit.
+- Prefer idempotent statements (IF NOT EXISTS): databases created before
+  migrations existed are at version 0 but may already contain the tables.
+- The same migrations run on shard and tenant files, which may only hold some
+  of the tables: a migration extending another table checks that it exists.
+"""
+from db.dao.impl.ArtistDao import ArtistDao
+from db.dao.impl.ChangeLogDao import ChangeLogDao
+from db.dao.impl.EmployeeDao import EmployeeDao
+from db.dao.impl.InvoiceDao import InvoiceDao
+from db.migrations.Migration import Migration
+
+
+def _table_exists(conn, table_name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table_name,)).fetchone() is not None
+
+
+def _create_artists_table(conn):
+    conn.execute(ArtistDao.create_table_artist_query(if_not_exists=True))
+
+
+def _index_artist_name(conn):
+    # Name lookups (get_by_name, get_or_create) would otherwise scan the whole table.
+    conn.execute(f"CREATE INDEX IF NOT EXISTS IX_ArtistName ON {ArtistDao.tablename} ({ArtistDao._field_name})")
+
+
+def _create_invoice_archive_manifest(conn):
+    # The manifest tells which dates and IDs each archive file holds (see InvoiceArchiver).
+    if _table_exists(conn, InvoiceDao.tablename):
+        for query in InvoiceDao.create_archive_manifest_queries():
+            conn.execute(query)
+
+
+def _create_change_log_table(conn):
+    # Only the log: the capture triggers are installed per table by enable_change_capture().
+    for query in ChangeLogDao.create_table_change_log_queries():
+        conn.execute(query)
+
+
+def _create_employee_tree_tracking(conn):
+    # Version row bumped by triggers on employees, checked by the cached employee tree.
+    if _table_exists(conn, EmployeeDao.tablename):
+        for query in EmployeeDao.create_change_tracking_queries():
+            conn.execute(query)
+
+
+MIGRATIONS = [
+    Migration(version=1, description="create artists table", apply=_create_artists_table),
+    Migration(version=2, description="index artists by name", apply=_index_artist_name),
+    Migration(version=3, description="create invoice archive manifest and date index",
+              apply=_create_invoice_archive_manifest),
+    Migration(version=4, description="create change log table", apply=_create_change_log_table),
+    Migration(version=5, description="track employee hierarchy changes", apply=_create_employee_tree_tracking),
+]
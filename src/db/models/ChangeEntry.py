@@ -0,0 +1,39 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+"""
+Model: ChangeEntry
+
+One entry of the change-data-capture log: which row of which table was
+inserted, updated or deleted, in commit order (seq).
+"""
+
+from dataclasses import dataclass, field
+
+@dataclass
+class ChangeEntry:
+    """
+    Represents a row from Table change_log.
+    """
+    seq: int = field(default=None)
+    table_name: str = field(default=None)
+    row_id: int = field(default=None)
+    operation: str = field(default=None) # 'I' insert, 'U' update, 'D' delete
+    changed_at: int = field(default=None) # Unix timestamp (seconds)
+
+    def to_dict(self):
+        """Converts the ChangeEntry object to a dictionary, useful for API responses or logging."""
+        return {
+            "seq": self.seq,
+            "table_name": self.table_name,
+            "row_id": self.row_id,
+            "operation": self.operation,
+            "changed_at": self.changed_at,
+        }
+
+    def __str__(self):
+        """String representation of the ChangeEntry object."""
+        return f"ChangeEntry(seq={self.seq}, table_name='{self.table_name}', row_id={self.row_id}, operation='{self.operation}')"
@@ -0,0 +1,55 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+"""
+Model: Customer
+
+Domain model of a customer (table customers), attached to the employee
+hierarchy through its support representative.
+"""
+
+from dataclasses import dataclass, field
+
+@dataclass
+class Customer:
+    """
+    Represents a customer from Table customers.
+    """
+    customer_id: int = field(default=None)
+    first_name: str = field(default=None)
+    last_name: str = field(default=None)
+    company: str = field(default=None)
+    address: str = field(default=None)
+    city: str = field(default=None)
+    state: str = field(default=None)
+    country: str = field(default=None)
+    postal_code: str = field(default=None)
+    phone: str = field(default=None)
+    fax: str = field(default=None)
+    email: str = field(default=None)
+    support_rep_id: int = field(default=None) # EmployeeId of the support representative
+
+    def to_dict(self):
+        """Converts the Customer object to a dictionary, useful for API responses or logging."""
+        return {
+            "customer_id": self.customer_id,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "company": self.company,
+            "address": self.address,
+            "city": self.city,
+            "state": self.state,
+            "country": self.country,
+            "postal_code": self.postal_code,
+            "phone": self.phone,
+            "fax": self.fax,
+            "email": self.email,
+            "support_rep_id": self.support_rep_id,
+        }
+
+    def __str__(self):
+        """String representation of the Customer object."""
+        return f"Customer(customer_id={self.customer_id}, name='{self.first_name} {self.last_name}', support_rep_id={self.support_rep_id})"
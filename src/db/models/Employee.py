@@ -0,0 +1,61 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+"""
+Model: Employee
+
+Domain model of an employee (table employees). 'reports_to' links an employee to
+their manager and forms the management hierarchy.
+"""
+
+from dataclasses import dataclass, field
+
+@dataclass
+class Employee:
+    """
+    Represents an employee from Table employees.
+    """
+    employee_id: int = field(default=None)
+    last_name: str = field(default=None)
+    first_name: str = field(default=None)
+    title: str = field(default=None)
+    reports_to: int = field(default=None) # EmployeeId of the manager, None for the top of the hierarchy
+    birth_date: str = field(default=None)
+    hire_date: str = field(default=None)
+    address: str = field(default=None)
+    city: str = field(default=None)
+    state: str = field(default=None)
+    country: str = field(default=None)
+    postal_code: str = field(default=None)
+    phone: str = field(default=None)
+    fax: str = field(default=None)
+    email: str = field(default=None)
+    depth: int = field(default=None) # Levels below the root of a hierarchy query, None outside of them
+
+    def to_dict(self):
+        """Converts the Employee object to a dictionary, useful for API responses or logging."""
+        return {
+            "employee_id": self.employee_id,
+            "last_name": self.last_name,
+            "first_name": self.first_name,
+            "title": self.title,
+            "reports_to": self.reports_to,
+            "birth_date": self.birth_date,
+            "hire_date": self.hire_date,
+            "address": self.address,
+            "city": self.city,
+            "state": self.state,
+            "country": self.country,
+            "postal_code": self.postal_code,
+            "phone": self.phone,
+            "fax": self.fax,
+            "email": self.email,
+            "depth": self.depth,
+        }
+
+    def __str__(self):
+        """String representation of the Employee object."""
+        return f"Employee(employee_id={self.employee_id}, name='{self.first_name} {self.last_name}', title='{self.title}', reports_to={self.reports_to})"
@@ -0,0 +1,47 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+"""
+Model: Invoice
+
+Domain model of an invoice header (table invoices). Invoices may live in the hot
+database or in an invoice archive; the model does not know which.
+"""
+
+from dataclasses import dataclass, field
+
+@dataclass
+class Invoice:
+    """
+    Represents an invoice from Table invoices.
+    """
+    invoice_id: int = field(default=None)
+    customer_id: int = field(default=None)
+    invoice_date: str = field(default=None) # 'YYYY-MM-DD HH:MM:SS', as stored by the database
+    billing_address: str = field(default=None)
+    billing_city: str = field(default=None)
+    billing_state: str = field(default=None)
+    billing_country: str = field(default=None)
+    billing_postal_code: str = field(default=None)
+    total: float = field(default=0.0)
+
+    def to_dict(self):
+        """Converts the Invoice object to a dictionary, useful for API responses or logging."""
+        return {
+            "invoice_id": self.invoice_id,
+            "customer_id": self.customer_id,
+            "invoice_date": self.invoice_date,
+            "billing_address": self.billing_address,
+            "billing_city": self.billing_city,
+            "billing_state": self.billing_state,
+            "billing_country": self.billing_country,
+            "billing_postal_code": self.billing_postal_code,
+            "total": self.total,
+        }
+
+    def __str__(self):
+        """String representation of the Invoice object."""
+        return f"Invoice(invoice_id={self.invoice_id}, customer_id={self.customer_id}, invoice_date='{self.invoice_date}', total={self.total})"
@@ -0,0 +1,38 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+"""
+Model: InvoiceItem
+
+Domain model of one invoice line (table invoice_items).
+"""
+
+from dataclasses import dataclass, field
+
+@dataclass
+class InvoiceItem:
+    """
+    Represents an invoice line from Table invoice_items.
+    """
+    invoice_line_id: int = field(default=None)
+    invoice_id: int = field(default=None)
+    track_id: int = field(default=None)
+    unit_price: float = field(default=0.0)
+    quantity: int = field(default=0)
+
+    def to_dict(self):
+        """Converts the InvoiceItem object to a dictionary, useful for API responses or logging."""
+        return {
+            "invoice_line_id": self.invoice_line_id,
+            "invoice_id": self.invoice_id,
+            "track_id": self.track_id,
+            "unit_price": self.unit_price,
+            "quantity": self.quantity,
+        }
+
+    def __str__(self):
+        """String representation of the InvoiceItem object."""
+        return f"InvoiceItem(invoice_line_id={self.invoice_line_id}, invoice_id={self.invoice_id}, track_id={self.track_id}, quantity={self.quantity})"
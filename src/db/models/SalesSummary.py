@@ -0,0 +1,39 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+"""
+Model: SalesSummary
+
+Read-only domain model for one row of a materialized sales summary
+(revenue per artist, genre, customer country or month).
+"""
+
+from dataclasses import dataclass, field
+
+@dataclass
+class SalesSummary:
+    """
+    Represents one aggregated row of a sales summary table.
+    """
+    dimension: str = field(default=None) # 'artist', 'genre', 'country' or 'month'
+    key: object = field(default=None)     # ArtistId, GenreId, country name or 'YYYY-MM'
+    revenue: float = field(default=0.0)
+    quantity: int = field(default=0)
+    line_count: int = field(default=0)
+
+    def to_dict(self):
+        """Converts the SalesSummary object to a dictionary, useful for API responses or logging."""
+        return {
+            "dimension": self.dimension,
+            "key": self.key,
+            "revenue": self.revenue,
+            "quantity": self.quantity,
+            "line_count": self.line_count,
+        }
+
+    def __str__(self):
+        """String representation of the SalesSummary object."""
+        return f"SalesSummary(dimension='{self.dimension}', key={self.key!r}, revenue={self.revenue}, quantity={self.quantity})"
@@ -0,0 +1,80 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+class DirtyTracker:
+    """
+    Remembers the persisted state of the entities a repository loaded, so update()
+    can write only the columns that changed and skip updates that change nothing.
+
+    A snapshot lives as long as its entity: it is dropped when the entity is garbage
+    collected. Entities are tracked by identity (dataclass entities are not hashable).
+    """
+
+    def __init__(self, id_attribute: str, columns: Dict[str, str]):
+        """
+        Initialize the tracker.
+            :param id_attribute: Entity attribute holding the primary key.
+            :param columns: Entity attribute -> column name, for every updatable column.
+        """
+        self.id_attribute = id_attribute
+        self.columns = dict(columns)
+        self._snapshots: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, entity) -> tuple:
+        return (getattr(entity, self.id_attribute),) + tuple(getattr(entity, attribute) for attribute in self.columns)
+
+    def track(self, entity):
+        """
+        Snapshot an entity as it is stored in the database (after a load or a write).
+            :param entity: The entity; None is ignored.
+            :return: The entity, for chaining.
+        """
+        if entity is None:
+            return entity
+        key = id(entity)
+        with self._lock:
+            known = key in self._snapshots
+            self._snapshots[key] = self._state(entity)
+        if not known:
+            try:
+                weakref.finalize(entity, self._forget_key, key)
+            except TypeError:
+                self._forget_key(key) # Not weak-referenceable: untracked, updates write every column
+        return entity
+
+    def _forget_key(self, key: int):
+        with self._lock:
+            self._snapshots.pop(key, None)
+
+    def forget(self, entity):
+        """
+        Stop tracking an entity; its next update writes every column.
+        """
+        self._forget_key(id(entity))
+
+    def changes(self, entity) -> Optional[Dict[str, Any]]:
+        """
+        Compute the columns an update of this entity has to write.
+            :param entity: A tracked entity.
+            :return: {column: new value} for the changed columns (empty if nothing changed),
+                     or None if the entity is not tracked or its ID changed since the snapshot.
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(id(entity))
+        state = self._state(entity)
+        if snapshot is None or snapshot[0] != state[0]:
+            return None
+        return {column: new for (column, old, new)
+                in zip(self.columns.values(), snapshot[1:], state[1:]) if old != new}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._snapshots)
@@ -0,0 +1,102 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+from collections import deque
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional
+from db.models.Employee import Employee
+
+class EmployeeTree:
+    """
+    In-memory copy of the employee hierarchy, answering the same subtree, ancestor and
+    depth questions as the recursive EmployeeDao queries without touching the database.
+    It is an immutable snapshot tagged with the hierarchy version it was built from;
+    callers get copies of the employees, never the cached objects.
+    """
+
+    def __init__(self, employees: Iterable[Employee], version: Optional[int] = None):
+        """
+        Build the tree.
+            :param employees: Every employee of the hierarchy.
+            :param version: Hierarchy version the employees were read at (see EmployeeDao.get_tree_version).
+        """
+        self.version = version
+        self._by_id: Dict[int, Employee] = {employee.employee_id: employee for employee in employees}
+        self._children: Dict[int, List[int]] = {}
+        for employee_id in sorted(self._by_id):
+            manager_id = self._by_id[employee_id].reports_to
+            if manager_id is not None:
+                self._children.setdefault(manager_id, []).append(employee_id)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, employee_id: int) -> Optional[Employee]:
+        """Get a copy of one employee, or None if it is not in the tree."""
+        employee = self._by_id.get(employee_id)
+        return replace(employee) if employee is not None else None
+
+    def get_all(self) -> List[Employee]:
+        """Get a copy of every employee, ordered by ID."""
+        return [replace(self._by_id[employee_id]) for employee_id in sorted(self._by_id)]
+
+    def direct_reports(self, manager_id: int) -> List[Employee]:
+        """Get copies of the employees reporting directly to a manager, ordered by ID."""
+        return [replace(self._by_id[employee_id]) for employee_id in self._children.get(manager_id, ())]
+
+    def subtree(self, employee_id: int, max_depth: Optional[int] = None, include_root: bool = True) -> List[Employee]:
+        """
+        Walk down from an employee, like EmployeeDao.get_subtree().
+            :return: Copies with 'depth' set, ordered by depth then ID.
+        """
+        if employee_id not in self._by_id:
+            return []
+        result = []
+        visited = {employee_id}
+        queue = deque([(employee_id, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if depth > 0 or include_root:
+                result.append(replace(self._by_id[current], depth=depth))
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for child in self._children.get(current, ()):
+                if child not in visited: # A cycle ends the walk
+                    visited.add(child)
+                    queue.append((child, depth + 1))
+        result.sort(key=lambda employee: (employee.depth, employee.employee_id))
+        return result
+
+    def subtree_ids(self, employee_id: int, max_depth: Optional[int] = None) -> List[int]:
+        """IDs of an employee and of everyone below them."""
+        return [employee.employee_id for employee in self.subtree(employee_id, max_depth)]
+
+    def ancestors(self, employee_id: int, include_self: bool = True) -> List[Employee]:
+        """
+        Walk up from an employee, like EmployeeDao.get_ancestors().
+            :return: Copies with 'depth' set to the distance to the employee, top of the hierarchy first.
+        """
+        chain = []
+        visited = set()
+        current, distance = employee_id, 0
+        while current is not None and current in self._by_id and current not in visited:
+            visited.add(current)
+            if distance > 0 or include_self:
+                chain.append(replace(self._by_id[current], depth=distance))
+            current, distance = self._by_id[current].reports_to, distance + 1
+        chain.reverse()
+        return chain
+
+    def depths(self) -> Dict[int, int]:
+        """
+        Level of every employee reachable from the top of the hierarchy, like EmployeeDao.get_depths().
+            :return: A dictionary mapping EmployeeId to its level (0 for employees without a manager).
+        """
+        levels = {}
+        for root in sorted(employee_id for employee_id, employee in self._by_id.items() if employee.reports_to is None):
+            for employee in self.subtree(root):
+                levels.setdefault(employee.employee_id, employee.depth)
+        return levels
@@ -5,7 +5,7 @@
   See the LICENSE file for details.
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional, TypeVar, Generic
+from typing import List, Optional, Tuple, TypeVar, Generic
 
 # TypeVar to represent the entity type that this repository will handle
 T = TypeVar('T')
@@ -36,6 +36,16 @@ class IRepository(ABC, Generic[T]):
         """
         pass
 
+    @abstractmethod
+    def get_many(self, entity_ids: List[int]) -> Tuple[List[T], List[int]]:
+        """
+        Retrieves several entities by their IDs with as few queries as possible.
+        :param entity_ids: The IDs of the entities.
+        :return: A tuple (entities, missing_ids): the entities found, in input order,
+                 and the IDs that do not exist.
+        """
+        pass
+
     @abstractmethod
     def update(self, entity: T) -> bool:
         """
@@ -0,0 +1,164 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class PrefixIndex:
+    """
+    In-memory prefix index of names, for type-ahead lookups.
+
+    Names are normalized (case folded, accents, apostrophes and repeated spaces removed) and kept in
+    sorted arrays of (key, id) pairs: a lookup is one bisection to the first key starting
+    with the prefix followed by a scan of at most 'limit' matches, so it costs
+    microseconds whatever the number of names. Matches on the start of the whole name
+    rank before matches on a later word ('zep' finds 'Led Zeppelin' after 'Zeppelin ...').
+    put() and remove() keep the arrays sorted, so the index follows writes incrementally.
+    """
+
+    _word_start = re.compile(r"(?<=\W)\w")
+    # Dropped by normalize(), so "dont" finds "Don't" and "don't" has no word "t"
+    _apostrophes = str.maketrans("", "", "'\u2019")
+
+    def __init__(self, match_words: bool = True):
+        """
+        Initialize an empty index.
+            :param match_words: If True, names also match on the start of every word after the first.
+        """
+        self.match_words = match_words
+        self._names: List[Tuple[str, int]] = []   # (normalized name, id)
+        self._words: List[Tuple[str, int]] = []   # (normalized name from a later word, id)
+        self._entries: Dict[int, Tuple[str, Tuple[str, ...]]] = {}  # id -> (name, word keys)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lower-case a name without accents or apostrophes, with single spaces and no leading or trailing space."""
+        decomposed = unicodedata.normalize("NFKD", text).translate(PrefixIndex._apostrophes)
+        stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+        return " ".join(stripped.casefold().split())
+
+    def _word_keys(self, key: str) -> Tuple[str, ...]:
+        if not self.match_words:
+            return ()
+        return tuple(key[match.start():] for match in self._word_start.finditer(key))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, entity_id: int) -> Optional[str]:
+        """The indexed name of an ID, or None."""
+        entry = self._entries.get(entity_id)
+        return entry[0] if entry is not None else None
+
+    def build(self, items: Iterable[Tuple[int, str]]) -> int:
+        """
+        Replace the content of the index, sorting once instead of inserting one name at a time.
+            :param items: (id, name) pairs; None names are skipped.
+            :return: The number of names indexed.
+        """
+        entries, names, words = {}, [], []
+        for entity_id, name in items:
+            if name is None:
+                continue
+            key = self.normalize(name)
+            word_keys = self._word_keys(key)
+            entries[entity_id] = (name, word_keys)
+            names.append((key, entity_id))
+            words.extend((word_key, entity_id) for word_key in word_keys)
+        if len(entries) != len(names):
+            # Duplicate IDs: the last name wins, like a sequence of put() calls.
+            names = [(self.normalize(name), entity_id) for entity_id, (name, _) in entries.items()]
+            words = [(word_key, entity_id) for entity_id, (_, word_keys) in entries.items() for word_key in word_keys]
+        names.sort()
+        words.sort()
+        with self._lock:
+            self._entries, self._names, self._words = entries, names, words
+        return len(entries)
+
+    @staticmethod
+    def _discard(array: List[Tuple[str, int]], item: Tuple[str, int]):
+        position = bisect_left(array, item)
+        if position < len(array) and array[position] == item:
+            del array[position]
+
+    def _remove_locked(self, entity_id: int) -> bool:
+        entry = self._entries.pop(entity_id, None)
+        if entry is None:
+            return False
+        name, word_keys = entry
+        self._discard(self._names, (self.normalize(name), entity_id))
+        for word_key in word_keys:
+            self._discard(self._words, (word_key, entity_id))
+        return True
+
+    def put(self, entity_id: int, name: Optional[str]):
+        """
+        Index a new name or replace the name of an ID.
+            :param entity_id: The ID.
+            :param name: The name, or None to remove the ID.
+        """
+        if name is None:
+            self.remove(entity_id)
+            return
+        key = self.normalize(name)
+        word_keys = self._word_keys(key)
+        with self._lock:
+            current = self._entries.get(entity_id)
+            if current is not None and current[0] == name:
+                return
+            self._remove_locked(entity_id)
+            self._entries[entity_id] = (name, word_keys)
+            insort(self._names, (key, entity_id))
+            for word_key in word_keys:
+                insort(self._words, (word_key, entity_id))
+
+    def remove(self, entity_id: int) -> bool:
+        """
+        Remove an ID from the index.
+            :return: True if it was indexed.
+        """
+        with self._lock:
+            return self._remove_locked(entity_id)
+
+    def matches(self, prefix: str, limit: int = 10) -> List[Tuple[int, str, int, str]]:
+        """
+        Find the best matches of a prefix, with their ranking keys.
+            :param prefix: The text typed so far.
+            :param limit: Maximum number of matches.
+            :return: (rank, key, id, name) tuples in ranking order: rank 0 for matches on the start
+                     of the name, 1 for matches on a later word, then by matched key and ID.
+        """
+        key = self.normalize(prefix)
+        if not key or limit <= 0:
+            return []
+        result, seen = [], set()
+        with self._lock:
+            for rank, array in enumerate((self._names, self._words)):
+                position = bisect_left(array, (key,))
+                while position < len(array) and len(result) < limit:
+                    matched, entity_id = array[position]
+                    if not matched.startswith(key):
+                        break
+                    if entity_id not in seen:
+                        seen.add(entity_id)
+                        result.append((rank, matched, entity_id, self._entries[entity_id][0]))
+                    position += 1
+                if len(result) >= limit:
+                    break
+        return result
+
+    def search(self, prefix: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """
+        Find the names starting with a prefix (or, with match_words, having a word starting with it).
+            :param prefix: The text typed so far; case and accents are ignored.
+            :param limit: Maximum number of matches.
+            :return: (id, name) pairs, name-start matches first, then in alphabetical order.
+        """
+        return [(entity_id, name) for _, _, entity_id, name in self.matches(prefix, limit)]
@@ -1,6 +1,10 @@
-from typing import List, Optional
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from db.dao.impl.ArtistDao import ArtistDao
+from db.dao.Criteria import Criteria
 from db.repositories.IRepository import IRepository
+from db.repositories.DirtyTracker import DirtyTracker
+from db.services.JsonStreamer import JsonStreamer
+from db.services.AutocompleteService import AutocompleteService
 from db.models.Artist import Artist
 import sqlite3
 
@@ -9,14 +13,28 @@ class ArtistRepository(IRepository[Artist]):
     Repository for Artist entities.
     Handles conversion between domain objects and database records.
     """
+
+    # JSON keys of streamed artists (the keys of Artist.to_dict()) and their columns
+    _json_fields = (("artist_id", ArtistDao._field_id), ("name", ArtistDao._field_name))
     
-    def __init__(self, connection: sqlite3.Connection, verbose: bool = False):
+    def __init__(self, connection: sqlite3.Connection, verbose: bool = False,
+                 autocomplete: Optional[AutocompleteService] = None):
         """
         Initialize the ArtistRepository with a database connection.
             :param connection: SQLite connection object.
             :param verbose: If True, print debug information. Default is False.
+            :param autocomplete: Autocomplete index kept in sync with the writes of this repository.
         """
         self._dao = ArtistDao(connection=connection, verbose=verbose)
+        # Snapshots of loaded artists, so update() only writes changed columns
+        self._tracker = DirtyTracker("artist_id", {"name": ArtistDao._field_name})
+        self._autocomplete = autocomplete
+
+    def _indexed(self, entity: Optional[Artist]) -> Optional[Artist]:
+        """Report a stored artist to the autocomplete index, if any; returns the entity for chaining."""
+        if self._autocomplete is not None and entity is not None and entity.artist_id is not None:
+            self._autocomplete.put(AutocompleteService.ARTIST, entity.artist_id, entity.name)
+        return entity
     
     def add(self, entity: Artist) -> Optional[Artist]:
         """Add a new artist entity to the repository.
@@ -34,7 +52,7 @@ class ArtistRepository(IRepository[Artist]):
         # Set the artist_id on the entity after insertion
         entity.artist_id = artist_id
 
-        return entity
+        return self._indexed(self._tracker.track(entity))
     
     def get_by_id(self, entity_id: int) -> Optional[Artist]:
         """Get an artist by ID.
@@ -46,22 +64,40 @@ class ArtistRepository(IRepository[Artist]):
         """
         db_artist = self._dao.get_artist_by_id(entity_id)
         if db_artist:
-            return Artist(
-                artist_id=db_artist[ArtistDao._field_id],
-                name=db_artist[ArtistDao._field_name]
-            )
+            return self._to_entity(db_artist)
         return None
     
+    def get_many(self, entity_ids: List[int]) -> Tuple[List[Artist], List[int]]:
+        """Get several artists by ID.
+            This method fetches any number of IDs in chunked queries instead of one query per ID.
+            
+            :param entity_ids: The IDs of the artists to retrieve.
+            :return: A tuple (artists, missing_ids): Artist entities in input order and the IDs not found.
+        """
+        db_artists, missing_ids = self._dao.get_artists_by_ids(entity_ids)
+        return [self._to_entity(db_artist) for db_artist in db_artists], missing_ids
+    
     def update(self, entity: Artist) -> bool:
         """Update an existing artist.
             This method updates an artist's name in the database.
+            Artists loaded by this repository are compared with their snapshot: only changed
+            columns are written, and nothing at all if nothing changed.
             
             :param entity: Artist entity with updated information.
             :return: True if the update was successful, False otherwise.
         """
         if entity.artist_id is None or entity.name is None:
             return False
-        return self._dao.update(entity.artist_id, entity.name)
+        changes = self._tracker.changes(entity)
+        if changes is None:
+            updated = self._dao.update(entity.artist_id, entity.name)
+        elif not changes:
+            return True # No-op update
+        else:
+            updated = self._dao.update_columns(entity.artist_id, changes)
+        if updated:
+            self._indexed(self._tracker.track(entity))
+        return updated
     
     def delete(self, entity_id: int) -> bool:
         """Delete an artist by ID.
@@ -70,7 +106,10 @@ class ArtistRepository(IRepository[Artist]):
             :param entity_id: The ID of the artist to delete.
             :return: True if the deletion was successful, False otherwise.
         """
-        return self._dao.delete(entity_id)
+        deleted = self._dao.delete(entity_id)
+        if deleted and self._autocomplete is not None:
+            self._autocomplete.remove(AutocompleteService.ARTIST, entity_id)
+        return deleted
     
     def get_all(self) -> List[Artist]:
         """Get all artists.
@@ -81,12 +120,66 @@ class ArtistRepository(IRepository[Artist]):
         db_artists = self._dao.get_all_artists()
         artists = []
         for db_artist in db_artists:
-            artists.append(Artist(
-                artist_id=db_artist[ArtistDao._field_id],
-                name=db_artist[ArtistDao._field_name]
-            ))
+            artists.append(self._to_entity(db_artist))
         return artists
     
+    def find(self, criteria: Criteria) -> List[Artist]:
+        """Find artists matching a Criteria.
+            Filtering, ordering, limits and projection are pushed down to SQLite; fields that
+            are not projected are left to None on the returned entities.
+            
+            :param criteria: The query specification, using ArtistDao column names.
+            :return: A list of Artist entities.
+        """
+        db_artists = self._dao.find(criteria)
+        return [self._tracker.track(Artist(
+                    artist_id=db_artist[ArtistDao._field_id] if ArtistDao._field_id in db_artist.keys() else None,
+                    name=db_artist[ArtistDao._field_name] if ArtistDao._field_name in db_artist.keys() else None
+                )) for db_artist in db_artists]
+    
+    def count(self, criteria: Optional[Criteria] = None) -> int:
+        """Count artists in one aggregate statement, instead of len(get_all()).
+
+            :param criteria: Filters (and limit/offset) using ArtistDao column names, or None for all artists.
+            :return: The number of matching artists.
+        """
+        return self._dao.count(criteria)
+
+    def exists(self, criteria: Optional[Criteria] = None) -> bool:
+        """Check whether any artist matches, stopping at the first one.
+
+            :param criteria: Filters using ArtistDao column names, or None for any artist.
+            :return: True if at least one artist matches.
+        """
+        return self._dao.exists(criteria)
+
+    def min(self, field: str, criteria: Optional[Criteria] = None):
+        """Get the smallest value of a column over the matching artists (one index seek when indexed).
+
+            :param field: An ArtistDao column name, e.g. ArtistDao._field_id.
+            :param criteria: The artists to consider, or None for all.
+            :return: The smallest value, or None if no artist matches.
+        """
+        return self._dao.aggregate("MIN", field, criteria)
+
+    def max(self, field: str, criteria: Optional[Criteria] = None):
+        """Get the largest value of a column over the matching artists (one index seek when indexed).
+
+            :param field: An ArtistDao column name, e.g. ArtistDao._field_id.
+            :param criteria: The artists to consider, or None for all.
+            :return: The largest value, or None if no artist matches.
+        """
+        return self._dao.aggregate("MAX", field, criteria)
+
+    def sum(self, field: str, criteria: Optional[Criteria] = None):
+        """Sum a column over the matching artists.
+
+            :param field: An ArtistDao column name.
+            :param criteria: The artists to consider, or None for all.
+            :return: The sum, or None if no artist matches.
+        """
+        return self._dao.aggregate("SUM", field, criteria)
+
     def get_by_name(self, name: str) -> Optional[Artist]:
         """Get an artist by name (additional method specific to Artist).
             This method retrieves an artist by their name.
@@ -96,8 +189,134 @@ class ArtistRepository(IRepository[Artist]):
         """
         db_artist = self._dao.get_artist_by_name(name)
         if db_artist:
-            return Artist(
-                artist_id=db_artist[ArtistDao._field_id],
-                name=db_artist[ArtistDao._field_name]
-            )
-        return None
\ No newline at end of file
+            return self._to_entity(db_artist)
+        return None
+
+    def _to_entity(self, db_artist) -> Artist:
+        """Convert a DAO row into an Artist entity, snapshotted for dirty tracking."""
+        return self._tracker.track(Artist(
+            artist_id=db_artist[ArtistDao._field_id],
+            name=db_artist[ArtistDao._field_name]
+        ))
+
+    def upsert(self, entity: Artist) -> Optional[Artist]:
+        """Insert or update an artist in a single statement.
+            If entity.artist_id is None a new artist is created, otherwise the row with this ID
+            is created or has its name replaced.
+
+            :param entity: Artist entity to write.
+            :return: The Artist entity as stored, with artist_id set, or None if the operation failed.
+        """
+        if entity.name is None:
+            return None
+        db_artist = self._dao.upsert(entity.artist_id, entity.name)
+        if db_artist is None:
+            return None
+        entity.artist_id = db_artist[ArtistDao._field_id]
+        return self._indexed(self._tracker.track(entity))
+
+    def upsert_many(self, entities: List[Artist]) -> List[Artist]:
+        """Insert or update several artists in one transaction.
+
+            :param entities: Artist entities to write; entities without a name are skipped.
+            :return: The written Artist entities with artist_id set, in input order.
+        """
+        entities = [entity for entity in entities if entity.name is not None]
+        db_artists = self._dao.upsert_many([(entity.artist_id, entity.name) for entity in entities])
+        if db_artists is None:
+            return []
+        for entity, db_artist in zip(entities, db_artists):
+            entity.artist_id = db_artist[ArtistDao._field_id]
+            self._indexed(self._tracker.track(entity))
+        return entities
+
+    def get_or_create(self, name: str) -> Tuple[Optional[Artist], bool]:
+        """Get an artist by name, creating it if missing, in one transaction.
+
+            :param name: The name of the artist.
+            :return: A tuple (artist, created); artist is None if the operation failed.
+        """
+        result = self._dao.get_or_create(name)
+        if result is None:
+            return None, False
+        db_artist, created = result
+        return self._indexed(self._to_entity(db_artist)), created
+
+    def get_or_create_many(self, names: List[str]) -> List[Artist]:
+        """Get several artists by name, creating the missing ones, in one transaction.
+
+            :param names: Artist names.
+            :return: Artist entities in input order.
+        """
+        db_artists = self._dao.get_or_create_many(names)
+        if db_artists is None:
+            return []
+        return [self._indexed(self._to_entity(db_artist)) for db_artist in db_artists]
+
+    def update_returning(self, entity: Artist) -> Optional[Artist]:
+        """Update an artist and return the stored row without a follow-up get_by_id.
+
+            :param entity: Artist entity with updated information.
+            :return: The updated Artist as stored, or None if no artist has this ID.
+        """
+        if entity.artist_id is None or entity.name is None:
+            return None
+        db_artist = self._dao.update_returning(entity.artist_id, entity.name)
+        return self._indexed(self._to_entity(db_artist)) if db_artist else None
+
+    def update_many_returning(self, entities: List[Artist]) -> List[Artist]:
+        """Update several artists in one transaction and return the stored rows.
+
+            :param entities: Artist entities with updated information.
+            :return: The updated Artists as stored; entities whose ID does not exist are absent.
+        """
+        pairs = [(entity.artist_id, entity.name) for entity in entities
+                 if entity.artist_id is not None and entity.name is not None]
+        db_artists = self._dao.update_many_returning(pairs)
+        return [self._indexed(self._to_entity(db_artist)) for db_artist in db_artists or []]
+
+    def _json_rows(self, criteria: Optional[Criteria], chunk_rows: int):
+        """Rows to serialize and the matching (JSON key, column) fields."""
+        if criteria is None:
+            return self._dao.iter_all_artists(batch_size=chunk_rows), self._json_fields
+        rows = self._dao.iter_find(criteria, batch_size=chunk_rows) # Validates the criteria's columns
+        keys = {column: key for key, column in self._json_fields}
+        fields = [(keys[column], column) for column in criteria.columns] if criteria.columns else self._json_fields
+        return rows, fields
+
+    def iter_json(self, fmt: str = "json", criteria: Optional[Criteria] = None, chunk_rows: int = 1000) -> Iterator[str]:
+        """Serialize artists to JSON or NDJSON chunks, straight from the DAO rows.
+            The output matches json.dumps([artist.to_dict() for artist in get_all()]) (compact separators),
+            with memory bounded by 'chunk_rows' instead of the number of artists.
+
+            :param fmt: 'json' for one array, 'ndjson' for one object per line.
+            :param criteria: Artists to serialize (filters, order, limit, projection), or None for all.
+            :param chunk_rows: Number of artists fetched and encoded per chunk.
+            :return: A generator of text chunks.
+        """
+        rows, fields = self._json_rows(criteria, chunk_rows)
+        return JsonStreamer(fields, fmt=fmt, chunk_rows=chunk_rows).iter_chunks(rows)
+
+    def write_json(self, stream, fmt: str = "json", criteria: Optional[Criteria] = None,
+                   chunk_rows: int = 1000, encoding: Optional[str] = None) -> int:
+        """Serialize artists into a stream (see iter_json).
+
+            :param stream: Any object with a write() method.
+            :param encoding: None to write text, or an encoding (e.g. 'utf-8') to write bytes.
+            :return: The number of artists written.
+        """
+        rows, fields = self._json_rows(criteria, chunk_rows)
+        return JsonStreamer(fields, fmt=fmt, chunk_rows=chunk_rows).write(rows, stream, encoding=encoding)
+
+    def aiter_json(self, fmt: str = "json", criteria: Optional[Criteria] = None, chunk_rows: int = 1000) -> AsyncIterator[str]:
+        """Serialize artists as an async generator of chunks (see iter_json), e.g. for a streaming
+            HTTP response. Rows are fetched and encoded in a worker thread.
+
+            :return: An async generator of text chunks.
+        """
+        rows, fields = self._json_rows(criteria, chunk_rows)
+        return JsonStreamer(fields, fmt=fmt, chunk_rows=chunk_rows).aiter_chunks(rows)
+
+    def close(self):
+        """Close the repository's connection; a pooled connection goes back to its pool."""
+        self._dao.conn.close()
@@ -0,0 +1,123 @@
+from typing import Iterator, List, Optional, Sequence
+from db.dao.impl.ChangeLogDao import ChangeLogDao
+from db.models.ChangeEntry import ChangeEntry
+import sqlite3
+import threading
+
+class ChangeLogRepository:
+    """
+    Consumer API over the change-data-capture log.
+    Consumers remember the last sequence number they processed and ask for
+    the changes that follow it, in batches.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, verbose: bool = False):
+        """
+        Initialize the ChangeLogRepository with a database connection.
+            :param connection: SQLite connection object.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self._dao = ChangeLogDao(connection=connection, verbose=verbose)
+
+    def ensure_capture(self, captured: Sequence[tuple]):
+        """Install capture triggers. The change_log table itself is created by the schema migrations.
+
+            :param captured: A list of (table_name, pk_field) tuples to capture.
+        """
+        if not self._dao.is_table_exist():
+            raise Exception(f"{self.__class__.__name__}::The '{ChangeLogDao.tablename}' table is missing: "
+                            f"run the schema migrations (a factory does) before enabling capture.")
+        for table_name, pk_field in captured:
+            self._dao.enable_capture(table_name, pk_field)
+
+    def _to_entry(self, row) -> ChangeEntry:
+        return ChangeEntry(seq=row[ChangeLogDao._field_seq],
+                           table_name=row[ChangeLogDao._field_table_name],
+                           row_id=row[ChangeLogDao._field_row_id],
+                           operation=row[ChangeLogDao._field_operation],
+                           changed_at=row[ChangeLogDao._field_changed_at])
+
+    def get_changes_after(self, seq: int, limit: int = 1000,
+                          table_names: Optional[List[str]] = None) -> List[ChangeEntry]:
+        """Get one batch of changes following a sequence number.
+
+            :param seq: Last sequence number already processed (0 to start from the beginning).
+            :param limit: Maximum number of entries to return.
+            :param table_names: Optional list of table names to filter on.
+            :return: A list of ChangeEntry entities ordered by seq.
+        """
+        return [self._to_entry(row) for row in self._dao.get_changes_after(seq, limit, table_names)]
+
+    def tail(self, after_seq: int, batch_size: int = 1000,
+             table_names: Optional[List[str]] = None) -> Iterator[List[ChangeEntry]]:
+        """Yield batches of changes until the consumer has caught up with the log.
+
+            :param after_seq: Last sequence number already processed.
+            :param batch_size: Maximum number of entries per batch.
+            :param table_names: Optional list of table names to filter on.
+            :return: A generator of non-empty batches; the last entry's seq is the new position.
+        """
+        while True:
+            batch = self.get_changes_after(after_seq, batch_size, table_names)
+            if not batch:
+                return
+            yield batch
+            after_seq = batch[-1].seq
+            if len(batch) < batch_size:
+                return
+
+    def follow(self, after_seq: int, batch_size: int = 1000, poll_interval: float = 1.0,
+               stop_event: Optional[threading.Event] = None,
+               table_names: Optional[List[str]] = None) -> Iterator[List[ChangeEntry]]:
+        """Like tail(), but keeps polling for new changes until 'stop_event' is set.
+
+            :param after_seq: Last sequence number already processed.
+            :param batch_size: Maximum number of entries per batch.
+            :param poll_interval: Seconds to wait when the consumer has caught up.
+            :param stop_event: Event stopping the generator when set.
+            :param table_names: Optional list of table names to filter on.
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            caught_up = True
+            for batch in self.tail(after_seq, batch_size, table_names):
+                after_seq = batch[-1].seq
+                caught_up = len(batch) < batch_size
+                yield batch
+            if caught_up:
+                stop_event.wait(poll_interval)
+
+    def get_latest_seq(self) -> int:
+        """Get the highest sequence number assigned so far.
+
+            :return: The latest sequence number, or 0 if nothing was logged.
+        """
+        return self._dao.get_latest_seq()
+
+    def compact(self, up_to_seq: int) -> int:
+        """Keep only the newest entry per row up to a sequence number.
+
+            :param up_to_seq: Highest sequence number included in the compaction.
+            :return: The number of entries removed.
+        """
+        return self._dao.compact(up_to_seq)
+
+    def purge_before(self, seq: int) -> int:
+        """Delete entries every consumer has already processed.
+
+            :param seq: Highest sequence number to delete.
+            :return: The number of entries removed.
+        """
+        return self._dao.purge_before(seq)
+
+    def purge_older_than(self, max_age_seconds: int) -> int:
+        """Delete entries older than a retention period.
+
+            :param max_age_seconds: Retention period in seconds.
+            :return: The number of entries removed.
+        """
+        return self._dao.purge_older_than(max_age_seconds)
+
+    def close(self):
+        """Close the repository's connection; a pooled connection goes back to its pool."""
+        self._dao.conn.close()
@@ -0,0 +1,197 @@
+from typing import Dict, List, Optional
+from db.dao.impl.EmployeeDao import EmployeeDao
+from db.dao.impl.CustomerDao import CustomerDao
+from db.repositories.EmployeeTree import EmployeeTree
+from db.models.Employee import Employee
+from db.models.Customer import Customer
+import sqlite3
+import threading
+
+class EmployeeRepository:
+    """
+    Read repository for the employee hierarchy and the customers hanging off it.
+    Without cache, every hierarchy query is one WITH RECURSIVE statement. With
+    cached_tree=True the hierarchy is kept in an EmployeeTree and answered in memory;
+    each call first reads the hierarchy version (bumped by triggers on employees) and
+    rebuilds the tree when employee rows changed, whichever connection changed them.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, verbose: bool = False, cached_tree: bool = False):
+        """
+        Initialize the EmployeeRepository with a database connection.
+            :param connection: SQLite connection object.
+            :param verbose: If True, print debug information. Default is False.
+            :param cached_tree: If True, serve hierarchy queries from an in-memory tree.
+        """
+        self._dao = EmployeeDao(connection=connection, verbose=verbose)
+        self._customer_dao = CustomerDao(connection=connection, verbose=verbose)
+        self.verbose = verbose
+        self.cached_tree = cached_tree
+        self._tree: Optional[EmployeeTree] = None
+        self._tree_lock = threading.Lock()
+        if cached_tree and self._dao.get_tree_version() is None:
+            raise Exception(f"{self.__class__.__name__}::The '{EmployeeDao.tablename_state}' version row is missing: "
+                            f"run the schema migrations (a factory does) before caching the tree.")
+
+    def _to_entity(self, row) -> Employee:
+        keys = row.keys()
+        return Employee(employee_id=row[EmployeeDao._field_id],
+                        last_name=row[EmployeeDao._field_last_name],
+                        first_name=row[EmployeeDao._field_first_name],
+                        title=row[EmployeeDao._field_title],
+                        reports_to=row[EmployeeDao._field_reports_to],
+                        birth_date=row[EmployeeDao._field_birth_date],
+                        hire_date=row[EmployeeDao._field_hire_date],
+                        address=row[EmployeeDao._field_address],
+                        city=row[EmployeeDao._field_city],
+                        state=row[EmployeeDao._field_state],
+                        country=row[EmployeeDao._field_country],
+                        postal_code=row[EmployeeDao._field_postal_code],
+                        phone=row[EmployeeDao._field_phone],
+                        fax=row[EmployeeDao._field_fax],
+                        email=row[EmployeeDao._field_email],
+                        depth=row[EmployeeDao._field_depth] if EmployeeDao._field_depth in keys else None)
+
+    def _to_customer(self, row) -> Customer:
+        return Customer(customer_id=row[CustomerDao._field_id],
+                        first_name=row[CustomerDao._field_first_name],
+                        last_name=row[CustomerDao._field_last_name],
+                        company=row[CustomerDao._field_company],
+                        address=row[CustomerDao._field_address],
+                        city=row[CustomerDao._field_city],
+                        state=row[CustomerDao._field_state],
+                        country=row[CustomerDao._field_country],
+                        postal_code=row[CustomerDao._field_postal_code],
+                        phone=row[CustomerDao._field_phone],
+                        fax=row[CustomerDao._field_fax],
+                        email=row[CustomerDao._field_email],
+                        support_rep_id=row[CustomerDao._field_support_rep_id])
+
+    def _get_tree(self) -> Optional[EmployeeTree]:
+        """The cached tree, rebuilt if the hierarchy version moved; None when caching is off."""
+        if not self.cached_tree:
+            return None
+        version = self._dao.get_tree_version()
+        with self._tree_lock:
+            if self._tree is None or version is None or self._tree.version != version:
+                # Reload until the version is the same before and after reading, so the tree matches its version.
+                while True:
+                    version = self._dao.get_tree_version()
+                    employees = [self._to_entity(row) for row in self._dao.get_all_employees()]
+                    if self._dao.get_tree_version() == version:
+                        break
+                self._tree = EmployeeTree(employees, version)
+                if self.verbose:
+                    print(f"{self.__class__.__name__}::Employee tree rebuilt ({len(employees)} employees, version {version}).")
+            return self._tree
+
+    def refresh(self):
+        """Drop the cached tree; the next hierarchy query rebuilds it."""
+        with self._tree_lock:
+            self._tree = None
+
+    def get_by_id(self, employee_id: int) -> Optional[Employee]:
+        """Get an employee by ID.
+
+            :param employee_id: The ID of the employee to retrieve.
+            :return: An Employee entity if found, or None if not found.
+        """
+        tree = self._get_tree()
+        if tree is not None:
+            return tree.get(employee_id)
+        row = self._dao.get_employee_by_id(employee_id)
+        return self._to_entity(row) if row else None
+
+    def get_all(self) -> List[Employee]:
+        """Get all employees, ordered by ID.
+
+            :return: A list of Employee entities.
+        """
+        tree = self._get_tree()
+        if tree is not None:
+            return tree.get_all()
+        return [self._to_entity(row) for row in self._dao.get_all_employees()]
+
+    def get_direct_reports(self, manager_id: int) -> List[Employee]:
+        """Get the employees reporting directly to a manager.
+
+            :param manager_id: The ID of the manager.
+            :return: A list of Employee entities ordered by ID.
+        """
+        tree = self._get_tree()
+        if tree is not None:
+            return tree.direct_reports(manager_id)
+        return [self._to_entity(row) for row in self._dao.get_direct_reports(manager_id)]
+
+    def get_subtree(self, employee_id: int, max_depth: Optional[int] = None, include_root: bool = True) -> List[Employee]:
+        """Get an employee and everyone reporting to them, directly or not (an org chart).
+
+            :param employee_id: The ID of the root employee.
+            :param max_depth: Deepest level to return (1 for direct reports), or None for every level.
+            :param include_root: If False, the root employee itself is left out.
+            :return: Employee entities with 'depth' set (0 for the root), ordered by depth then ID.
+        """
+        tree = self._get_tree()
+        if tree is not None:
+            return tree.subtree(employee_id, max_depth, include_root)
+        return [self._to_entity(row) for row in self._dao.get_subtree(employee_id, max_depth, include_root)]
+
+    def get_ancestors(self, employee_id: int, include_self: bool = True) -> List[Employee]:
+        """Get the management chain of an employee.
+
+            :param employee_id: The ID of the employee.
+            :param include_self: If False, the employee itself is left out.
+            :return: Employee entities from the top of the hierarchy down to the employee,
+                     with 'depth' set to their distance to the employee.
+        """
+        tree = self._get_tree()
+        if tree is not None:
+            return tree.ancestors(employee_id, include_self)
+        return [self._to_entity(row) for row in self._dao.get_ancestors(employee_id, include_self)]
+
+    def get_depth(self, employee_id: int) -> Optional[int]:
+        """Get the level of an employee in the hierarchy.
+
+            :param employee_id: The ID of the employee.
+            :return: 0 for an employee without a manager, 1 for their direct reports, ...; None if not found.
+        """
+        chain = self.get_ancestors(employee_id)
+        return len(chain) - 1 if chain else None
+
+    def get_depths(self) -> Dict[int, int]:
+        """Get the level of every employee.
+
+            :return: A dictionary mapping EmployeeId to its level (0 for employees without a manager).
+        """
+        tree = self._get_tree()
+        if tree is not None:
+            return tree.depths()
+        return {row[EmployeeDao._field_id]: row[EmployeeDao._field_depth] for row in self._dao.get_depths()}
+
+    def is_manager_of(self, manager_id: int, employee_id: int) -> bool:
+        """Check whether an employee reports to a manager, directly or not.
+
+            :param manager_id: The ID of the manager.
+            :param employee_id: The ID of the employee.
+            :return: True if the manager is above the employee in the hierarchy.
+        """
+        return any(employee.employee_id == manager_id for employee in self.get_ancestors(employee_id, include_self=False))
+
+    def get_customers_under(self, manager_id: int, max_depth: Optional[int] = None) -> List[Customer]:
+        """Get the customers supported by a manager or anyone in their reporting subtree.
+            Customers are always read from the database; with the cached tree only the subtree walk is skipped.
+
+            :param manager_id: The ID of the manager at the top of the branch.
+            :param max_depth: Deepest level of the branch to include (0 for the manager only), or None for all.
+            :return: A list of Customer entities ordered by customer ID.
+        """
+        tree = self._get_tree()
+        if tree is not None:
+            rows = self._customer_dao.get_customers_by_support_reps(tree.subtree_ids(manager_id, max_depth))
+        else:
+            rows = self._customer_dao.get_customers_under(manager_id, max_depth)
+        return [self._to_customer(row) for row in rows]
+
+    def close(self):
+        """Close the repository's connection; a pooled connection goes back to its pool."""
+        self._dao.conn.close()
@@ -0,0 +1,202 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from db.dao.impl.InvoiceDao import InvoiceDao
+from db.models.Invoice import Invoice
+from db.models.InvoiceItem import InvoiceItem
+import os
+import sqlite3
+import threading
+
+class InvoiceRepository:
+    """
+    Read-only repository for invoices spread over the hot database and its invoice archives.
+    Callers do not know where an invoice lives: every query reads the hot tables and only
+    the archives whose manifest entry (date range, ID range) can hold matching rows.
+    Archives are ATTACHed on demand and kept attached, least recently used ones being
+    detached beyond 'max_attached'.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, verbose: bool = False, max_attached: int = 8):
+        """
+        Initialize the InvoiceRepository with a database connection.
+            :param connection: SQLite connection object to the hot database file.
+            :param verbose: If True, print debug information. Default is False.
+            :param max_attached: Maximum number of archives kept attached to the connection.
+        """
+        self._dao = InvoiceDao(connection=connection, verbose=verbose)
+        self.verbose = verbose
+        try:
+            attach_limit = connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        except (AttributeError, sqlite3.Error):
+            attach_limit = 10 # SQLite's default SQLITE_MAX_ATTACHED
+        self.max_attached = max(1, min(max_attached, attach_limit))
+        self._attached = OrderedDict() # alias -> path, least recently used first
+        self._lock = threading.RLock() # Attaching and detaching must not interleave with queries
+
+    def _to_entity(self, row) -> Invoice:
+        return Invoice(invoice_id=row[InvoiceDao._field_id],
+                       customer_id=row[InvoiceDao._field_customer_id],
+                       invoice_date=row[InvoiceDao._field_date],
+                       billing_address=row[InvoiceDao._field_billing_address],
+                       billing_city=row[InvoiceDao._field_billing_city],
+                       billing_state=row[InvoiceDao._field_billing_state],
+                       billing_country=row[InvoiceDao._field_billing_country],
+                       billing_postal_code=row[InvoiceDao._field_billing_postal_code],
+                       total=row[InvoiceDao._field_total])
+
+    def _to_item(self, row) -> InvoiceItem:
+        return InvoiceItem(invoice_line_id=row[InvoiceDao._field_line_id],
+                           invoice_id=row[InvoiceDao._field_id],
+                           track_id=row[InvoiceDao._field_track_id],
+                           unit_price=row[InvoiceDao._field_unit_price],
+                           quantity=row[InvoiceDao._field_quantity])
+
+    def _use(self, archives) -> List[str]:
+        """Attach the given manifest entries (at most max_attached of them), return their aliases."""
+        aliases = []
+        for archive in archives:
+            alias = InvoiceDao.archive_alias(archive[InvoiceDao._field_period])
+            path = archive[InvoiceDao._field_path]
+            aliases.append(alias)
+            if alias in self._attached:
+                self._attached.move_to_end(alias)
+                continue
+            while len(self._attached) >= self.max_attached:
+                evicted = next(a for a in self._attached if a not in aliases)
+                self._dao.detach_archive(evicted)
+                del self._attached[evicted]
+            if not os.path.exists(path):
+                # ATTACH would silently create an empty file and hide the archived invoices.
+                raise Exception(f"{self.__class__.__name__}::Invoice archive '{path}' is missing.")
+            self._dao.attach_archive(path, alias)
+            self._attached[alias] = path
+        return aliases
+
+    def _in_groups(self, archives):
+        """Split manifest entries into groups that can be attached at the same time."""
+        return [archives[i:i + self.max_attached] for i in range(0, len(archives), self.max_attached)]
+
+    def get_archives(self) -> List[dict]:
+        """Get the manifest of the invoice archives.
+
+            :return: A list of dictionaries with period, path, first/last date and ID, invoice and line counts.
+        """
+        return [{"period": row[InvoiceDao._field_period],
+                 "path": row[InvoiceDao._field_path],
+                 "first_date": row[InvoiceDao._field_first_date],
+                 "last_date": row[InvoiceDao._field_last_date],
+                 "first_id": row[InvoiceDao._field_first_id],
+                 "last_id": row[InvoiceDao._field_last_id],
+                 "invoice_count": row[InvoiceDao._field_invoice_count],
+                 "line_count": row[InvoiceDao._field_line_count],
+                 "archived_at": row[InvoiceDao._field_archived_at]}
+                for row in self._dao.get_archives()]
+
+    def _archives_holding_id(self, invoice_id: int):
+        return [archive for archive in self._dao.get_archives()
+                if archive[InvoiceDao._field_first_id] <= invoice_id <= archive[InvoiceDao._field_last_id]]
+
+    def _find_rows(self, invoice_ids: List[int]) -> Tuple[dict, dict]:
+        """Rows of the given invoices, from the hot tables first, then from the archives covering their IDs."""
+        with self._lock:
+            found = self._dao.get_invoices_by_ids(invoice_ids)
+            sources = dict.fromkeys(found, "main")
+            missing = [invoice_id for invoice_id in invoice_ids if invoice_id not in found]
+            if missing:
+                candidates = [archive for archive in self._dao.get_archives()
+                              if any(archive[InvoiceDao._field_first_id] <= invoice_id <= archive[InvoiceDao._field_last_id]
+                                     for invoice_id in missing)]
+                for group in self._in_groups(candidates):
+                    for alias in self._use(group):
+                        rows = self._dao.get_invoices_by_ids(missing, schema=alias)
+                        for invoice_id, row in rows.items():
+                            found.setdefault(invoice_id, row)
+                            sources.setdefault(invoice_id, alias)
+                        missing = [invoice_id for invoice_id in missing if invoice_id not in found]
+                        if not missing:
+                            return found, sources
+            return found, sources
+
+    def get_by_id(self, invoice_id: int) -> Optional[Invoice]:
+        """Get an invoice by ID, wherever it is stored.
+
+            :param invoice_id: The ID of the invoice to retrieve.
+            :return: An Invoice entity if found, or None if not found.
+        """
+        found, _ = self._find_rows([invoice_id])
+        row = found.get(invoice_id)
+        return self._to_entity(row) if row is not None else None
+
+    def get_many(self, invoice_ids: List[int]) -> Tuple[List[Invoice], List[int]]:
+        """Get several invoices by ID, wherever they are stored.
+
+            :param invoice_ids: The IDs of the invoices to retrieve.
+            :return: A tuple (invoices, missing_ids): Invoice entities in input order and the IDs not found.
+        """
+        found, _ = self._find_rows(invoice_ids)
+        invoices = [self._to_entity(found[invoice_id]) for invoice_id in invoice_ids if invoice_id in found]
+        return invoices, [invoice_id for invoice_id in invoice_ids if invoice_id not in found]
+
+    def find_by_date_range(self, start: Optional[str] = None, end: Optional[str] = None,
+                           customer_id: Optional[int] = None) -> List[Invoice]:
+        """Get the invoices dated in [start, end), reading only the archives overlapping the range.
+
+            :param start: First date 'YYYY-MM-DD[ HH:MM:SS]' (inclusive), or None for no lower bound.
+            :param end: Last date (exclusive), or None for no upper bound.
+            :param customer_id: Restrict to one customer, or None for every customer.
+            :return: A list of Invoice entities ordered by date.
+        """
+        with self._lock:
+            archives = [archive for archive in self._dao.get_archives()
+                        if (end is None or archive[InvoiceDao._field_first_date] < end)
+                        and (start is None or archive[InvoiceDao._field_last_date] >= start)]
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Range [{start}, {end}) reads {len(archives)} archive(s).")
+            groups = self._in_groups(archives) or [[]]
+            rows = []
+            for index, group in enumerate(groups):
+                schemas = (["main"] if index == 0 else []) + self._use(group)
+                rows.extend(self._dao.get_invoices_by_date_range(schemas, start=start, end=end, customer_id=customer_id))
+        if len(groups) > 1:
+            rows.sort(key=lambda row: (row[InvoiceDao._field_date], row[InvoiceDao._field_id]))
+        # An invoice copied to its archive but not yet removed from the hot tables is read once, from the hot tables.
+        unique = {}
+        for row in rows:
+            invoice_id = row[InvoiceDao._field_id]
+            if invoice_id not in unique or row[InvoiceDao._field_source] == "main":
+                unique[invoice_id] = row
+        return [self._to_entity(row) for row in unique.values()]
+
+    def get_by_customer(self, customer_id: int, since: Optional[str] = None) -> List[Invoice]:
+        """Get the invoices of a customer, ordered by date.
+
+            :param customer_id: The ID of the customer.
+            :param since: Only invoices dated from this date on, which skips older archives; None for all.
+            :return: A list of Invoice entities.
+        """
+        return self.find_by_date_range(start=since, customer_id=customer_id)
+
+    def get_items(self, invoice_id: int) -> List[InvoiceItem]:
+        """Get the lines of an invoice, from the database that holds the invoice.
+
+            :param invoice_id: The ID of the invoice.
+            :return: A list of InvoiceItem entities, empty if the invoice does not exist.
+        """
+        with self._lock:
+            found, sources = self._find_rows([invoice_id])
+            if invoice_id not in found:
+                return []
+            schema = sources[invoice_id]
+            if schema != "main":
+                self._use([archive for archive in self._archives_holding_id(invoice_id)
+                           if InvoiceDao.archive_alias(archive[InvoiceDao._field_period]) == schema])
+            return [self._to_item(row) for row in self._dao.get_invoice_items(invoice_id, schema=schema)]
+
+    def close(self):
+        """Detach every archive attached by this repository and close its connection;
+        a pooled connection goes back to its pool."""
+        with self._lock:
+            for alias in list(self._attached):
+                self._dao.detach_archive(alias)
+            self._attached.clear()
+            self._dao.conn.close()
@@ -0,0 +1,87 @@
+from typing import List, Optional
+from db.dao.impl.SalesAnalyticsDao import SalesAnalyticsDao
+from db.models.SalesSummary import SalesSummary
+import sqlite3
+
+class SalesAnalyticsRepository:
+    """
+    Read-only repository for the materialized sales summaries.
+    Converts summary rows into SalesSummary domain objects.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, verbose: bool = False):
+        """
+        Initialize the SalesAnalyticsRepository with a database connection.
+            :param connection: SQLite connection object.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self._dao = SalesAnalyticsDao(connection=connection, verbose=verbose)
+
+    def ensure_summaries(self) -> bool:
+        """Create the summary tables and triggers if needed and rebuild them when stale.
+
+            :return: True if a rebuild was performed, False if the summaries were already fresh.
+        """
+        self._dao.create_summary_tables()
+        if self._dao.get_staleness()["is_stale"]:
+            self._dao.rebuild_summaries()
+            return True
+        return False
+
+    def rebuild(self) -> int:
+        """Fully rebuild every summary table.
+
+            :return: The number of invoice lines aggregated.
+        """
+        return self._dao.rebuild_summaries()
+
+    def get_staleness(self) -> dict:
+        """Get the staleness indicator of the summaries.
+
+            :return: A dictionary as returned by SalesAnalyticsDao.get_staleness().
+        """
+        return self._dao.get_staleness()
+
+    def _get_summary(self, dimension: str, limit: Optional[int], order_by_revenue: bool = True) -> List[SalesSummary]:
+        rows = self._dao.get_summary(dimension, limit=limit, order_by_revenue=order_by_revenue)
+        return [SalesSummary(dimension=dimension,
+                             key=row["SummaryKey"],
+                             revenue=row[SalesAnalyticsDao._field_revenue],
+                             quantity=row[SalesAnalyticsDao._field_quantity],
+                             line_count=row[SalesAnalyticsDao._field_line_count])
+                for row in rows]
+
+    def get_revenue_by_artist(self, limit: Optional[int] = None) -> List[SalesSummary]:
+        """Get revenue per artist, highest first.
+
+            :param limit: Maximum number of artists to return, or None for all.
+            :return: A list of SalesSummary entities keyed by ArtistId.
+        """
+        return self._get_summary("artist", limit)
+
+    def get_revenue_by_genre(self, limit: Optional[int] = None) -> List[SalesSummary]:
+        """Get revenue per genre, highest first.
+
+            :param limit: Maximum number of genres to return, or None for all.
+            :return: A list of SalesSummary entities keyed by GenreId.
+        """
+        return self._get_summary("genre", limit)
+
+    def get_revenue_by_country(self, limit: Optional[int] = None) -> List[SalesSummary]:
+        """Get revenue per customer billing country, highest first.
+
+            :param limit: Maximum number of countries to return, or None for all.
+            :return: A list of SalesSummary entities keyed by country name.
+        """
+        return self._get_summary("country", limit)
+
+    def get_revenue_by_month(self) -> List[SalesSummary]:
+        """Get revenue per month in chronological order.
+
+            :return: A list of SalesSummary entities keyed by 'YYYY-MM'.
+        """
+        return self._get_summary("month", None, order_by_revenue=False)
+
+    def close(self):
+        """Close the repository's connection; a pooled connection goes back to its pool."""
+        self._dao.conn.close()
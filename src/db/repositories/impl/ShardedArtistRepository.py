@@ -0,0 +1,275 @@
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import threading
+from db.connection.impl.ShardedSQLiteConnectionProvider import ShardedSQLiteConnectionProvider
+from db.dao.impl.ArtistDao import ArtistDao
+from db.dao.Criteria import Criteria
+from db.repositories.IRepository import IRepository
+from db.models.Artist import Artist
+
+class ShardedArtistRepository(IRepository[Artist]):
+    """
+    Repository for Artist entities partitioned across several SQLite files.
+    Point operations (by ID) are routed to a single shard; get_all, searches and
+    aggregates are scattered to every shard in parallel and the results merged.
+    Each shard only answers for the IDs it owns, so a copy left on the wrong shard is ignored.
+    New artists are spread round-robin over the shards and get an ID owned by
+    their shard, so later lookups by ID route back to it.
+    """
+
+    def __init__(self, connection_provider: ShardedSQLiteConnectionProvider, verbose: bool = False):
+        """
+        Initialize the ShardedArtistRepository with one connection per shard.
+            :param connection_provider: Sharded connection provider.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self._provider = connection_provider
+        self._daos = [ArtistDao(connection=conn, verbose=verbose)
+                      for conn in connection_provider.get_shard_connections()]
+        self._executor = ThreadPoolExecutor(max_workers=len(self._daos),
+                                            thread_name_prefix="ShardedArtistRepository")
+        self._next_shard = itertools.count()
+        self._next_shard_lock = threading.Lock()
+        self.verbose = verbose
+
+    def _dao_for(self, artist_id: int) -> ArtistDao:
+        return self._daos[self._provider.shard_for_key(artist_id)]
+
+    def _scatter(self, call) -> list:
+        """Run call(dao) on every shard in parallel and return the results in shard order."""
+        return list(self._executor.map(call, self._daos))
+
+    def _owned(self, shard_index: int, criteria: Optional[Criteria]) -> Criteria:
+        """Restrict a Criteria to the IDs a shard owns, so a row left on another shard
+        (e.g. by an interrupted reshard) is never read twice."""
+        owned = criteria.copy() if criteria is not None else Criteria()
+        if self._provider.strategy == "range":
+            bounds = self._provider.range_bounds
+            if shard_index > 0:
+                owned.where(ArtistDao._field_id, ">=", bounds[shard_index - 1])
+            if shard_index < len(bounds):
+                owned.where(ArtistDao._field_id, "<", bounds[shard_index])
+        elif self._provider.shard_count > 1:
+            owned.mod(ArtistDao._field_id, self._provider.shard_count, shard_index)
+        return owned
+
+    def _scatter_owned(self, call, criteria: Optional[Criteria]) -> list:
+        """Run call(dao, criteria) on every shard in parallel, each restricted to the IDs it owns."""
+        return list(self._executor.map(lambda index: call(self._daos[index], self._owned(index, criteria)),
+                                       range(len(self._daos))))
+
+    @staticmethod
+    def _sort_key(value):
+        """Order values like SQLite does across storage classes: NULL, numbers, text, then blobs."""
+        if value is None:
+            return (0, 0)
+        if isinstance(value, (int, float)):
+            return (1, value)
+        if isinstance(value, str):
+            return (2, value)
+        return (3, bytes(value))
+
+    @staticmethod
+    def _to_entity(db_artist) -> Artist:
+        keys = db_artist.keys()
+        return Artist(
+            artist_id=db_artist[ArtistDao._field_id] if ArtistDao._field_id in keys else None,
+            name=db_artist[ArtistDao._field_name] if ArtistDao._field_name in keys else None
+        )
+
+    def add(self, entity: Artist) -> Optional[Artist]:
+        """Add a new artist on the next shard (round-robin), with an ID owned by that shard.
+
+            :param entity: Artist entity to add.
+            :return: The added Artist entity with artist_id set, or None if the operation failed.
+        """
+        if entity.name is None:
+            return None
+        with self._next_shard_lock:
+            first_shard = next(self._next_shard)
+        for attempt in range(len(self._daos)):
+            shard_index = (first_shard + attempt) % len(self._daos)
+            try:
+                artist_id = self._daos[shard_index].insert_with_next_id(
+                    entity.name, lambda current_max: self._provider.next_id(shard_index, current_max))
+            except OverflowError:
+                # With range sharding a shard whose ID range is exhausted is skipped.
+                continue
+            if artist_id == -1:
+                return None
+            entity.artist_id = artist_id
+            return entity
+        raise OverflowError(f"{self.__class__.__name__}::Every shard has exhausted its ID range.")
+
+    def get_by_id(self, entity_id: int) -> Optional[Artist]:
+        """Get an artist by ID from the shard owning it.
+
+            :param entity_id: The ID of the artist to retrieve.
+            :return: An Artist entity if found, or None if not found.
+        """
+        db_artist = self._dao_for(entity_id).get_artist_by_id(entity_id)
+        return self._to_entity(db_artist) if db_artist else None
+
+    def get_many(self, entity_ids: List[int]) -> Tuple[List[Artist], List[int]]:
+        """Get several artists by ID, one multi-get per involved shard, in parallel.
+
+            :param entity_ids: The IDs of the artists to retrieve.
+            :return: A tuple (artists, missing_ids): Artist entities in input order and the IDs not found.
+        """
+        ids_by_shard = {}
+        for artist_id in entity_ids:
+            ids_by_shard.setdefault(self._provider.shard_for_key(artist_id), []).append(artist_id)
+        found = {}
+        results = self._executor.map(lambda item: self._daos[item[0]].get_artists_by_ids(item[1])[0],
+                                     ids_by_shard.items())
+        for rows in results:
+            for db_artist in rows:
+                found[db_artist[ArtistDao._field_id]] = db_artist
+        artists = [self._to_entity(found[artist_id]) for artist_id in entity_ids if artist_id in found]
+        missing_ids = [artist_id for artist_id in entity_ids if artist_id not in found]
+        return artists, missing_ids
+
+    def update(self, entity: Artist) -> bool:
+        """Update an artist on the shard owning it.
+
+            :param entity: Artist entity with updated information.
+            :return: True if the update was successful, False otherwise.
+        """
+        if entity.artist_id is None or entity.name is None:
+            return False
+        return self._dao_for(entity.artist_id).update(entity.artist_id, entity.name)
+
+    def delete(self, entity_id: int) -> bool:
+        """Delete an artist from the shard owning it.
+
+            :param entity_id: The ID of the artist to delete.
+            :return: True if the deletion was successful, False otherwise.
+        """
+        return self._dao_for(entity_id).delete(entity_id)
+
+    def get_all(self) -> List[Artist]:
+        """Get all artists from every shard, merged in ID order.
+
+            :return: A list of Artist entities sorted by artist_id.
+        """
+        per_shard = self._scatter_owned(lambda dao, owned: dao.find(owned), Criteria().order_by(ArtistDao._field_id))
+        merged = heapq.merge(*per_shard, key=lambda db_artist: db_artist[ArtistDao._field_id])
+        return [self._to_entity(db_artist) for db_artist in merged]
+
+    def get_by_name(self, name: str) -> Optional[Artist]:
+        """Get an artist by name, searching every shard in parallel.
+
+            :param name: The name of the artist to retrieve.
+            :return: The matching Artist with the lowest ID, or None if not found.
+        """
+        matches = [row for index, row in enumerate(self._scatter(lambda dao: dao.get_artist_by_name(name)))
+                   if row and self._provider.shard_for_key(row[ArtistDao._field_id]) == index]
+        if not matches:
+            return None
+        return self._to_entity(min(matches, key=lambda db_artist: db_artist[ArtistDao._field_id]))
+
+    def find(self, criteria: Criteria) -> List[Artist]:
+        """Find artists matching a Criteria on every shard and merge the results.
+            Each shard applies the filters, the ordering and limit + offset; the merged rows are
+            sorted again and the global offset/limit applied.
+
+            :param criteria: The query specification, using ArtistDao column names.
+            :return: A list of Artist entities.
+        """
+        shard_criteria = criteria.copy()
+        order_terms = criteria.order_terms
+        if criteria.row_limit is not None:
+            shard_criteria.limit(criteria.row_limit + (criteria.row_offset or 0))
+        if criteria.columns is not None:
+            # Ordering fields are needed to merge, even if they are not projected.
+            extra = [field for field, _ in order_terms if field not in criteria.columns]
+            shard_criteria.select(*criteria.columns, *extra)
+
+        rows = [row for shard_rows in self._scatter_owned(lambda dao, owned: dao.find(owned), shard_criteria)
+                for row in shard_rows]
+        # Stable sorts from the last ordering term to the first, in SQLite's order of storage classes.
+        for field, descending in reversed(order_terms):
+            rows.sort(key=lambda row: self._sort_key(row[field]), reverse=descending)
+        offset = criteria.row_offset or 0
+        if criteria.row_limit is not None:
+            rows = rows[offset:offset + criteria.row_limit]
+        elif offset:
+            rows = rows[offset:]
+
+        artists = [self._to_entity(row) for row in rows]
+        if criteria.columns is not None:
+            if ArtistDao._field_id not in criteria.columns:
+                for artist in artists:
+                    artist.artist_id = None
+            if ArtistDao._field_name not in criteria.columns:
+                for artist in artists:
+                    artist.name = None
+        return artists
+
+    def count(self, criteria: Optional[Criteria] = None) -> int:
+        """Count the artists of every shard, one COUNT(*) statement per shard.
+
+            :param criteria: Filters (and limit/offset) using ArtistDao column names, or None for all artists.
+            :return: The total number of matching artists.
+        """
+        if criteria is None or criteria.row_limit is None:
+            return sum(self._scatter_owned(lambda dao, owned: dao.count(owned), criteria))
+        # The limit applies to the merged rows: count every match on every shard, then cut once.
+        unlimited = criteria.row_selection(keep_limit=False)
+        total = sum(self._scatter_owned(lambda dao, owned: dao.count(owned), unlimited))
+        return max(0, min(total - (criteria.row_offset or 0), criteria.row_limit))
+
+    def exists(self, criteria: Optional[Criteria] = None) -> bool:
+        """Check whether any shard has a matching artist.
+
+            :param criteria: Filters using ArtistDao column names, or None for any artist.
+            :return: True if at least one artist matches.
+        """
+        if criteria is not None and criteria.row_limit is not None:
+            # Rows remain after the offset only if the merged total exceeds it.
+            total = self.count(criteria.row_selection(keep_limit=False))
+            return criteria.row_limit > 0 and total > (criteria.row_offset or 0)
+        return any(self._scatter_owned(lambda dao, owned: dao.exists(owned), criteria))
+
+    def _merge_aggregate(self, function: str, field: str, criteria: Optional[Criteria], merge):
+        if criteria is not None and criteria.row_limit is not None:
+            raise ValueError(f"{self.__class__.__name__}::{function} with a limit is not supported across shards.")
+        values = [value for value in self._scatter_owned(lambda dao, owned: dao.aggregate(function, field, owned),
+                                                         criteria)
+                  if value is not None]
+        return merge(values) if values else None
+
+    def min(self, field: str, criteria: Optional[Criteria] = None):
+        """Get the smallest value of a column across shards (one MIN per shard).
+
+            :param field: An ArtistDao column name.
+            :param criteria: Filters on the artists to consider, or None for all.
+            :return: The smallest value, or None if no artist matches.
+        """
+        return self._merge_aggregate("MIN", field, criteria, min)
+
+    def max(self, field: str, criteria: Optional[Criteria] = None):
+        """Get the largest value of a column across shards (one MAX per shard).
+
+            :param field: An ArtistDao column name.
+            :param criteria: Filters on the artists to consider, or None for all.
+            :return: The largest value, or None if no artist matches.
+        """
+        return self._merge_aggregate("MAX", field, criteria, max)
+
+    def sum(self, field: str, criteria: Optional[Criteria] = None):
+        """Sum a column across shards (one SUM per shard).
+
+            :param field: An ArtistDao column name.
+            :param criteria: Filters on the artists to consider, or None for all.
+            :return: The sum, or None if no artist matches.
+        """
+        return self._merge_aggregate("SUM", field, criteria, sum)
+
+    def close(self):
+        """Close the shard connections and the scatter-gather thread pool."""
+        self._executor.shutdown(wait=True)
+        for dao in self._daos:
+            dao.conn.close()
@@ -0,0 +1,176 @@
+from typing import List, Optional, Tuple
+from db.dao.Criteria import Criteria
+from db.repositories.impl.ArtistRepository import ArtistRepository
+from db.services.WriteBehindBuffer import WriteBehindBuffer
+from db.services.AutocompleteService import AutocompleteService
+from db.models.Artist import Artist
+import sqlite3
+
+class WriteBehindArtistRepository(ArtistRepository):
+    """
+    ArtistRepository in write-behind mode.
+    update() and delete() only record the write in a WriteBehindBuffer; repeated writes to
+    the same artist are merged and the buffer is flushed in one transaction on a size or
+    time threshold, on flush() and on close().
+    get_by_id() and get_many() see pending writes. Every other operation flushes the
+    buffer first, so queries and direct writes never observe or overtake stale data.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, verbose: bool = False,
+                 max_pending: int = 1000, flush_interval: float = 1.0,
+                 autocomplete: Optional[AutocompleteService] = None):
+        """
+        Initialize the WriteBehindArtistRepository with a database connection.
+            :param connection: SQLite connection object.
+            :param verbose: If True, print debug information. Default is False.
+            :param max_pending: Number of pending artists triggering a flush.
+            :param flush_interval: Maximum age, in seconds, of a pending write.
+            :param autocomplete: Autocomplete index kept in sync with the writes of this repository;
+                                 buffered writes are indexed as soon as they are buffered, like get_by_id() sees them.
+        """
+        super().__init__(connection=connection, verbose=verbose, autocomplete=autocomplete)
+        self._buffer = WriteBehindBuffer(self._write_batch, max_pending=max_pending,
+                                         flush_interval=flush_interval, verbose=verbose)
+
+    def _write_batch(self, writes):
+        updates = [(artist_id, name) for artist_id, operation, name in writes if operation == WriteBehindBuffer.UPDATE]
+        deletes = [artist_id for artist_id, operation, _ in writes if operation == WriteBehindBuffer.DELETE]
+        return self._dao.write_batch(updates, deletes)
+
+    def update(self, entity: Artist) -> bool:
+        """Buffer an update of an artist's name.
+
+            :param entity: Artist entity with updated information.
+            :return: True if the update was buffered, False if the entity is incomplete.
+        """
+        if entity.artist_id is None or entity.name is None:
+            return False
+        if self._tracker.changes(entity) == {}:
+            return True # No-op update, nothing to buffer
+        self._buffer.put(entity.artist_id, WriteBehindBuffer.UPDATE, entity.name)
+        self._indexed(self._tracker.track(entity))
+        return True
+
+    def delete(self, entity_id: int) -> bool:
+        """Buffer the deletion of an artist.
+
+            :param entity_id: The ID of the artist to delete.
+            :return: True, the deletion is applied at the next flush.
+        """
+        self._buffer.put(entity_id, WriteBehindBuffer.DELETE)
+        if self._autocomplete is not None:
+            self._autocomplete.remove(AutocompleteService.ARTIST, entity_id)
+        return True
+
+    def get_by_id(self, entity_id: int) -> Optional[Artist]:
+        """Get an artist by ID, including its pending write."""
+        pending = self._buffer.get_pending(entity_id)
+        if pending is not None and pending[0] == WriteBehindBuffer.DELETE:
+            return None
+        artist = super().get_by_id(entity_id)
+        if artist is not None and pending is not None:
+            artist.name = pending[1]
+            self._tracker.track(artist) # Compare later updates with the pending state
+        return artist
+
+    def get_many(self, entity_ids: List[int]) -> Tuple[List[Artist], List[int]]:
+        """Get several artists by ID, including their pending writes."""
+        artists, missing_ids = super().get_many(entity_ids)
+        visible = []
+        for artist in artists:
+            pending = self._buffer.get_pending(artist.artist_id)
+            if pending is None:
+                visible.append(artist)
+            elif pending[0] == WriteBehindBuffer.UPDATE:
+                artist.name = pending[1]
+                self._tracker.track(artist)
+                visible.append(artist)
+        found = {artist.artist_id for artist in visible}
+        return visible, [artist_id for artist_id in entity_ids if artist_id not in found]
+
+    def flush(self) -> int:
+        """Write every pending update and delete now, in one transaction.
+
+            :return: The number of artists written.
+        """
+        return self._buffer.flush()
+
+    def get_write_behind_stats(self) -> dict:
+        """Report the backlog, coalescing and flush latency of the write-behind buffer."""
+        return self._buffer.get_stats()
+
+    def close(self):
+        """Flush pending writes, stop the background flush thread and close the connection.
+            If writes could not be flushed, the connection stays open so flush() can be retried.
+        """
+        try:
+            self._buffer.close()
+        except Exception:
+            if self._buffer.backlog == 0:
+                super().close()
+            raise
+        super().close()
+
+    def add(self, entity: Artist) -> Optional[Artist]:
+        self.flush()
+        return super().add(entity)
+
+    def get_all(self) -> List[Artist]:
+        self.flush()
+        return super().get_all()
+
+    def find(self, criteria: Criteria) -> List[Artist]:
+        self.flush()
+        return super().find(criteria)
+
+    def get_by_name(self, name: str) -> Optional[Artist]:
+        self.flush()
+        return super().get_by_name(name)
+
+    def count(self, criteria: Optional[Criteria] = None) -> int:
+        self.flush()
+        return super().count(criteria)
+
+    def exists(self, criteria: Optional[Criteria] = None) -> bool:
+        self.flush()
+        return super().exists(criteria)
+
+    def min(self, field: str, criteria: Optional[Criteria] = None):
+        self.flush()
+        return super().min(field, criteria)
+
+    def max(self, field: str, criteria: Optional[Criteria] = None):
+        self.flush()
+        return super().max(field, criteria)
+
+    def sum(self, field: str, criteria: Optional[Criteria] = None):
+        self.flush()
+        return super().sum(field, criteria)
+
+    def upsert(self, entity: Artist) -> Optional[Artist]:
+        self.flush()
+        return super().upsert(entity)
+
+    def upsert_many(self, entities: List[Artist]) -> List[Artist]:
+        self.flush()
+        return super().upsert_many(entities)
+
+    def get_or_create(self, name: str) -> Tuple[Optional[Artist], bool]:
+        self.flush()
+        return super().get_or_create(name)
+
+    def get_or_create_many(self, names: List[str]) -> List[Artist]:
+        self.flush()
+        return super().get_or_create_many(names)
+
+    def update_returning(self, entity: Artist) -> Optional[Artist]:
+        self.flush()
+        return super().update_returning(entity)
+
+    def update_many_returning(self, entities: List[Artist]) -> List[Artist]:
+        self.flush()
+        return super().update_many_returning(entities)
+
+    def _json_rows(self, criteria: Optional[Criteria], chunk_rows: int):
+        self.flush()
+        return super()._json_rows(criteria, chunk_rows)
@@ -0,0 +1,178 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+from db.dao.AdmissionController import AdmissionController
+from db.dao.impl.AlbumDao import AlbumDao
+from db.dao.impl.ArtistDao import ArtistDao
+from db.dao.impl.TrackDao import TrackDao
+from db.repositories.PrefixIndex import PrefixIndex
+
+class AutocompleteService:
+    """
+    Type-ahead suggestions over artist, album and track names, answered from PrefixIndex
+    instances held in memory instead of one SQL query per keystroke.
+
+    build() fills the indexes from a streaming scan of each table, so startup memory is
+    the indexes plus one batch of rows. Afterwards the indexes follow writes incrementally:
+    repositories created with this service call put()/remove() after each successful write,
+    and writes made elsewhere (other processes, raw SQL) can be applied from the change
+    log with apply_changes(), which re-reads the changed rows.
+    """
+
+    ARTIST = "artist"
+    ALBUM = "album"
+    TRACK = "track"
+    KINDS = (ARTIST, ALBUM, TRACK)
+
+    # kind -> table, as recorded in the change log
+    _tables = {ARTIST: ArtistDao.tablename, ALBUM: AlbumDao.tablename, TRACK: TrackDao.tablename}
+
+    def __init__(self, connection: sqlite3.Connection, kinds: Sequence[str] = KINDS, match_words: bool = True,
+                 batch_size: int = 5000, verbose: bool = False):
+        """
+        Initialize the service. Call build() before suggesting.
+            :param connection: SQLite connection used to scan the tables and re-read changed rows.
+            :param kinds: The kinds of names to index ('artist', 'album', 'track').
+            :param match_words: If True, names also match on the start of every word after the first.
+            :param batch_size: Number of rows fetched at a time by the startup scan.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        unknown = [kind for kind in kinds if kind not in self.KINDS]
+        if unknown:
+            raise ValueError(f"{self.__class__.__name__}::Unknown kinds {unknown}, expected some of {self.KINDS}.")
+        self._artist_dao = ArtistDao(connection=connection, verbose=verbose)
+        self._album_dao = AlbumDao(connection=connection, verbose=verbose)
+        self._track_dao = TrackDao(connection=connection, verbose=verbose)
+        for dao in (self._artist_dao, self._album_dao, self._track_dao):
+            dao.read_class = AdmissionController.BACKGROUND # Index scans must not delay interactive reads
+        self.kinds = tuple(dict.fromkeys(kinds))
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self._indexes: Dict[str, PrefixIndex] = {kind: PrefixIndex(match_words=match_words) for kind in self.kinds}
+
+    def _scan(self, kind: str):
+        if kind == self.ARTIST:
+            return self._artist_dao.iter_all_artists(batch_size=self.batch_size)
+        if kind == self.ALBUM:
+            return self._album_dao.iter_album_names(batch_size=self.batch_size)
+        return self._track_dao.iter_track_names(batch_size=self.batch_size)
+
+    def _read_name(self, kind: str, entity_id: int) -> Optional[str]:
+        if kind == self.ARTIST:
+            row = self._artist_dao.get_artist_by_id(entity_id)
+            return row[ArtistDao._field_name] if row else None
+        if kind == self.ALBUM:
+            row = self._album_dao.get_album_by_id(entity_id)
+            return row[AlbumDao._field_title] if row else None
+        row = self._track_dao.get_track_by_id(entity_id)
+        return row[TrackDao._field_name] if row else None
+
+    def _index(self, kind: str) -> PrefixIndex:
+        index = self._indexes.get(kind)
+        if index is None:
+            raise ValueError(f"{self.__class__.__name__}::'{kind}' names are not indexed (kinds: {self.kinds}).")
+        return index
+
+    def build(self) -> Dict[str, int]:
+        """
+        (Re)build every index from a streaming scan of its table.
+            :return: The number of names indexed per kind.
+        """
+        counts = {}
+        for kind in self.kinds:
+            start = time.perf_counter()
+            counts[kind] = self._indexes[kind].build((row[0], row[1]) for row in self._scan(kind))
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Indexed {counts[kind]} {kind} names in "
+                      f"{time.perf_counter() - start:.3f}s.")
+        return counts
+
+    def suggest(self, prefix: str, limit: int = 10, kinds: Optional[Sequence[str]] = None) -> List[dict]:
+        """
+        Get the best matches of a prefix across kinds.
+            :param prefix: The text typed so far; case and accents are ignored.
+            :param limit: Maximum number of suggestions.
+            :param kinds: The kinds to search, defaults to every indexed kind.
+            :return: Dictionaries with 'kind', 'id' and 'name' keys: matches on the start of the name
+                     first, then matches on a later word, each in alphabetical order.
+        """
+        matches = []
+        for kind in (kinds if kinds is not None else self.kinds):
+            matches.extend((rank, key, kind, entity_id, name)
+                           for rank, key, entity_id, name in self._index(kind).matches(prefix, limit))
+        matches.sort(key=lambda match: match[:2])
+        return [{"kind": kind, "id": entity_id, "name": name} for _, _, kind, entity_id, name in matches[:limit]]
+
+    def suggest_artists(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Get the best artist matches of a prefix (see suggest)."""
+        return self.suggest(prefix, limit, (self.ARTIST,))
+
+    def suggest_albums(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Get the best album matches of a prefix (see suggest)."""
+        return self.suggest(prefix, limit, (self.ALBUM,))
+
+    def suggest_tracks(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Get the best track matches of a prefix (see suggest)."""
+        return self.suggest(prefix, limit, (self.TRACK,))
+
+    def put(self, kind: str, entity_id: int, name: Optional[str]):
+        """
+        Index a written name. Kinds that are not indexed are ignored.
+            :param kind: 'artist', 'album' or 'track'.
+            :param entity_id: The ID of the written row.
+            :param name: The stored name, or None if the row has no name anymore.
+        """
+        index = self._indexes.get(kind)
+        if index is not None:
+            index.put(entity_id, name)
+
+    def remove(self, kind: str, entity_id: int):
+        """
+        Drop a deleted row from the index. Kinds that are not indexed are ignored.
+            :param kind: 'artist', 'album' or 'track'.
+            :param entity_id: The ID of the deleted row.
+        """
+        index = self._indexes.get(kind)
+        if index is not None:
+            index.remove(entity_id)
+
+    def refresh(self, kind: str, entity_id: int):
+        """
+        Re-read one row and index its current name, or drop it if it no longer exists.
+            :param kind: 'artist', 'album' or 'track'.
+            :param entity_id: The ID of the row.
+        """
+        self._index(kind).put(entity_id, self._read_name(kind, entity_id))
+
+    def apply_changes(self, entries: Iterable) -> int:
+        """
+        Bring the indexes up to date with change log entries (see ChangeLogRepository.tail),
+        e.g. for writes made by other processes. Entries of other tables are skipped.
+            :param entries: ChangeEntry entities.
+            :return: The number of rows refreshed.
+        """
+        kinds = {table: kind for kind, table in self._tables.items() if kind in self._indexes}
+        refreshed = set()
+        for entry in entries:
+            kind = kinds.get(entry.table_name)
+            if kind is not None and (kind, entry.row_id) not in refreshed:
+                refreshed.add((kind, entry.row_id))
+                self.refresh(kind, entry.row_id)
+        return len(refreshed)
+
+    def change_log_tables(self) -> List[str]:
+        """The tables to capture (and to filter the change log on) to keep every indexed kind in sync."""
+        return [self._tables[kind] for kind in self.kinds]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Report the size of the indexes.
+            :return: The number of indexed names per kind.
+        """
+        return {kind: len(index) for kind, index in self._indexes.items()}
@@ -0,0 +1,200 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+from db.connection.impl.SQLiteConnectionProvider import SQLiteConnectionProvider
+
+class BackupService:
+    """
+    Online backups of a live SQLite database through the SQLite backup API.
+    Pages are copied in small steps with a pause between steps, so the source is only
+    locked for the duration of one step and writers are never stalled for the whole copy.
+    Also handles scheduled snapshots with retention and restoring into a fresh path.
+    """
+
+    SNAPSHOT_SUFFIX = ".db"
+
+    def __init__(self, connection_provider: SQLiteConnectionProvider, pages_per_step: int = 64,
+                 step_sleep: float = 0.005, verbose: bool = False):
+        """
+        Initialize the backup service.
+            :param connection_provider: Provider of connections to the database being backed up.
+            :param pages_per_step: Number of pages copied per backup step.
+            :param step_sleep: Seconds to sleep between steps, leaving room for live traffic.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self._connection_provider = connection_provider
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.verbose = verbose
+        self._snapshot_thread = None
+        self._stop_event = threading.Event()
+
+    def _copy(self, source: sqlite3.Connection, destination_path: str,
+              progress: Optional[Callable[[int, int], None]]) -> int:
+        """Copy 'source' into 'destination_path' step by step, atomically replacing the destination."""
+        dir_path = os.path.dirname(destination_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        partial_path = destination_path + ".partial"
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+        copied = {"total": 0}
+
+        def on_step(status, remaining, total):
+            copied["total"] = total
+            if progress is not None:
+                progress(total - remaining, total)
+            # Sleeping here runs between two backup steps, when the source is not locked.
+            if remaining and self.step_sleep:
+                time.sleep(self.step_sleep)
+
+        destination = sqlite3.connect(partial_path)
+        try:
+            source.backup(destination, pages=self.pages_per_step, progress=on_step)
+        finally:
+            destination.close()
+        os.replace(partial_path, destination_path)
+        return copied["total"]
+
+    def backup(self, destination_path: str, progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        Take an online backup of the database.
+            :param destination_path: Path of the backup file; replaced atomically when the copy completes.
+            :param progress: Optional callback called after each step with (copied_pages, total_pages).
+            :return: A report dictionary with path, pages and seconds keys.
+        """
+        started = time.perf_counter()
+        source = self._connection_provider.get_connection()
+        try:
+            pages = self._copy(source, destination_path, progress)
+        finally:
+            source.close()
+        seconds = time.perf_counter() - started
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Backed up {pages} pages to '{destination_path}' in {seconds:.3f}s")
+        return {"path": destination_path, "pages": pages, "seconds": seconds}
+
+    def restore(self, snapshot_path: str, target_path: str,
+                progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        Restore a snapshot into a fresh database file.
+        The target must not exist, so a live database is never overwritten in place.
+            :param snapshot_path: Path of the snapshot to restore.
+            :param target_path: Path of the new database file.
+            :param progress: Optional callback called after each step with (copied_pages, total_pages).
+            :return: A report dictionary with path, pages and seconds keys.
+        """
+        if not os.path.exists(snapshot_path):
+            raise FileNotFoundError(f"{self.__class__.__name__}::Snapshot '{snapshot_path}' does not exist.")
+        if os.path.exists(target_path):
+            raise FileExistsError(f"{self.__class__.__name__}::Restore target '{target_path}' already exists.")
+
+        started = time.perf_counter()
+        source = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+        try:
+            pages = self._copy(source, target_path, progress)
+        finally:
+            source.close()
+
+        restored = sqlite3.connect(target_path)
+        try:
+            check = restored.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            restored.close()
+        if check != "ok":
+            raise sqlite3.DatabaseError(f"{self.__class__.__name__}::Restored database failed quick_check: {check}")
+
+        seconds = time.perf_counter() - started
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Restored '{snapshot_path}' to '{target_path}' in {seconds:.3f}s")
+        return {"path": target_path, "pages": pages, "seconds": seconds}
+
+    def _snapshot_prefix(self) -> str:
+        return os.path.splitext(os.path.basename(self._connection_provider.database_path))[0] + "-"
+
+    def list_snapshots(self, directory: str) -> List[str]:
+        """
+        List the snapshots of this database in a directory, oldest first.
+            :param directory: Snapshot directory.
+            :return: A list of snapshot paths.
+        """
+        if not os.path.isdir(directory):
+            return []
+        prefix = self._snapshot_prefix()
+        names = sorted(name for name in os.listdir(directory)
+                       if name.startswith(prefix) and name.endswith(self.SNAPSHOT_SUFFIX))
+        return [os.path.join(directory, name) for name in names]
+
+    def snapshot(self, directory: str, retention: Optional[int] = None,
+                 progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        Take a timestamped snapshot into a directory and apply the retention policy.
+            :param directory: Snapshot directory.
+            :param retention: Number of snapshots to keep, or None to keep all of them.
+            :param progress: Optional callback called after each step with (copied_pages, total_pages).
+            :return: The backup report of the new snapshot.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(directory, f"{self._snapshot_prefix()}{timestamp}{self.SNAPSHOT_SUFFIX}")
+        report = self.backup(path, progress=progress)
+        if retention is not None:
+            self.apply_retention(directory, retention)
+        return report
+
+    def apply_retention(self, directory: str, retention: int) -> List[str]:
+        """
+        Delete the oldest snapshots so that at most 'retention' remain.
+            :param directory: Snapshot directory.
+            :param retention: Number of snapshots to keep.
+            :return: The list of deleted snapshot paths.
+        """
+        snapshots = self.list_snapshots(directory)
+        expired = snapshots[:max(0, len(snapshots) - retention)]
+        for path in expired:
+            os.remove(path)
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Removed expired snapshot '{path}'")
+        return expired
+
+    def start_scheduled_snapshots(self, directory: str, interval_seconds: float, retention: int = 7):
+        """
+        Start a background thread taking a snapshot every 'interval_seconds'.
+            :param directory: Snapshot directory.
+            :param interval_seconds: Delay between two snapshots.
+            :param retention: Number of snapshots to keep.
+        """
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            raise RuntimeError(f"{self.__class__.__name__}::Scheduled snapshots are already running.")
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(interval_seconds):
+                try:
+                    self.snapshot(directory, retention=retention)
+                except Exception as e:
+                    # A failed snapshot must not stop the schedule; the next run retries.
+                    if self.verbose:
+                        print(f"{self.__class__.__name__}::Scheduled snapshot failed: {e}")
+
+        self._snapshot_thread = threading.Thread(target=run, name="BackupService-snapshots", daemon=True)
+        self._snapshot_thread.start()
+
+    def stop_scheduled_snapshots(self, timeout: Optional[float] = None):
+        """
+        Stop the background snapshot thread, waiting for a running snapshot to finish.
+            :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        """
+        self._stop_event.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout)
+            self._snapshot_thread = None
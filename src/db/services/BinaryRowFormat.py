@@ -0,0 +1,115 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import struct
+from typing import BinaryIO, Iterator, List, Sequence
+
+class BinaryRowFormat:
+    """
+    Compact binary row format used by the bulk exporter and loader.
+
+    Layout:
+        magic 'SQRW1\\n'
+        u16 column count, then for each column: u16 length + UTF-8 name
+        for each row: u8 0x01, then one tagged value per column
+        u8 0x00 end marker
+
+    Value tags: 0 NULL, 1 int64, 2 float64, 3 UTF-8 text (u32 length), 4 blob (u32 length).
+    All integers are little-endian.
+    """
+
+    MAGIC = b"SQRW1\n"
+    _ROW = b"\x01"
+    _END = b"\x00"
+    _TAG_NULL = 0
+    _TAG_INT = 1
+    _TAG_FLOAT = 2
+    _TAG_TEXT = 3
+    _TAG_BLOB = 4
+
+    _u16 = struct.Struct("<H")
+    _u32 = struct.Struct("<I")
+    _i64 = struct.Struct("<q")
+    _f64 = struct.Struct("<d")
+
+    @classmethod
+    def write_header(cls, stream: BinaryIO, columns: Sequence[str]):
+        """Write the magic and the column names."""
+        stream.write(cls.MAGIC)
+        stream.write(cls._u16.pack(len(columns)))
+        for column in columns:
+            encoded = column.encode("utf-8")
+            stream.write(cls._u16.pack(len(encoded)))
+            stream.write(encoded)
+
+    @classmethod
+    def write_row(cls, stream: BinaryIO, row: Sequence):
+        """Write one row of values."""
+        parts = [cls._ROW]
+        for value in row:
+            if value is None:
+                parts.append(bytes((cls._TAG_NULL,)))
+            elif isinstance(value, bool) or isinstance(value, int):
+                parts.append(bytes((cls._TAG_INT,)) + cls._i64.pack(int(value)))
+            elif isinstance(value, float):
+                parts.append(bytes((cls._TAG_FLOAT,)) + cls._f64.pack(value))
+            elif isinstance(value, (bytes, bytearray, memoryview)):
+                data = bytes(value)
+                parts.append(bytes((cls._TAG_BLOB,)) + cls._u32.pack(len(data)) + data)
+            else:
+                data = str(value).encode("utf-8")
+                parts.append(bytes((cls._TAG_TEXT,)) + cls._u32.pack(len(data)) + data)
+        stream.write(b"".join(parts))
+
+    @classmethod
+    def write_end(cls, stream: BinaryIO):
+        """Write the end marker."""
+        stream.write(cls._END)
+
+    @classmethod
+    def _read_exact(cls, stream: BinaryIO, size: int) -> bytes:
+        data = stream.read(size)
+        if len(data) != size:
+            raise ValueError(f"{cls.__name__}::Unexpected end of stream.")
+        return data
+
+    @classmethod
+    def read_header(cls, stream: BinaryIO) -> List[str]:
+        """Read the magic and return the column names."""
+        if cls._read_exact(stream, len(cls.MAGIC)) != cls.MAGIC:
+            raise ValueError(f"{cls.__name__}::Not a binary row stream.")
+        (count,) = cls._u16.unpack(cls._read_exact(stream, cls._u16.size))
+        columns = []
+        for _ in range(count):
+            (length,) = cls._u16.unpack(cls._read_exact(stream, cls._u16.size))
+            columns.append(cls._read_exact(stream, length).decode("utf-8"))
+        return columns
+
+    @classmethod
+    def iter_rows(cls, stream: BinaryIO, column_count: int) -> Iterator[tuple]:
+        """Yield the rows that follow the header, one tuple at a time."""
+        while True:
+            marker = cls._read_exact(stream, 1)
+            if marker == cls._END:
+                return
+            if marker != cls._ROW:
+                raise ValueError(f"{cls.__name__}::Corrupted row marker {marker!r}.")
+            values = []
+            for _ in range(column_count):
+                tag = cls._read_exact(stream, 1)[0]
+                if tag == cls._TAG_NULL:
+                    values.append(None)
+                elif tag == cls._TAG_INT:
+                    values.append(cls._i64.unpack(cls._read_exact(stream, 8))[0])
+                elif tag == cls._TAG_FLOAT:
+                    values.append(cls._f64.unpack(cls._read_exact(stream, 8))[0])
+                elif tag in (cls._TAG_TEXT, cls._TAG_BLOB):
+                    (length,) = cls._u32.unpack(cls._read_exact(stream, 4))
+                    data = cls._read_exact(stream, length)
+                    values.append(data.decode("utf-8") if tag == cls._TAG_TEXT else data)
+                else:
+                    raise ValueError(f"{cls.__name__}::Unknown value tag {tag}.")
+            yield tuple(values)
@@ -0,0 +1,139 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import base64
+import csv
+import io
+import itertools
+import json
+import sqlite3
+import time
+from db.dao.AdmissionController import AdmissionController
+from db.dao.SQLiteDao import SQLiteDao
+from db.services.BinaryRowFormat import BinaryRowFormat
+
+class BulkExporter:
+    """
+    Streams a table or a query result to CSV, JSON Lines or the compact binary row format.
+    Rows are pulled from SQLite in batches and written immediately, so memory use is
+    constant whatever the size of the table. Rows are read through SQLiteDao.iter_query,
+    so exports honour query deadlines, cancellation and admission control.
+    """
+
+    FORMATS = ("csv", "jsonl", "binary")
+
+    def __init__(self, connection: sqlite3.Connection, batch_size: int = 5000, verbose: bool = False):
+        """
+        Initialize the exporter with a database connection.
+            :param connection: SQLite connection object.
+            :param batch_size: Number of rows fetched from SQLite at a time.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self._dao = SQLiteDao(connection=connection, verbose=False)
+        self._dao.read_class = AdmissionController.BACKGROUND # Full scans must not delay interactive reads
+        self.batch_size = batch_size
+        self.verbose = verbose
+
+    def export_table(self, table_name: str, destination, fmt: str = "csv", timeout: float = None) -> dict:
+        """
+        Export every row of a table.
+            :param table_name: Name of an existing table.
+            :param destination: A file path or an open stream (text for csv/jsonl, binary for binary).
+            :param fmt: One of 'csv', 'jsonl' or 'binary'.
+            :param timeout: Deadline in seconds for the whole export (see export_query).
+            :return: A report dictionary with rows, seconds and rows_per_sec keys.
+        """
+        if not self._dao.is_table_exist(table_name):
+            raise ValueError(f"{self.__class__.__name__}::Table '{table_name}' does not exist.")
+        return self.export_query(f'SELECT * FROM "{table_name}"', destination=destination, fmt=fmt, timeout=timeout)
+
+    def export_query(self, query: str, destination, params=None, fmt: str = "csv", timeout: float = None) -> dict:
+        """
+        Export the result of a read query.
+            :param query: The SELECT statement to export.
+            :param destination: A file path or an open stream (text for csv/jsonl, binary for binary).
+            :param params: Parameters to bind to the query.
+            :param fmt: One of 'csv', 'jsonl' or 'binary'.
+            :param timeout: Deadline in seconds for the whole export; raises QueryTimeoutError when
+                            exceeded. Defaults to the connection's default_query_timeout.
+            :return: A report dictionary with rows, seconds and rows_per_sec keys.
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"{self.__class__.__name__}::Unsupported format '{fmt}', expected one of {self.FORMATS}.")
+        if isinstance(destination, str):
+            if fmt == "binary":
+                with open(destination, "wb") as stream:
+                    return self.export_query(query, stream, params=params, fmt=fmt, timeout=timeout)
+            with open(destination, "w", encoding="utf-8", newline="") as stream:
+                return self.export_query(query, stream, params=params, fmt=fmt, timeout=timeout)
+
+        started = time.perf_counter()
+        rows = self._dao.iter_query(query, params=params, batch_size=self.batch_size, timeout=timeout)
+        try:
+            first = next(rows, None)
+            # sqlite3.Row knows its column names; an empty result or plain tuples need the query described.
+            columns = list(first.keys()) if hasattr(first, "keys") else self._describe(query, params)
+            writer = getattr(self, f"_write_{fmt}")
+            row_count = writer(destination, columns, rows if first is None else itertools.chain([first], rows))
+        finally:
+            rows.close()
+
+        return self._report("Exported", row_count, started)
+
+    def _describe(self, query: str, params=None) -> list:
+        """Column names of a query's result, without reading it (LIMIT 0 stops before the first row)."""
+        self._dao._ensure_connected()
+        cursor = self._dao.conn.cursor()
+        try:
+            cursor.execute(f"SELECT * FROM ({query.strip().rstrip(';')}) LIMIT 0", params if params is not None else ())
+            return [description[0] for description in cursor.description]
+        finally:
+            cursor.close()
+
+    def _report(self, action: str, row_count: int, started: float) -> dict:
+        seconds = time.perf_counter() - started
+        rows_per_sec = row_count / seconds if seconds > 0 else float(row_count)
+        if self.verbose:
+            print(f"{self.__class__.__name__}::{action} {row_count} rows in {seconds:.3f}s ({rows_per_sec:,.0f} rows/sec)")
+        return {"rows": row_count, "seconds": seconds, "rows_per_sec": rows_per_sec}
+
+    @staticmethod
+    def _write_csv(stream, columns, rows) -> int:
+        # NULL is written as an empty field; the loader reads empty fields back as NULL.
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+        count = 0
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+            count += 1
+        return count
+
+    @staticmethod
+    def _write_jsonl(stream, columns, rows) -> int:
+        # Blobs have no JSON representation; they are written as {"$blob": "<base64>"}.
+        count = 0
+        for row in rows:
+            record = {}
+            for column, value in zip(columns, row):
+                if isinstance(value, bytes):
+                    value = {"$blob": base64.b64encode(value).decode("ascii")}
+                record[column] = value
+            stream.write(json.dumps(record, ensure_ascii=False))
+            stream.write("\n")
+            count += 1
+        return count
+
+    @staticmethod
+    def _write_binary(stream, columns, rows) -> int:
+        if isinstance(stream, io.TextIOBase):
+            raise ValueError("BulkExporter::The binary format requires a binary stream.")
+        BinaryRowFormat.write_header(stream, columns)
+        count = 0
+        for row in rows:
+            BinaryRowFormat.write_row(stream, row)
+            count += 1
+        BinaryRowFormat.write_end(stream)
+        return count
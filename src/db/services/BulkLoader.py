@@ -0,0 +1,210 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import base64
+import csv
+import itertools
+import json
+import sqlite3
+import time
+from db.dao.SQLiteDao import SQLiteDao
+from db.services.BinaryRowFormat import BinaryRowFormat
+
+class BulkLoader:
+    """
+    Loads CSV, JSON Lines or binary row files produced by BulkExporter into a table.
+    The input is read in chunks, the connection is switched to a bulk-load pragma
+    profile, the secondary indexes of the target table are dropped and rebuilt
+    once at the end, and rows are committed in large batches.
+    """
+
+    FORMATS = ("csv", "jsonl", "binary")
+
+    # Pragmas applied for the duration of a load; previous values are restored afterwards.
+    BULK_PRAGMAS = {
+        "synchronous": "OFF",
+        "temp_store": "MEMORY",
+        "cache_size": "-131072",  # 128 MiB
+        "foreign_keys": "OFF",
+    }
+
+    def __init__(self, connection: sqlite3.Connection, batch_size: int = 5000,
+                 commit_every: int = 100000, verbose: bool = False):
+        """
+        Initialize the loader with a database connection.
+            :param connection: SQLite connection object.
+            :param batch_size: Number of rows read and inserted per executemany() call.
+            :param commit_every: Number of rows inserted per committed transaction.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self._dao = SQLiteDao(connection=connection, verbose=False)
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.verbose = verbose
+
+    def load(self, source, table_name: str, fmt: str = "csv", rebuild_indexes: bool = True,
+             on_conflict: str = None) -> dict:
+        """
+        Load a file or stream into an existing table.
+            :param source: A file path or an open stream (text for csv/jsonl, binary for binary).
+            :param table_name: Name of the target table.
+            :param fmt: One of 'csv', 'jsonl' or 'binary'.
+            :param rebuild_indexes: If True, drop the table's secondary indexes during the load and recreate them afterwards.
+            :param on_conflict: Optional conflict resolution ('IGNORE' or 'REPLACE'), None to fail on conflicts.
+            :return: A report dictionary with rows, seconds and rows_per_sec keys.
+            :raise sqlite3.IntegrityError: When loaded rows reference missing parent rows (if the connection
+                                           enforces foreign keys); the uncommitted rows are rolled back.
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"{self.__class__.__name__}::Unsupported format '{fmt}', expected one of {self.FORMATS}.")
+        if on_conflict not in (None, "IGNORE", "REPLACE"):
+            raise ValueError(f"{self.__class__.__name__}::Unsupported conflict resolution '{on_conflict}'.")
+        if not self._dao.is_table_exist(table_name):
+            raise ValueError(f"{self.__class__.__name__}::Table '{table_name}' does not exist.")
+        if isinstance(source, str):
+            if fmt == "binary":
+                with open(source, "rb") as stream:
+                    return self.load(stream, table_name, fmt, rebuild_indexes, on_conflict)
+            with open(source, "r", encoding="utf-8", newline="") as stream:
+                return self.load(stream, table_name, fmt, rebuild_indexes, on_conflict)
+
+        columns, rows = getattr(self, f"_read_{fmt}")(source)
+        if not columns:
+            return {"rows": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+        self._check_columns(table_name, columns)
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        verb = f"INSERT OR {on_conflict}" if on_conflict else "INSERT"
+        query = f'{verb} INTO "{table_name}" ({column_list}) VALUES ({placeholders})'
+
+        started = time.perf_counter()
+        conn = self._dao.conn
+        with self._dao._write_lock:
+            previous_pragmas = self._apply_bulk_profile(conn)
+            # Foreign keys are off during the load: check the loaded rows before each commit instead,
+            # unless the connection did not enforce them in the first place.
+            check_foreign_keys = previous_pragmas.get("foreign_keys") == 1 and self._has_foreign_keys(conn, table_name)
+            known_violations = self._count_foreign_key_violations(conn, table_name) if check_foreign_keys else 0
+            dropped_indexes = self._drop_secondary_indexes(conn, table_name) if rebuild_indexes else []
+            row_count = 0
+            uncommitted = 0
+            try:
+                while True:
+                    chunk = list(itertools.islice(rows, self.batch_size))
+                    if not chunk:
+                        break
+                    conn.executemany(query, chunk)
+                    row_count += len(chunk)
+                    uncommitted += len(chunk)
+                    if uncommitted >= self.commit_every:
+                        self._commit_checked(conn, table_name, check_foreign_keys, known_violations)
+                        uncommitted = 0
+                        if self.verbose:
+                            print(f"{self.__class__.__name__}::Committed {row_count} rows into '{table_name}'.")
+                self._commit_checked(conn, table_name, check_foreign_keys, known_violations)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                # Indexes are recreated even if the load failed half-way.
+                self._restore_indexes(conn, dropped_indexes)
+                self._restore_profile(conn, previous_pragmas)
+
+        seconds = time.perf_counter() - started
+        rows_per_sec = row_count / seconds if seconds > 0 else float(row_count)
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Loaded {row_count} rows into '{table_name}' in {seconds:.3f}s ({rows_per_sec:,.0f} rows/sec)")
+        return {"rows": row_count, "seconds": seconds, "rows_per_sec": rows_per_sec}
+
+    def _check_columns(self, table_name: str, columns):
+        known = {row[1] for row in self._dao.execute_query(f'PRAGMA table_info("{table_name}")', fetch_all=True)}
+        unknown = [column for column in columns if column not in known]
+        if unknown:
+            raise ValueError(f"{self.__class__.__name__}::Unknown columns for '{table_name}': {unknown}")
+
+    @staticmethod
+    def _has_foreign_keys(conn: sqlite3.Connection, table_name: str) -> bool:
+        return conn.execute(f'PRAGMA foreign_key_list("{table_name}")').fetchone() is not None
+
+    @staticmethod
+    def _count_foreign_key_violations(conn: sqlite3.Connection, table_name: str) -> int:
+        return sum(1 for _ in conn.execute(f'PRAGMA foreign_key_check("{table_name}")'))
+
+    def _commit_checked(self, conn: sqlite3.Connection, table_name: str, check_foreign_keys: bool, known_violations: int):
+        """Commit the loaded rows, unless they reference missing parent rows (the caller then rolls back)."""
+        if check_foreign_keys:
+            violations = self._count_foreign_key_violations(conn, table_name) - known_violations
+            if violations > 0:
+                raise sqlite3.IntegrityError(f"{self.__class__.__name__}::FOREIGN KEY constraint failed: "
+                                             f"{violations} loaded rows of '{table_name}' reference missing rows.")
+        conn.commit()
+
+    def _apply_bulk_profile(self, conn: sqlite3.Connection) -> dict:
+        previous = {}
+        for pragma, value in self.BULK_PRAGMAS.items():
+            previous[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return previous
+
+    @staticmethod
+    def _restore_profile(conn: sqlite3.Connection, previous: dict):
+        for pragma, value in previous.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+
+    def _drop_secondary_indexes(self, conn: sqlite3.Connection, table_name: str) -> list:
+        # Automatic indexes (PRIMARY KEY / UNIQUE constraints) have no SQL and cannot be dropped.
+        indexes = conn.execute("""
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+            """, (table_name,)).fetchall()
+        with conn:
+            for index in indexes:
+                conn.execute(f'DROP INDEX "{index[0]}"')
+        if self.verbose and indexes:
+            print(f"{self.__class__.__name__}::Dropped {len(indexes)} secondary indexes on '{table_name}'.")
+        return [(index[0], index[1]) for index in indexes]
+
+    def _restore_indexes(self, conn: sqlite3.Connection, indexes: list):
+        with conn:
+            for _, sql in indexes:
+                conn.execute(sql)
+        if self.verbose and indexes:
+            print(f"{self.__class__.__name__}::Rebuilt {len(indexes)} secondary indexes.")
+
+    @staticmethod
+    def _read_csv(stream):
+        reader = csv.reader(stream)
+        columns = next(reader, None)
+        if columns is None:
+            return [], iter(())
+        rows = (tuple(None if value == "" else value for value in row) for row in reader)
+        return columns, rows
+
+    @staticmethod
+    def _read_jsonl(stream):
+        def decode(value):
+            if isinstance(value, dict) and "$blob" in value:
+                return base64.b64decode(value["$blob"])
+            return value
+
+        lines = (line for line in stream if line.strip())
+        first_line = next(lines, None)
+        if first_line is None:
+            return [], iter(())
+        first = json.loads(first_line)
+        columns = list(first.keys())
+
+        def rows():
+            yield tuple(decode(first.get(column)) for column in columns)
+            for line in lines:
+                record = json.loads(line)
+                yield tuple(decode(record.get(column)) for column in columns)
+        return columns, rows()
+
+    @staticmethod
+    def _read_binary(stream):
+        columns = BinaryRowFormat.read_header(stream)
+        return columns, BinaryRowFormat.iter_rows(stream, len(columns))
@@ -0,0 +1,325 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import sqlite3
+import threading
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from db.dao.impl.InvoiceDao import InvoiceDao
+from db.dao.impl.TrackDao import TrackDao
+from db.dao.AdmissionController import AdmissionController
+
+try:
+    import numpy as np
+except ImportError: # Optional dependency, only needed by ColumnarSnapshot
+    np = None
+
+class ColumnarSnapshot:
+    """
+    Column-oriented copy of a table in NumPy arrays, for vectorized analytics
+    (filters, group-by, top-k, joins by key) instead of Python loops over rows.
+
+    The table is streamed 'chunk_rows' rows at a time, each chunk converted to one array
+    per column, so loading never holds the table as Python objects. refresh() only reads
+    the rows added since the last load (rowid greater than the watermark) and appends
+    them; rows updated or deleted in place are only seen by load(). The arrays are
+    read-only and replaced as a whole on refresh, so a reader keeps a consistent view.
+    NULLs are stored as NaN in float columns and as 'null_int' in integer columns.
+
+    Requires NumPy (pip install numpy).
+    """
+
+    # NULLs of integer columns (e.g. tracks without a genre) are stored as this value
+    null_int = -1
+
+    TRACK_COLUMNS = ((TrackDao._field_id, "int64"), (TrackDao._field_album_id, "int64"),
+                     (TrackDao._field_media_type_id, "int64"), (TrackDao._field_genre_id, "int64"),
+                     (TrackDao._field_milliseconds, "int64"), (TrackDao._field_bytes, "int64"),
+                     (TrackDao._field_unit_price, "float64"))
+    SALES_COLUMNS = ((InvoiceDao._field_line_id, "int64"), (InvoiceDao._field_id, "int64"),
+                     (InvoiceDao._field_track_id, "int64"), (InvoiceDao._field_unit_price, "float64"),
+                     (InvoiceDao._field_quantity, "int64"))
+
+    _comparisons = {"=": "equal", "!=": "not_equal", "<": "less", "<=": "less_equal",
+                    ">": "greater", ">=": "greater_equal"}
+    _aggregates = ("count", "sum", "mean", "min", "max")
+
+    def __init__(self, read_after: Callable[[int, Sequence[str], int], Iterable], max_rowid: Callable[[], int],
+                 columns: Sequence[Tuple[str, str]], chunk_rows: int = 50000, verbose: bool = False):
+        """
+        Initialize an empty snapshot; call load() to fill it. See tracks() and sales() for the usual tables.
+            :param read_after: Callable (after_rowid, column names, batch_size) streaming rows of the rowid
+                               followed by the columns, in rowid order (e.g. TrackDao.iter_tracks_after).
+            :param max_rowid: Callable returning the largest rowid of the table.
+            :param columns: (column, NumPy dtype) pairs, e.g. (("TrackId", "int64"), ("UnitPrice", "float64")).
+            :param chunk_rows: Number of rows converted to arrays at a time.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        if np is None:
+            raise Exception(f"{self.__class__.__name__}::NumPy is required for columnar snapshots (pip install numpy).")
+        if chunk_rows < 1:
+            raise ValueError(f"{self.__class__.__name__}::chunk_rows must be >= 1.")
+        self._read_after = read_after
+        self._max_rowid = max_rowid
+        self.columns = tuple(column for column, _ in columns)
+        self.dtypes = {column: np.dtype(dtype) for column, dtype in columns}
+        self.chunk_rows = chunk_rows
+        self.verbose = verbose
+        self._arrays: Dict[str, "np.ndarray"] = {column: self._freeze(np.empty(0, dtype=self.dtypes[column]))
+                                                 for column in self.columns}
+        self.watermark = 0
+        self._refresh_lock = threading.Lock()
+        self._stats = {"loads": 0, "refreshes": 0, "appended_rows": 0, "last_refresh_seconds": 0.0}
+
+    @classmethod
+    def tracks(cls, connection: sqlite3.Connection, chunk_rows: int = 50000, verbose: bool = False) -> "ColumnarSnapshot":
+        """
+        Snapshot of the numeric columns of tracks (see TRACK_COLUMNS), not loaded yet.
+            :param connection: SQLite connection object.
+        """
+        dao = TrackDao(connection=connection, verbose=verbose)
+        dao.read_class = AdmissionController.BACKGROUND # Full scans must not delay interactive reads
+        return cls(lambda after, columns, batch: dao.iter_tracks_after(after, columns, batch),
+                   dao.get_max_track_rowid, cls.TRACK_COLUMNS, chunk_rows=chunk_rows, verbose=verbose)
+
+    @classmethod
+    def sales(cls, connection: sqlite3.Connection, chunk_rows: int = 50000, verbose: bool = False) -> "ColumnarSnapshot":
+        """
+        Snapshot of the invoice lines of the hot database (see SALES_COLUMNS), not loaded yet.
+            :param connection: SQLite connection object.
+        """
+        dao = InvoiceDao(connection=connection, verbose=verbose)
+        dao.read_class = AdmissionController.BACKGROUND
+        return cls(lambda after, columns, batch: dao.iter_items_after(after, columns, batch),
+                   dao.get_max_item_rowid, cls.SALES_COLUMNS, chunk_rows=chunk_rows, verbose=verbose)
+
+    @staticmethod
+    def _freeze(array):
+        array.flags.writeable = False
+        return array
+
+    def _to_array(self, values: tuple, dtype):
+        try:
+            return np.array(values, dtype=dtype)
+        except TypeError:
+            # NULLs in an integer column; float columns turn them into NaN by themselves
+            return np.array([self.null_int if value is None else value for value in values], dtype=dtype)
+
+    def _read_chunks(self, after_rowid: int) -> Tuple[Dict[str, List], int, int]:
+        """Stream the rows after a rowid into lists of per-column arrays."""
+        chunks = {column: [] for column in self.columns}
+        rows = iter(self._read_after(after_rowid, self.columns, self.chunk_rows))
+        count, last_rowid = 0, after_rowid
+        while True:
+            chunk = list(islice(rows, self.chunk_rows))
+            if not chunk:
+                break
+            values = list(zip(*chunk))
+            last_rowid = values[0][-1]
+            for column, column_values in zip(self.columns, values[1:]):
+                chunks[column].append(self._to_array(column_values, self.dtypes[column]))
+            count += len(chunk)
+        return chunks, count, last_rowid
+
+    def load(self) -> int:
+        """
+        (Re)load the whole table.
+            :return: The number of rows loaded.
+        """
+        with self._refresh_lock:
+            start = time.perf_counter()
+            chunks, count, last_rowid = self._read_chunks(0)
+            self._arrays = {column: self._freeze(np.concatenate(chunks[column]) if chunks[column]
+                                                 else np.empty(0, dtype=self.dtypes[column]))
+                            for column in self.columns}
+            self.watermark = last_rowid
+            self._stats["loads"] += 1
+            self._stats["last_refresh_seconds"] = time.perf_counter() - start
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Loaded {count} rows in {self._stats['last_refresh_seconds']:.3f}s.")
+        return count
+
+    def refresh(self) -> int:
+        """
+        Append the rows added since the last load or refresh (rowid above the watermark).
+        If the table's largest rowid went below the watermark (rows deleted at its end), reload it.
+            :return: The number of rows appended (or loaded).
+        """
+        if self._max_rowid() < self.watermark:
+            return self.load()
+        with self._refresh_lock:
+            start = time.perf_counter()
+            chunks, count, last_rowid = self._read_chunks(self.watermark)
+            if count:
+                arrays = self._arrays
+                self._arrays = {column: self._freeze(np.concatenate([arrays[column]] + chunks[column]))
+                                for column in self.columns}
+                self.watermark = last_rowid
+            self._stats["refreshes"] += 1
+            self._stats["appended_rows"] += count
+            self._stats["last_refresh_seconds"] = time.perf_counter() - start
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Appended {count} rows in {self._stats['last_refresh_seconds']:.3f}s.")
+        return count
+
+    def __len__(self):
+        return len(self._arrays[self.columns[0]]) if self.columns else 0
+
+    def _column(self, arrays, column: str):
+        array = arrays.get(column)
+        if array is None:
+            raise ValueError(f"{self.__class__.__name__}::Unknown column '{column}', expected one of {self.columns}.")
+        return array
+
+    def _check_mask(self, arrays, mask):
+        if mask is not None and len(mask) != len(arrays[self.columns[0]]):
+            raise ValueError(f"{self.__class__.__name__}::The mask does not match the snapshot (refreshed since?).")
+        return mask
+
+    def column(self, column: str):
+        """
+        Get the read-only array of a column.
+            :param column: The column name.
+        """
+        return self._column(self._arrays, column)
+
+    def mask(self, column: str, operator: str, value):
+        """
+        Build a boolean row mask; combine masks with & and |, invert them with ~.
+            :param column: The column name.
+            :param operator: '=', '!=', '<', '<=', '>', '>=', 'in' (value is a list) or 'between' (value is (low, high)).
+            :param value: The compared value.
+            :return: A boolean array with one entry per row, valid until the next refresh.
+        """
+        array = self.column(column)
+        if operator == "in":
+            return np.isin(array, list(value))
+        if operator == "between":
+            low, high = value
+            return (array >= low) & (array <= high)
+        function = self._comparisons.get(operator)
+        if function is None:
+            raise ValueError(f"{self.__class__.__name__}::Unsupported operator '{operator}'.")
+        return getattr(np, function)(array, value)
+
+    def select(self, mask=None, columns: Optional[Sequence[str]] = None) -> Dict[str, "np.ndarray"]:
+        """
+        Get the rows matching a mask.
+            :param mask: A boolean mask from mask(), or None for every row.
+            :param columns: The columns to return, defaults to every column.
+            :return: A dictionary of column name to array.
+        """
+        arrays = self._arrays
+        self._check_mask(arrays, mask)
+        return {column: (self._column(arrays, column)[mask] if mask is not None else self._column(arrays, column))
+                for column in (columns or self.columns)}
+
+    def group_by(self, key: str, value: Optional[str] = None, aggregate: str = "sum",
+                 mask=None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Aggregate a column per distinct key, e.g. group_by('GenreId', 'Milliseconds', 'mean').
+            :param key: The grouping column.
+            :param value: The aggregated column (not needed for 'count').
+            :param aggregate: 'count', 'sum', 'mean', 'min' or 'max'.
+            :param mask: A boolean mask restricting the rows, or None for every row.
+            :return: (keys, values): the distinct keys in ascending order and their aggregates.
+        """
+        if aggregate not in self._aggregates:
+            raise ValueError(f"{self.__class__.__name__}::Unsupported aggregate '{aggregate}', expected one of {self._aggregates}.")
+        if aggregate != "count" and value is None:
+            raise ValueError(f"{self.__class__.__name__}::'{aggregate}' needs a value column.")
+        arrays = self._arrays
+        self._check_mask(arrays, mask)
+        keys = self._column(arrays, key)
+        values = self._column(arrays, value) if value is not None else None
+        if mask is not None:
+            keys = keys[mask]
+            values = values[mask] if values is not None else None
+        groups, inverse = np.unique(keys, return_inverse=True)
+        if aggregate == "count":
+            return groups, np.bincount(inverse, minlength=len(groups))
+        if aggregate in ("sum", "mean"):
+            sums = np.bincount(inverse, weights=values, minlength=len(groups))
+            if aggregate == "sum":
+                return groups, sums.astype(values.dtype) if values.dtype.kind == "i" else sums
+            return groups, sums / np.bincount(inverse, minlength=len(groups))
+        if not len(groups):
+            return groups, np.empty(0, dtype=values.dtype)
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(len(groups)))
+        reduce = np.minimum if aggregate == "min" else np.maximum
+        return groups, reduce.reduceat(values[order], starts)
+
+    def top_k(self, column: str, k: int = 10, largest: bool = True, mask=None,
+              columns: Optional[Sequence[str]] = None) -> Dict[str, "np.ndarray"]:
+        """
+        Get the k rows with the largest (or smallest) values of a column, without sorting every row.
+            :param column: The ranking column.
+            :param k: Number of rows.
+            :param largest: True for the largest values, False for the smallest.
+            :param mask: A boolean mask restricting the rows, or None for every row.
+            :param columns: The columns to return, defaults to every column.
+            :return: A dictionary of column name to array, in ranking order.
+        """
+        arrays = self._arrays
+        self._check_mask(arrays, mask)
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(len(arrays[self.columns[0]]))
+        ranked = self._column(arrays, column)[rows]
+        if not largest:
+            ranked = -ranked
+        k = min(k, len(rows))
+        if k <= 0:
+            rows = rows[:0]
+        else:
+            best = np.argpartition(-ranked, k - 1)[:k]
+            rows = rows[best[np.argsort(-ranked[best], kind="stable")]]
+        return {name: self._column(arrays, name)[rows] for name in (columns or self.columns)}
+
+    def lookup(self, key: str, keys, value: str, default=None):
+        """
+        Vectorized join: map keys to the value of the row holding them, e.g.
+        tracks.lookup('TrackId', sales.column('TrackId'), 'GenreId') gives the genre of every sale.
+            :param key: A column with unique values (typically the ID).
+            :param keys: Array of keys to look up.
+            :param value: The column to read.
+            :param default: Value for keys that are not found, defaults to NaN or null_int.
+            :return: An array aligned with 'keys'.
+        """
+        arrays = self._arrays
+        key_array = self._column(arrays, key)
+        value_array = self._column(arrays, value)
+        keys = np.asarray(keys)
+        if default is None:
+            default = np.nan if value_array.dtype.kind == "f" else self.null_int
+        result = np.full(len(keys), default, dtype=value_array.dtype)
+        if not len(key_array):
+            return result
+        order = np.argsort(key_array, kind="stable")
+        sorted_keys = key_array[order]
+        positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        found = sorted_keys[positions] == keys
+        result[found] = value_array[order[positions[found]]]
+        return result
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Report the memory held by the snapshot.
+            :return: Bytes per column, plus a 'total' key.
+        """
+        usage = {column: int(array.nbytes) for column, array in self._arrays.items()}
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def get_stats(self) -> dict:
+        """
+        Report the snapshot's size and refresh activity.
+            :return: A dictionary with rows, watermark, bytes, loads, refreshes, appended_rows and
+                     last_refresh_seconds keys.
+        """
+        stats = dict(self._stats)
+        stats.update(rows=len(self), watermark=self.watermark, bytes=self.memory_usage()["total"])
+        return stats
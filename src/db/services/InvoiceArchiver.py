@@ -0,0 +1,137 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import os
+import time
+from datetime import date, datetime
+from typing import Union
+from db.connection.IDbConnectionProvider import IDbConnectionProvider
+from db.dao.impl.InvoiceDao import InvoiceDao
+from db.dao.impl.SalesAnalyticsDao import SalesAnalyticsDao
+from db.migrations.MigrationRunner import MigrationRunner
+from db.migrations.SQLiteMigrations import MIGRATIONS
+
+class InvoiceArchiver:
+    """
+    Moves invoices older than a cutoff, with their lines, out of the hot database into
+    archive database files: one file per period (year or month of the invoice date).
+    Each period is moved in batches of 'batch_size' invoices, one transaction per batch,
+    so live writers only wait for one batch at a time. The manifest in the hot database
+    records the dates and IDs of every archive, so InvoiceRepository only attaches the
+    archives a query needs. Archived lines keep their revenue in the sales summaries.
+    The hot file does not shrink by itself: free pages are reused by new invoices, or
+    released by an incremental vacuum (see MaintenanceService).
+    """
+
+    PERIOD_FORMATS = {"year": "%Y", "month": "%Y_%m"}
+
+    def __init__(self, connection_provider: IDbConnectionProvider, archive_dir: str = None,
+                 period: str = "year", batch_size: int = 500, batch_pause: float = 0.0, verbose: bool = False):
+        """
+        Initialize the archiver.
+            :param connection_provider: Provider of connections to the hot database (file connections, not a replica).
+            :param archive_dir: Directory of the archive files. Defaults to an 'archive' directory next to the hot database.
+            :param period: 'year' or 'month': the range of invoice dates stored in one archive file.
+            :param batch_size: Number of invoices moved per transaction.
+            :param batch_pause: Seconds to sleep between two batches, leaving room for live traffic.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        if period not in self.PERIOD_FORMATS:
+            raise ValueError(f"{self.__class__.__name__}::Unknown period '{period}', expected one of {list(self.PERIOD_FORMATS)}.")
+        if batch_size < 1:
+            raise ValueError(f"{self.__class__.__name__}::batch_size must be >= 1.")
+        self.connection_provider = connection_provider
+        database_path = connection_provider.database_path
+        self.archive_dir = archive_dir or os.path.join(os.path.dirname(os.path.abspath(database_path)), "archive")
+        self._archive_prefix = os.path.splitext(os.path.basename(database_path))[0]
+        self.period = period
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.verbose = verbose
+
+    def archive_path(self, period_key: str) -> str:
+        """
+        Path of the archive file of a period.
+            :param period_key: Period key, e.g. '2009' or '2009_03'.
+        """
+        return os.path.join(self.archive_dir, f"{self._archive_prefix}_invoices_{period_key}.db")
+
+    def _period_bounds(self, period_key: str):
+        """First date of the period and first date of the next one, as 'YYYY-MM-DD'."""
+        if self.period == "year":
+            year = int(period_key)
+            return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+        year, month = (int(part) for part in period_key.split("_"))
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return f"{year:04d}-{month:02d}-01", f"{next_year:04d}-{next_month:02d}-01"
+
+    @staticmethod
+    def _to_date_text(value: Union[str, date, datetime]) -> str:
+        # InvoiceDate is stored as 'YYYY-MM-DD HH:MM:SS' text, compared as text.
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+    def archive_before(self, cutoff: Union[str, date, datetime]) -> dict:
+        """
+        Archive every hot invoice dated strictly before the cutoff. Safe to run again:
+        an interrupted run resumes where it stopped.
+            :param cutoff: A date, datetime or 'YYYY-MM-DD[ HH:MM:SS]' text.
+            :return: A report dictionary with invoices, lines, batches, archives ({path: invoices}),
+                     seconds and invoices_per_sec keys.
+        """
+        cutoff = self._to_date_text(cutoff)
+        start_time = time.perf_counter()
+        os.makedirs(self.archive_dir, exist_ok=True)
+        # The manifest is created by the schema migrations; a no-op once the factory has run them.
+        MigrationRunner(self.connection_provider, self.connection_provider.database_path, MIGRATIONS,
+                        verbose=self.verbose).ensure_current()
+        dao = InvoiceDao(connection=self.connection_provider.get_connection(), verbose=self.verbose)
+        invoices = lines = batches = 0
+        archives = {}
+        try:
+            if not dao.has_archive_manifest():
+                raise Exception(f"{self.__class__.__name__}::The archive manifest '{InvoiceDao.tablename_archives}' "
+                                f"is missing: the invoices table was created after the schema migrations ran.")
+            analytics_dao = SalesAnalyticsDao(connection=dao.conn, verbose=self.verbose)
+            if analytics_dao.is_table_exist():
+                analytics_dao.create_summary_tables() # Summaries installed before archiving need the Archiving flag
+            periods = dao.get_archivable_periods(cutoff, self.PERIOD_FORMATS[self.period])
+            for row in periods:
+                period_key = row[InvoiceDao._field_period]
+                path = self.archive_path(period_key)
+                alias = InvoiceDao.archive_alias(period_key)
+                start, end = self._period_bounds(period_key)
+                end = min(end, cutoff)
+                dao.attach_archive(path, alias)
+                try:
+                    while True:
+                        moved = dao.archive_batch(alias, path, period_key, start, end, self.batch_size)
+                        if moved is None:
+                            raise Exception(f"{self.__class__.__name__}::The database stayed locked, archiving stopped "
+                                            f"after {invoices} invoices.")
+                        if moved[0] == 0:
+                            break
+                        invoices += moved[0]
+                        lines += moved[1]
+                        batches += 1
+                        archives[path] = archives.get(path, 0) + moved[0]
+                        if self.batch_pause > 0:
+                            time.sleep(self.batch_pause)
+                finally:
+                    dao.detach_archive(alias)
+                if self.verbose:
+                    print(f"{self.__class__.__name__}::Archived period {period_key} into '{path}'.")
+        finally:
+            dao.conn.close()
+
+        seconds = time.perf_counter() - start_time
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Archived {invoices} invoices ({lines} lines) in {batches} batches, {seconds:.3f}s.")
+        return {"invoices": invoices, "lines": lines, "batches": batches, "archives": archives,
+                "seconds": seconds, "invoices_per_sec": invoices / seconds if seconds > 0 else float(invoices)}
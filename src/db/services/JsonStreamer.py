@@ -0,0 +1,156 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import asyncio
+import base64
+import inspect
+import json
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, Optional, Sequence, Tuple
+
+class JsonStreamer:
+    """
+    Serializes DAO rows straight to JSON (one array) or NDJSON (one object per line),
+    without entity objects: rows are taken 'chunk_rows' at a time, turned into plain
+    dictionaries keyed by the JSON field names and encoded by the C JSON encoder in one
+    call per chunk. Only one chunk is in memory at a time, whatever the size of the result.
+    Blobs are written as {"$blob": "<base64>"}, like BulkExporter's JSON Lines.
+    """
+
+    FORMATS = ("json", "ndjson")
+
+    def __init__(self, fields: Sequence[Tuple[str, str]], fmt: str = "json", chunk_rows: int = 1000):
+        """
+        Initialize the streamer.
+            :param fields: (JSON key, column) pairs, e.g. (("artist_id", ArtistDao._field_id), ...);
+                           rows must have exactly these columns, in this order.
+            :param fmt: 'json' for a single array, 'ndjson' for one object per line.
+            :param chunk_rows: Number of rows encoded and emitted per chunk.
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"{self.__class__.__name__}::Unsupported format '{fmt}', expected one of {self.FORMATS}.")
+        if chunk_rows < 1:
+            raise ValueError(f"{self.__class__.__name__}::chunk_rows must be >= 1.")
+        self.keys = tuple(key for key, _ in fields)
+        self.columns = tuple(column for _, column in fields)
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self._encode = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(",", ":"),
+                                        default=self._encode_blob).encode
+
+    @staticmethod
+    def _encode_blob(value):
+        if isinstance(value, bytes):
+            return {"$blob": base64.b64encode(value).decode("ascii")}
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def _check_columns(self, row):
+        # Values are paired with keys by position; sqlite3.Row lets us verify the columns once.
+        keys = getattr(row, "keys", None)
+        if keys is not None and tuple(keys()) != self.columns:
+            raise ValueError(f"{self.__class__.__name__}::Rows have columns {tuple(keys())}, expected {self.columns}.")
+
+    def _generate(self, rows: Iterable) -> Iterator[Tuple[str, int]]:
+        """Yield (chunk, number of rows in the chunk)."""
+        keys = self.keys
+        encode = self._encode
+        ndjson = self.fmt == "ndjson"
+        iterator = iter(rows)
+        first = True
+        if not ndjson:
+            yield "[", 0
+        while True:
+            batch = list(islice(iterator, self.chunk_rows))
+            if not batch:
+                break
+            if first:
+                self._check_columns(batch[0])
+            records = [dict(zip(keys, row)) for row in batch]
+            if ndjson:
+                chunk = "\n".join(map(encode, records)) + "\n"
+            else:
+                chunk = encode(records)[1:-1] # Strip the brackets, the chunks form one array
+                if not first:
+                    chunk = "," + chunk
+            first = False
+            yield chunk, len(batch)
+        if not ndjson:
+            yield "]", 0
+
+    def iter_chunks(self, rows: Iterable) -> Iterator[str]:
+        """
+        Serialize rows lazily.
+            :param rows: Rows (e.g. from SQLiteDao.iter_query) with the streamer's columns.
+            :return: A generator of text chunks; concatenated, they form the JSON or NDJSON document.
+        """
+        for chunk, _ in self._generate(rows):
+            yield chunk
+
+    def write(self, rows: Iterable, stream, encoding: Optional[str] = None) -> int:
+        """
+        Serialize rows into a stream, one write per chunk.
+            :param rows: Rows with the streamer's columns.
+            :param stream: Any object with a write() method (file, io.StringIO, HTTP response body, ...).
+            :param encoding: None to write text, or an encoding (e.g. 'utf-8') to write bytes.
+            :return: The number of rows written.
+        """
+        count = 0
+        for chunk, rows_in_chunk in self._generate(rows):
+            stream.write(chunk if encoding is None else chunk.encode(encoding))
+            count += rows_in_chunk
+        return count
+
+    @staticmethod
+    def _close(generator):
+        try:
+            generator.close()
+        except ValueError:
+            pass # Still running in the worker thread after a cancellation; closed when collected
+
+    async def aiter_chunks(self, rows: Iterable) -> AsyncIterator[str]:
+        """
+        Serialize rows as an async generator, e.g. for a streaming HTTP response.
+        Fetching and encoding run in a worker thread, so the event loop is never blocked by SQLite.
+            :param rows: Rows with the streamer's columns.
+            :return: An async generator of text chunks.
+        """
+        chunks = self.iter_chunks(rows)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self._close(chunks) # Releases the cursor if the consumer stops early
+
+    async def awrite(self, rows: Iterable, stream, encoding: Optional[str] = None) -> int:
+        """
+        Serialize rows into an asynchronous stream, respecting its back-pressure.
+            :param rows: Rows with the streamer's columns.
+            :param stream: An object whose write() may be a coroutine (e.g. aiofiles); if it has
+                           a drain() coroutine (asyncio.StreamWriter) it is awaited after every chunk.
+            :param encoding: None to write text, or an encoding (e.g. 'utf-8') to write bytes.
+            :return: The number of rows written.
+        """
+        generator = self._generate(rows)
+        count = 0
+        try:
+            while True:
+                item = await asyncio.to_thread(next, generator, None)
+                if item is None:
+                    break
+                chunk, rows_in_chunk = item
+                result = stream.write(chunk if encoding is None else chunk.encode(encoding))
+                if inspect.isawaitable(result):
+                    await result
+                drain = getattr(stream, "drain", None)
+                if drain is not None:
+                    await drain()
+                count += rows_in_chunk
+        finally:
+            self._close(generator)
+        return count
@@ -0,0 +1,299 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from db.connection.IDbConnectionProvider import IDbConnectionProvider
+
+class MaintenanceService:
+    """
+    Keeps a live SQLite database healthy in the background:
+    - optimize:           PRAGMA optimize (cheap, lets SQLite refresh the statistics it needs)
+    - analyze:            full ANALYZE, refreshing sqlite_stat1 for every index
+    - checkpoint:         PRAGMA wal_checkpoint(PASSIVE), in WAL mode only
+    - incremental_vacuum: returns free pages to the file system, with auto_vacuum=INCREMENTAL only
+    - integrity_check:    PRAGMA quick_check (or the full integrity_check)
+
+    A task runs when its interval has elapsed or its threshold is crossed (WAL file size,
+    free page ratio, missing statistics). Heavy tasks (analyze, incremental_vacuum,
+    integrity_check) are throttled: they only run inside the maintenance window, if one is
+    set, and once no other connection has committed for 'min_idle_seconds'. Each run is
+    recorded with its duration in get_reports().
+    """
+
+    TASKS = ("optimize", "analyze", "checkpoint", "incremental_vacuum", "integrity_check")
+    HEAVY_TASKS = ("analyze", "incremental_vacuum", "integrity_check")
+
+    def __init__(self, connection_provider: IDbConnectionProvider,
+                 optimize_interval: float = 3600, analyze_interval: float = 7 * 86400,
+                 checkpoint_interval: float = 300, wal_threshold_bytes: int = 16 * 1024 * 1024,
+                 vacuum_interval: float = 3600, freelist_threshold: float = 0.10,
+                 vacuum_pages_per_step: int = 256, step_sleep: float = 0.01,
+                 integrity_interval: float = 86400, full_integrity_check: bool = False,
+                 maintenance_window: Optional[Tuple[int, int]] = None, min_idle_seconds: float = 5.0,
+                 verbose: bool = False):
+        """
+        Initialize the maintenance service.
+            :param connection_provider: Provider of connections to the database to maintain.
+            :param optimize_interval: Seconds between two PRAGMA optimize.
+            :param analyze_interval: Seconds between two full ANALYZE.
+            :param checkpoint_interval: Seconds between two WAL checkpoints.
+            :param wal_threshold_bytes: WAL file size triggering a checkpoint before the interval.
+            :param vacuum_interval: Seconds between two incremental vacuums (if there are free pages).
+            :param freelist_threshold: Free page ratio triggering an incremental vacuum before the interval.
+            :param vacuum_pages_per_step: Pages released per incremental_vacuum step.
+            :param step_sleep: Seconds to sleep between two vacuum steps, leaving room for live traffic.
+            :param integrity_interval: Seconds between two integrity checks.
+            :param full_integrity_check: Run PRAGMA integrity_check instead of the faster quick_check.
+            :param maintenance_window: (start_hour, end_hour) in local time for heavy tasks, e.g. (1, 5)
+                                       or (22, 6); None to allow them at any hour.
+            :param min_idle_seconds: Time without commits from other connections required by heavy tasks.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self._connection_provider = connection_provider
+        self.intervals: Dict[str, float] = {
+            "optimize": optimize_interval,
+            "analyze": analyze_interval,
+            "checkpoint": checkpoint_interval,
+            "incremental_vacuum": vacuum_interval,
+            "integrity_check": integrity_interval,
+        }
+        self.wal_threshold_bytes = wal_threshold_bytes
+        self.freelist_threshold = freelist_threshold
+        self.vacuum_pages_per_step = vacuum_pages_per_step
+        self.step_sleep = step_sleep
+        self.full_integrity_check = full_integrity_check
+        self.maintenance_window = maintenance_window
+        self.min_idle_seconds = min_idle_seconds
+        self.verbose = verbose
+
+        self._conn = None
+        self._lock = threading.Lock() # One task at a time
+        # Intervals start now, so creating the service does not run every task at once;
+        # thresholds (WAL size, free pages, missing statistics) still trigger early runs.
+        self._last_run: Dict[str, float] = {task: time.monotonic() for task in self.TASKS}
+        self._data_version = None
+        self._last_activity = time.monotonic()
+        self._reports = deque(maxlen=200)
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = self._connection_provider.get_connection()
+        return self._conn
+
+    def _pragma(self, name: str):
+        return self._connection().execute(f"PRAGMA {name}").fetchone()[0]
+
+    # --- Throttling -----------------------------------------------------------------
+
+    def _observe_activity(self):
+        # data_version changes whenever another connection commits.
+        version = self._pragma("data_version")
+        if self._data_version is not None and version != self._data_version:
+            self._last_activity = time.monotonic()
+        self._data_version = version
+
+    def _in_window(self) -> bool:
+        if self.maintenance_window is None:
+            return True
+        start, end = self.maintenance_window
+        hour = datetime.now().hour
+        return start <= hour < end if start <= end else (hour >= start or hour < end)
+
+    def _throttle_reason(self, task: str) -> Optional[str]:
+        if task not in self.HEAVY_TASKS:
+            return None
+        if not self._in_window():
+            return f"outside maintenance window {self.maintenance_window}"
+        idle = time.monotonic() - self._last_activity
+        if idle < self.min_idle_seconds:
+            return f"database busy (last commit {idle:.1f}s ago)"
+        return None
+
+    # --- Thresholds ---------------------------------------------------------------
+
+    def _wal_size(self) -> int:
+        path = getattr(self._connection_provider, "database_path", None)
+        if not path or not os.path.exists(path + "-wal"):
+            return 0
+        return os.path.getsize(path + "-wal")
+
+    def _free_page_ratio(self) -> float:
+        page_count = self._pragma("page_count")
+        return self._pragma("freelist_count") / page_count if page_count else 0.0
+
+    def _statistics_missing(self) -> bool:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'").fetchone()
+        if row[0] == 0:
+            return True
+        return self._connection().execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] == 0
+
+    def _applicable(self, task: str) -> Optional[str]:
+        """Return why a task cannot run on this database, or None."""
+        if task == "checkpoint" and str(self._pragma("journal_mode")).lower() != "wal":
+            return "journal_mode is not WAL"
+        if task == "incremental_vacuum" and self._pragma("auto_vacuum") != 2:
+            return "auto_vacuum is not INCREMENTAL (see enable_incremental_vacuum)"
+        return None
+
+    def _is_due(self, task: str, now: float) -> Tuple[bool, str]:
+        if now - self._last_run[task] >= self.intervals[task]:
+            if task == "incremental_vacuum" and self._pragma("freelist_count") == 0:
+                return False, ""
+            return True, "interval elapsed"
+        if task == "checkpoint" and self._wal_size() >= self.wal_threshold_bytes:
+            return True, f"WAL larger than {self.wal_threshold_bytes} bytes"
+        if task == "incremental_vacuum" and self._free_page_ratio() >= self.freelist_threshold:
+            return True, f"free page ratio above {self.freelist_threshold:.0%}"
+        if task == "analyze" and self._statistics_missing():
+            return True, "statistics missing"
+        return False, ""
+
+    # --- Tasks ----------------------------------------------------------------------
+
+    def _run_optimize(self) -> dict:
+        self._connection().execute("PRAGMA optimize")
+        return {}
+
+    def _run_analyze(self) -> dict:
+        self._connection().execute("ANALYZE")
+        return {"stat_rows": self._connection().execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]}
+
+    def _run_checkpoint(self) -> dict:
+        busy, log_frames, checkpointed = self._connection().execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        return {"busy": bool(busy), "wal_frames": log_frames, "checkpointed_frames": checkpointed}
+
+    def _run_incremental_vacuum(self) -> dict:
+        freed_before = self._pragma("freelist_count")
+        while self._pragma("freelist_count") > 0 and not self._stop_event.is_set():
+            # Each step is its own short write transaction. executescript() steps the pragma to the
+            # end: execute() would stop after its first (column-less) result row, freeing one page.
+            self._connection().executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages_per_step)});")
+            if self.step_sleep:
+                time.sleep(self.step_sleep)
+        return {"pages_released": freed_before - self._pragma("freelist_count")}
+
+    def _run_integrity_check(self) -> dict:
+        pragma = "integrity_check" if self.full_integrity_check else "quick_check"
+        messages = [row[0] for row in self._connection().execute(f"PRAGMA {pragma}").fetchall()]
+        ok = messages == ["ok"]
+        if not ok and self.verbose:
+            print(f"{self.__class__.__name__}::{pragma} reported problems: {messages[:10]}")
+        return {"ok": ok, "messages": messages[:100]}
+
+    def run_task(self, task: str, force: bool = False) -> dict:
+        """
+        Run one maintenance task now.
+            :param task: One of TASKS.
+            :param force: If True, ignore the schedule, thresholds and throttling.
+            :return: A report dictionary with task, status ('ok', 'skipped' or 'failed'), reason,
+                     started_at, seconds and the task's own details.
+        """
+        if task not in self.TASKS:
+            raise ValueError(f"{self.__class__.__name__}::Unknown task '{task}', expected one of {self.TASKS}.")
+        with self._lock:
+            report = {"task": task, "status": "skipped", "reason": "",
+                      "started_at": datetime.now().isoformat(timespec="seconds"), "seconds": 0.0}
+            try:
+                self._observe_activity()
+                reason = self._applicable(task)
+                if reason is None and not force:
+                    due, why = self._is_due(task, time.monotonic())
+                    reason = self._throttle_reason(task) if due else "not due"
+                    report["reason"] = why
+                if reason is not None:
+                    report["reason"] = reason
+                    return report
+                started = time.perf_counter()
+                report.update(getattr(self, f"_run_{task}")())
+                report["seconds"] = time.perf_counter() - started
+                report["status"] = "ok"
+                self._last_run[task] = time.monotonic()
+                # Our own writes must not count as activity from other connections.
+                self._data_version = self._pragma("data_version")
+            except sqlite3.Error as e:
+                report["status"] = "failed"
+                report["reason"] = str(e)
+            self._reports.append(report)
+            if self.verbose:
+                print(f"{self.__class__.__name__}::{task} {report['status']} in {report['seconds']:.3f}s {report['reason']}")
+            return report
+
+    def run_pending(self) -> List[dict]:
+        """
+        Run every task that is due and not throttled.
+            :return: The reports of the tasks that ran or failed.
+        """
+        reports = [self.run_task(task) for task in self.TASKS]
+        return [report for report in reports if report["status"] != "skipped"]
+
+    def enable_incremental_vacuum(self) -> dict:
+        """
+        Switch the database to auto_vacuum=INCREMENTAL. This needs a full VACUUM, which rewrites
+        the whole file and blocks writers while it runs: call it during a maintenance period.
+            :return: A report dictionary with task, status and seconds keys.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            self._connection().execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self._connection().execute("VACUUM")
+            report = {"task": "enable_incremental_vacuum",
+                      "status": "ok" if self._pragma("auto_vacuum") == 2 else "failed",
+                      "reason": "", "started_at": datetime.now().isoformat(timespec="seconds"),
+                      "seconds": time.perf_counter() - started}
+            self._reports.append(report)
+            return report
+
+    def get_reports(self, task: Optional[str] = None) -> List[dict]:
+        """
+        Get the reports of the tasks that ran or failed (skipped checks are not recorded), oldest first.
+            :param task: Only the reports of this task, or None for all of them.
+        """
+        with self._lock:
+            return [dict(report) for report in self._reports if task is None or report["task"] == task]
+
+    def start(self, check_interval: float = 30.0):
+        """
+        Start a background thread running the due tasks every 'check_interval' seconds.
+            :param check_interval: Delay between two checks.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError(f"{self.__class__.__name__}::Maintenance is already running.")
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(check_interval):
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    # A failed check must not stop the schedule; the next one retries.
+                    if self.verbose:
+                        print(f"{self.__class__.__name__}::Maintenance check failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="MaintenanceService", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the background thread, waiting for a running task to finish, and close the connection.
+            :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
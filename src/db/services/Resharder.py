@@ -0,0 +1,158 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import os
+import sqlite3
+import time
+from typing import Sequence
+from db.connection.impl.ShardedSQLiteConnectionProvider import ShardedSQLiteConnectionProvider
+from db.connection.impl.SQLiteConnectionProvider import SQLiteConnectionProvider
+from db.dao.impl.ArtistDao import ArtistDao
+
+class Resharder:
+    """
+    Copies artists from one or more source databases (a single file or the shards of
+    a previous layout) into a sharded target, routing every row by its ID.
+    IDs are preserved, so references from other tables stay valid. Rows are read in ID
+    pages and written in batches, and writes are upserts, so a run can safely be repeated.
+    A source that is also a target shard (resharding in place) keeps the rows that still
+    route to it; the others are deleted from it once their copies are committed. Artists
+    are moved alone, so an in-place run is refused before copying anything if another
+    table (e.g. albums) references an artist that would leave its file.
+    """
+
+    def __init__(self, target: ShardedSQLiteConnectionProvider, batch_size: int = 2000, verbose: bool = False):
+        """
+        Initialize the resharder.
+            :param target: Connection provider of the target shard layout.
+            :param batch_size: Number of rows read per page, and buffered per target shard before writing them.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        self.target = target
+        self.batch_size = batch_size
+        self.verbose = verbose
+
+    def _iter_pages(self, source: ArtistDao):
+        # Each page is fully fetched, so the source holds no read lock while the batches are written
+        # (the source may be one of the target shards).
+        columns = f"{ArtistDao._field_id}, {ArtistDao._field_name}"
+        rows = source.execute_query(f"SELECT {columns} FROM {ArtistDao.tablename} ORDER BY {ArtistDao._field_id} LIMIT ?",
+                                    (self.batch_size,), fetch_all=True)
+        while rows:
+            yield rows
+            rows = source.execute_query(f"SELECT {columns} FROM {ArtistDao.tablename} WHERE {ArtistDao._field_id} > ? "
+                                        f"ORDER BY {ArtistDao._field_id} LIMIT ?",
+                                        (rows[-1][ArtistDao._field_id], self.batch_size), fetch_all=True)
+
+    @staticmethod
+    def _inbound_references(connection) -> list:
+        """(table, column) pairs referencing the artists table through a foreign key."""
+        tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()]
+        return [(table, fk[3]) for table in tables
+                for fk in connection.execute(f'PRAGMA foreign_key_list("{table}")').fetchall()
+                if fk[2].lower() == ArtistDao.tablename.lower()]
+
+    def _check_movable(self, source_path: str, in_place: int):
+        """Refuse to move artists out of a target shard while other tables of that file reference them."""
+        connection = SQLiteConnectionProvider(source_path).get_connection()
+        try:
+            blocking = {}
+            for table, column in self._inbound_references(connection):
+                rows = connection.execute(f'SELECT DISTINCT "{column}" FROM "{table}" WHERE "{column}" IN '
+                                          f'(SELECT {ArtistDao._field_id} FROM {ArtistDao.tablename})').fetchall()
+                moving = sum(1 for row in rows if self.target.shard_for_key(row[0]) != in_place)
+                if moving:
+                    blocking[f"{table}.{column}"] = moving
+        finally:
+            connection.close()
+        if blocking:
+            raise Exception(f"{self.__class__.__name__}::Cannot reshard '{source_path}' in place: artists that would "
+                            f"move are still referenced ({blocking}). Nothing was copied; reshard into new files.")
+
+    def _delete_copies(self, target_daos, artist_ids):
+        """Remove the copies of artists whose move was abandoned; the originals stay where they were."""
+        for shard_index, dao in enumerate(target_daos):
+            ids = [artist_id for artist_id in artist_ids if self.target.shard_for_key(artist_id) == shard_index]
+            for offset in range(0, len(ids), self.batch_size):
+                dao.write_batch([], ids[offset:offset + self.batch_size])
+
+    def reshard_artists(self, source_paths: Sequence[str]) -> dict:
+        """
+        Redistribute every artist of the source databases over the target shards.
+            :param source_paths: Paths of the source database files.
+            :return: A report dictionary with rows (copied), rows_per_shard, deleted_rows (moved out of
+                     sources that are target shards), seconds and rows_per_sec keys.
+            :raise Exception: If artists to move out of a target shard are referenced by other tables
+                              (checked before anything is copied).
+        """
+        start = time.perf_counter()
+        target_index = {os.path.realpath(path): index for index, path in enumerate(self.target.database_paths)}
+        for source_path in source_paths:
+            in_place = target_index.get(os.path.realpath(source_path))
+            if in_place is not None:
+                self._check_movable(source_path, in_place)
+        target_daos = [ArtistDao(connection=conn, verbose=False) for conn in self.target.get_shard_connections()]
+        pending = [[] for _ in target_daos]
+        rows_per_shard = [0] * len(target_daos)
+        deleted_rows = 0
+
+        def flush(shard_index):
+            if not pending[shard_index]:
+                return
+            if target_daos[shard_index].upsert_many(pending[shard_index]) is None:
+                raise Exception(f"{self.__class__.__name__}::Shard {shard_index} stayed locked, resharding aborted.")
+            rows_per_shard[shard_index] += len(pending[shard_index])
+            pending[shard_index] = []
+
+        try:
+            for source_path in source_paths:
+                in_place = target_index.get(os.path.realpath(source_path))
+                moved = [] # IDs copied out of a source that is also a target shard
+                source = ArtistDao(connection=SQLiteConnectionProvider(source_path).get_connection(), verbose=False)
+                try:
+                    for rows in self._iter_pages(source):
+                        for row in rows:
+                            artist_id = row[ArtistDao._field_id]
+                            shard_index = self.target.shard_for_key(artist_id)
+                            if shard_index == in_place:
+                                continue # Already on its shard
+                            pending[shard_index].append((artist_id, row[ArtistDao._field_name]))
+                            if in_place is not None:
+                                moved.append(artist_id)
+                            if len(pending[shard_index]) >= self.batch_size:
+                                flush(shard_index)
+                finally:
+                    source.conn.close()
+                if moved:
+                    # Delete the moved rows only once every copy is committed: a failed run leaves
+                    # copies, which the sharded repository ignores on a shard not owning them, never lost rows.
+                    for shard_index in range(len(target_daos)):
+                        flush(shard_index)
+                    for offset in range(0, len(moved), self.batch_size):
+                        try:
+                            result = target_daos[in_place].write_batch([], moved[offset:offset + self.batch_size])
+                        except sqlite3.IntegrityError:
+                            # Referenced since the check: the rows not deleted yet stay, their copies go.
+                            self._delete_copies(target_daos, moved[offset:])
+                            raise
+                        if result is None:
+                            raise Exception(f"{self.__class__.__name__}::Shard {in_place} stayed locked, resharding aborted.")
+                        deleted_rows += result[1]
+                if self.verbose:
+                    print(f"{self.__class__.__name__}::Read artists from '{source_path}'"
+                          + (f", moved {len(moved)} out of it." if in_place is not None else "."))
+            for shard_index in range(len(target_daos)):
+                flush(shard_index)
+        finally:
+            for dao in target_daos:
+                dao.conn.close()
+
+        seconds = time.perf_counter() - start
+        rows = sum(rows_per_shard)
+        if self.verbose:
+            print(f"{self.__class__.__name__}::Resharded {rows} artists in {seconds:.3f}s: {rows_per_shard}")
+        return {"rows": rows, "rows_per_shard": rows_per_shard, "deleted_rows": deleted_rows, "seconds": seconds,
+                "rows_per_sec": rows / seconds if seconds > 0 else float(rows)}
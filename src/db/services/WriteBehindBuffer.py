@@ -0,0 +1,256 @@
+"""
+  Copyright (c) 2025 Alexandre Kavadias
+
+  This project is licensed under the Educational and Non-Commercial Use License.
+  See the LICENSE file for details.
+"""
+import atexit
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+class WriteBehindBuffer:
+    """
+    In-memory buffer of pending writes, keyed by entity ID, flushed in batches.
+
+    Repeated writes to the same key are coalesced: a newer update replaces the pending
+    one and a delete supersedes any update (an update after a delete is dropped, it would
+    not match a row anyway). Pending writes are handed to 'writer' in one call, which is
+    expected to apply them in a single transaction:
+    - when 'max_pending' keys are pending (in the writing thread, as back-pressure),
+    - when the oldest pending write is 'flush_interval' seconds old (background thread),
+    - on flush() and on close(), which is also called at interpreter shutdown.
+    Writes are never dropped for a transient failure (database locked, query timeout, shed by
+    admission control): they are put back for the next flush. Only writes the writer rejects
+    on their own (e.g. a constraint error) are dropped, and flush()/close() raise the error.
+    """
+
+    UPDATE = "U"
+    DELETE = "D"
+
+    # Errors after which a batch is retried later rather than rejected. TimeoutError covers
+    # QueryTimeoutError and AdmissionRejectedError.
+    TRANSIENT_ERRORS = (sqlite3.OperationalError, TimeoutError)
+
+    def __init__(self, writer: Callable[[List[Tuple[Hashable, str, Any]]], Any],
+                 max_pending: int = 1000, flush_interval: float = 1.0, verbose: bool = False):
+        """
+        Initialize the buffer and start its background flush thread.
+            :param writer: Callable applying a list of (key, operation, value) in one transaction;
+                           it returns None when the batch should be retried later (e.g. database locked).
+            :param max_pending: Number of pending keys triggering a flush.
+            :param flush_interval: Maximum age, in seconds, of a pending write.
+            :param verbose: If True, print debug information. Default is False.
+        """
+        if max_pending < 1 or flush_interval <= 0:
+            raise ValueError(f"{self.__class__.__name__}::max_pending must be >= 1 and flush_interval > 0.")
+        self._writer = writer
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.verbose = verbose
+        self._pending: Dict[Hashable, Tuple[str, Any]] = {}
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock() # One flush at a time, in order
+        self._stats = {"buffered_writes": 0, "coalesced_writes": 0, "flushes": 0, "flushed_writes": 0,
+                       "failed_flushes": 0, "rejected_writes": 0, "total_flush_seconds": 0.0, "max_flush_seconds": 0.0,
+                       "last_flush_seconds": 0.0}
+        self._last_error: Optional[str] = None
+        self._dropped_errors: List[Exception] = [] # Raised by the next flush() or close()
+        self._closed = False
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="WriteBehindBuffer-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval / 4):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                self._flush() # Errors are raised by the next flush() or close() of the owner
+
+    def put(self, key: Hashable, operation: str, value: Any = None):
+        """
+        Buffer a write, merging it with the pending write of the same key.
+            :param key: The entity ID.
+            :param operation: WriteBehindBuffer.UPDATE or WriteBehindBuffer.DELETE.
+            :param value: The update payload (ignored for deletes).
+        """
+        if operation not in (self.UPDATE, self.DELETE):
+            raise ValueError(f"{self.__class__.__name__}::Unknown operation '{operation}'.")
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.__class__.__name__}::The buffer is closed.")
+            self._stats["buffered_writes"] += 1
+            previous = self._pending.get(key)
+            if previous is not None:
+                self._stats["coalesced_writes"] += 1
+                if previous[0] == self.DELETE:
+                    return
+            self._pending[key] = (operation, value)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._flush()
+
+    def get_pending(self, key: Hashable) -> Optional[Tuple[str, Any]]:
+        """
+        Get the pending write of a key, so reads can see it before it is flushed.
+            :return: A tuple (operation, value), or None if nothing is pending for the key.
+        """
+        with self._lock:
+            return self._pending.get(key)
+
+    @property
+    def backlog(self) -> int:
+        """Number of keys with a pending write."""
+        with self._lock:
+            return len(self._pending)
+
+    def _requeue(self, batch: Dict[Hashable, Tuple[str, Any]]):
+        # Called with _lock held. Same rules as put(): a newer write wins unless the requeued one is a delete.
+        merged = {}
+        for key, write in batch.items():
+            newer = self._pending.get(key)
+            merged[key] = write if newer is None or write[0] == self.DELETE else newer
+        for key, write in self._pending.items():
+            merged.setdefault(key, write)
+        self._pending = merged
+        if self._pending and self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def _apply_one_by_one(self, batch: Dict[Hashable, Tuple[str, Any]]) -> Tuple[int, Dict[Hashable, Tuple[str, Any]]]:
+        """
+        Apply the writes of a rejected batch separately, dropping those the writer rejects.
+            :return: The number of writes applied, and the writes to retry later.
+        """
+        written = 0
+        retry = {}
+        for key, (operation, value) in batch.items():
+            try:
+                if self._writer([(key, operation, value)]) is None:
+                    retry[key] = (operation, value)
+                else:
+                    written += 1
+            except self.TRANSIENT_ERRORS as e:
+                retry[key] = (operation, value)
+                with self._lock:
+                    self._last_error = f"{key}: {e}"
+            except Exception as e:
+                with self._lock:
+                    self._stats["rejected_writes"] += 1
+                    self._last_error = f"{key}: {e}"
+                    self._dropped_errors.append(e)
+                if self.verbose:
+                    print(f"{self.__class__.__name__}::Dropped write {operation} on {key}: {e}")
+        return written, retry
+
+    def _flush(self) -> int:
+        """Write every pending write now; errors of dropped writes are kept for _raise_dropped()."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending, self._oldest = self._pending, {}, None
+            items = [(key, operation, value) for key, (operation, value) in batch.items()]
+            started = time.perf_counter()
+            try:
+                applied = self._writer(items)
+                written, retry = (len(items), {}) if applied is not None else (0, batch)
+            except self.TRANSIENT_ERRORS as e:
+                if self.verbose:
+                    print(f"{self.__class__.__name__}::Batch of {len(items)} writes failed ({e}), retrying it later.")
+                with self._lock:
+                    self._last_error = str(e)
+                written, retry = 0, batch
+            except Exception as e:
+                if self.verbose:
+                    print(f"{self.__class__.__name__}::Batch of {len(items)} writes failed ({e}), applying them one by one.")
+                written, retry = self._apply_one_by_one(batch)
+            seconds = time.perf_counter() - started
+            with self._lock:
+                if retry:
+                    self._requeue(retry)
+                if retry is batch:
+                    self._stats["failed_flushes"] += 1
+                else:
+                    self._stats["flushes"] += 1
+                    self._stats["flushed_writes"] += written
+                    self._stats["total_flush_seconds"] += seconds
+                    self._stats["last_flush_seconds"] = seconds
+                    self._stats["max_flush_seconds"] = max(self._stats["max_flush_seconds"], seconds)
+            if self.verbose:
+                print(f"{self.__class__.__name__}::Flushed {written}/{len(items)} writes in {seconds * 1000:.2f} ms.")
+            return written
+
+    def _raise_dropped(self):
+        with self._lock:
+            dropped, self._dropped_errors = self._dropped_errors, []
+        if dropped:
+            raise dropped[0]
+
+    def flush(self) -> int:
+        """
+        Write every pending write now, in one call to the writer.
+        If the writer returns None or fails with a transient error (TRANSIENT_ERRORS), the batch is
+        put back for the next flush. If it raises another error, the writes are applied one by one:
+        those still raising it are dropped, reported in get_stats() (rejected_writes, last_error),
+        and the first error is raised, including for writes dropped by background flushes.
+            :return: The number of writes flushed.
+        """
+        written = self._flush()
+        self._raise_dropped()
+        return written
+
+    def get_stats(self) -> dict:
+        """
+        Report the buffer's activity.
+            :return: A dictionary with backlog, oldest_pending_seconds, buffered_writes, coalesced_writes,
+                     flushes, flushed_writes, failed_flushes, rejected_writes, last_error
+                     and last/avg/max_flush_ms keys.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            backlog = len(self._pending)
+            oldest = time.monotonic() - self._oldest if self._oldest is not None else 0.0
+            last_error = self._last_error
+        total_seconds = stats.pop("total_flush_seconds")
+        return {
+            "backlog": backlog,
+            "oldest_pending_seconds": oldest,
+            "buffered_writes": stats["buffered_writes"],
+            "coalesced_writes": stats["coalesced_writes"],
+            "flushes": stats["flushes"],
+            "flushed_writes": stats["flushed_writes"],
+            "failed_flushes": stats["failed_flushes"],
+            "rejected_writes": stats["rejected_writes"],
+            "last_error": last_error,
+            "last_flush_ms": stats["last_flush_seconds"] * 1000,
+            "avg_flush_ms": total_seconds * 1000 / stats["flushes"] if stats["flushes"] else 0.0,
+            "max_flush_ms": stats["max_flush_seconds"] * 1000,
+        }
+
+    def close(self):
+        """
+        Stop the background thread and flush what is still pending. Safe to call more than once.
+        Raises the error of dropped writes, or an exception if writes could not be flushed (they stay
+        pending and flush() can be retried).
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._stop_event.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        atexit.unregister(self.close)
+        self._flush()
+        self._raise_dropped()
+        with self._lock:
+            backlog, last_error = len(self._pending), self._last_error
+        if backlog:
+            raise Exception(f"{self.__class__.__name__}::{backlog} writes could not be flushed ({last_error}); "
+                            f"they are still pending, call flush() to retry.")